@@ -0,0 +1,89 @@
+"""Diagram latency: the local syntax-tree engine vs. asking the model.
+
+    python -m benchmarks.bench_diagrams
+    python -m benchmarks.bench_diagrams --latency 2.0 --repeat 3
+
+Draws a `.mermaid` diagram for every Python file in this repository, once
+with the local engine (first render, then a cached re-render of the same
+source) and once through the real Brain against a FakeModel with median
+latency `--latency`. Reports p50/p95/p99 per diagram for each.
+"""
+import argparse
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+from benchmarks.common import save_results, summarize
+from src.core.logger import logger
+from src.services import brain as brain_module
+from src.services.brain import Brain
+from src.services.diagrams import DiagramEngine
+from src.services.fake_model import FakeModel
+from src.services.providers import Backend, ProviderPool
+from src.services.rate_limiter import RateLimiter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def python_files() -> List[Tuple[str, str]]:
+    files = []
+    for folder in ("src", "benchmarks", "tests"):
+        for dirpath, _, names in os.walk(os.path.join(ROOT, folder)):
+            for name in sorted(names):
+                if name.endswith(".py"):
+                    with open(os.path.join(dirpath, name), encoding="utf-8") as f:
+                        files.append((name, f.read()))
+    return files
+
+def run_local(files: List[Tuple[str, str]], repeat: int) -> Dict[str, Any]:
+    first: List[float] = []
+    cached: List[float] = []
+    for _ in range(repeat):
+        engine = DiagramEngine(max_entries=len(files))
+        for name, source in files:
+            started = time.perf_counter()
+            engine.render(source, name)
+            first.append(time.perf_counter() - started)
+        for name, source in files:
+            started = time.perf_counter()
+            engine.render(source, name)
+            cached.append(time.perf_counter() - started)
+    return {"first_render": summarize(first), "cached_render": summarize(cached), **engine.stats()}
+
+def run_model(files: List[Tuple[str, str]], latency: float) -> Dict[str, Any]:
+    fake = FakeModel(latency=latency, latency_sigma=0.0)
+    pool = ProviderPool([Backend("model", lambda: fake)], hedging=False)
+    brain = Brain(cache=None, limiter=RateLimiter(rpm=100_000), providers=pool)
+    seconds: List[float] = []
+    for name, source in files:
+        started = time.perf_counter()
+        brain.visualize(name, source, use_cache=False)
+        seconds.append(time.perf_counter() - started)
+    return {**summarize(seconds), "requests": fake.calls}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="Median seconds per model answer")
+    parser.add_argument("--files", type=int, default=20, help="Files sent to the model (the local engine draws all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Local passes over every file")
+    parser.add_argument("--out", default="bench_diagrams.json")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    files = python_files()
+    local = run_local(files, args.repeat)
+    saved = brain_module.MOCK_MODE
+    try:
+        brain_module.MOCK_MODE = False
+        model = run_model(files[:args.files], args.latency)
+    finally:
+        brain_module.MOCK_MODE = saved
+
+    print(f"🏁 Diagram benchmark ({len(files)} Python files, model median {args.latency}s)")
+    for label, result in (("local", local["first_render"]), ("local cached", local["cached_render"]), ("model", model)):
+        print(f"  {label:<12} | p50 {result['p50'] * 1000:9.2f}ms  p95 {result['p95'] * 1000:9.2f}ms  "
+              f"p99 {result['p99'] * 1000:9.2f}ms")
+    print(f"  local engine: {local['failures']} files did not parse; model: {model['requests']} requests")
+    save_results(args.out, {"benchmark": "diagrams", "config": vars(args), "local": local, "model": model})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""End-to-end pipeline benchmark: watcher -> handler -> memory -> brain -> write.
+
+    python -m benchmarks.bench_pipeline --latency 0.8 --rate-limit-rate 0.05
+    python -m benchmarks.bench_pipeline --model mock --memory null      # pipeline overhead only
+    python -m benchmarks.bench_pipeline --baseline bench_pipeline.json  # compare with an earlier run
+
+Runs the real OracleHandler under a watchdog Observer in a temporary
+workspace. Gemini is replaced by a FakeModel with configurable latency, error
+and 429 rates and output size (or by the built-in MOCK_MODE answers with
+--model mock). Four workloads run one after another:
+
+  burst      many empty files created at once (generation)
+  updates    rapid multi-write `UPDATE:` edits on generated files (refactor)
+  rollbacks  `ROLLBACK` on the files that were just updated
+  large      big files dropped into the workspace (chunking + embedding)
+
+Latency is measured from the moment a file is written until the handler has
+finished with it. Results are saved as JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from watchdog.observers import Observer
+from benchmarks.common import NullMemory, rss_mb, save_results, summarize
+from src.core.config import WORKER_COUNT
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.handlers.debouncer import EventDebouncer
+from src.handlers.dispatcher import EventDispatcher
+from src.handlers.handler import OracleHandler, PLACEHOLDER_TEXT
+from src.handlers.job_store import JobStore
+from src.services import brain as brain_module
+from src.services.brain import Brain
+from src.services.cache import ResponseCache
+from src.services.fake_model import FakeModel, synthetic_code
+from src.services.memory import MemoryEngine
+from src.services.rate_limiter import RateLimiter
+from src.utils.file_ops import hash_file, read_text
+from src.utils.manifest import Manifest
+from src.utils.paths import workspace_key
+
+class TimedMemory:
+    """Wraps a memory engine and records how long learning and recall take."""
+
+    def __init__(self, memory: Any) -> None:
+        self._memory = memory
+        self.timings: Dict[str, List[float]] = {"memorize": [], "recall": []}
+        self._lock = threading.Lock()
+
+    def memorize(self, filename: str, content: str) -> None:
+        self._timed("memorize", self._memory.memorize, filename, content)
+
+    def memorize_many(self, files: Dict[str, str]) -> None:
+        self._timed("memorize", self._memory.memorize_many, files)
+
+    def recall(self, query: str, n_results: int = 2) -> Dict[str, Any]:
+        return self._timed("recall", self._memory.recall, query, n_results)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._memory, name)
+
+    def _timed(self, kind: str, fn: Callable, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.timings[kind].append(time.perf_counter() - started)
+
+class PeakRss:
+    """Samples RSS in the background and keeps the maximum."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "PeakRss":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+class Tracker:
+    """Pending operations per file and the latency of the ones that finished."""
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, tuple] = {}
+        self._cond = threading.Condition()
+        self.latencies: List[float] = []
+
+    def expect(self, path: str, done: Callable[[str], bool]) -> None:
+        with self._cond:
+            self._pending[path] = (time.perf_counter(), done)
+
+    def check(self, path: str) -> None:
+        with self._cond:
+            op = self._pending.get(path)
+            if op and op[1](path):
+                self.latencies.append(time.perf_counter() - op[0])
+                del self._pending[path]
+                self._cond.notify_all()
+
+    def wait(self, timeout: float) -> int:
+        """Waits for every pending operation; returns how many never finished."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending and self._cond.wait(max(0.0, deadline - time.monotonic())):
+                pass
+            unfinished = len(self._pending)
+            self._pending.clear()
+            return unfinished
+
+    def reset(self) -> None:
+        with self._cond:
+            self.latencies = []
+
+class Pipeline:
+    def __init__(self, args: argparse.Namespace, base: str) -> None:
+        self.args = args
+        self.root = os.path.join(base, "workspace")
+        self.staging = os.path.join(base, "staging")
+        os.makedirs(self.root)
+        os.makedirs(self.staging)
+
+        self.fake: Optional[FakeModel] = None
+        if args.model == "fake":
+            self.fake = FakeModel(
+                latency=args.latency, latency_sigma=args.latency_sigma, chunk_size=args.chunk_size,
+                error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                retry_after=args.retry_after, output_chars=args.output_chars, seed=args.seed,
+            )
+        self.limiter = RateLimiter(rpm=args.rpm)
+        self.cache = ResponseCache(os.path.join(base, "cache"))
+        memory = NullMemory() if args.memory == "null" else MemoryEngine()
+        self.memory = TimedMemory(memory)
+        self.handler = OracleHandler(
+            self.root,
+            dispatcher=EventDispatcher(workers=args.workers),
+            manifest=Manifest(None),
+            memory=self.memory,
+            jobs=JobStore(None),
+            brain=Brain(cache=self.cache, limiter=self.limiter),
+        )
+        self.handler.debouncer = EventDebouncer(self.handler._enqueue, window=args.window)
+        self.tracker = Tracker()
+        self.generated: List[str] = []
+        self.updated: List[str] = []
+        process = self.handler._process_event
+
+        def tracked_process(file_path: str, event_type: str) -> None:
+            process(file_path, event_type)
+            self.tracker.check(file_path)
+
+        self.handler._process_event = tracked_process
+
+    # --- Completion checks -----------------------------------------------
+
+    def _generated(self, path: str) -> bool:
+        return read_text(path) not in ("", PLACEHOLDER_TEXT)
+
+    def _rewritten(self, trigger: str) -> Callable[[str], bool]:
+        """The handler replaced the text we wrote and has recorded its own result."""
+        return lambda path: read_text(path) != trigger and self._learned(path)
+
+    def _learned(self, path: str) -> bool:
+        return self.handler.manifest.hash_of(workspace_key(path, self.root)) == hash_file(path)
+
+    # --- Workloads -------------------------------------------------------
+
+    def burst(self) -> List[str]:
+        paths = [os.path.join(self.root, f"helper_{i}.py") for i in range(self.args.files)]
+        for path in paths:
+            self.tracker.expect(path, self._generated)
+            open(path, "w").close()
+        self.generated = paths
+        return paths
+
+    def updates(self) -> List[str]:
+        targets = self.generated[:self.args.updates]
+        for path in targets:
+            # Typed in a few quick saves, like an editor with autosave
+            partials = ("\n# UPD", "ATE: add type hints", " and docstrings\n")
+            self.tracker.expect(path, self._rewritten(read_text(path) + "".join(partials)))
+            for partial in partials:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(partial)
+        self.updated = targets
+        return targets
+
+    def rollbacks(self) -> List[str]:
+        targets = self.updated[:self.args.rollbacks]
+        for path in targets:
+            self.tracker.expect(path, self._rewritten(read_text(path) + "\nROLLBACK\n"))
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\nROLLBACK\n")
+        return targets
+
+    def large(self) -> List[str]:
+        text = synthetic_code(self.args.large_kb * 1024)
+        paths = []
+        for i in range(self.args.large):
+            path = os.path.join(self.root, f"dataset_{i}.py")
+            # Written elsewhere and moved in, so the handler never sees a half-written file
+            staged = os.path.join(self.staging, f"dataset_{i}.py")
+            with open(staged, "w", encoding="utf-8") as f:
+                f.write(f"# dataset {i}\n" + text)
+            self.tracker.expect(path, self._learned)
+            os.replace(staged, path)
+            paths.append(path)
+        return paths
+
+    # --- Driver ----------------------------------------------------------
+
+    def run_phase(self, name: str, start: Callable[[], List[str]]) -> Dict[str, Any]:
+        self.tracker.reset()
+        started = time.perf_counter()
+        paths = start()
+        unfinished = self.tracker.wait(self.args.timeout)
+        seconds = time.perf_counter() - started
+        latencies = list(self.tracker.latencies)
+        errors = sum(1 for path in paths if os.path.exists(path) and read_text(path).startswith("# Error"))
+        print(f"  {name:<10} {len(latencies):>4}/{len(paths):<4} done in {seconds:6.2f}s | "
+              f"p50 {self._ms(latencies, 'p50')} p95 {self._ms(latencies, 'p95')} p99 {self._ms(latencies, 'p99')}")
+        return {
+            "ops": len(paths),
+            "completed": len(latencies),
+            "timed_out": unfinished,
+            "error_outputs": errors,
+            "seconds": round(seconds, 3),
+            "throughput_ops_s": round(len(latencies) / seconds, 2) if seconds else 0.0,
+            "latency_s": summarize(latencies),
+            "_latencies": latencies,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        if isinstance(self.memory._memory, MemoryEngine):
+            # Loading ChromaDB and the embedding model is startup cost, not pipeline cost
+            self.memory._memory.warm_up().join()
+
+        self.handler.start()
+        observer = Observer()
+        observer.schedule(self.handler, self.root, recursive=True)
+        observer.start()
+        phases: Dict[str, Dict[str, Any]] = {}
+        rss_start = rss_mb()
+        try:
+            with PeakRss() as peak:
+                for name, workload in (("burst", self.burst), ("updates", self.updates),
+                                       ("rollbacks", self.rollbacks), ("large", self.large)):
+                    phases[name] = self.run_phase(name, workload)
+        finally:
+            observer.stop()
+            observer.join()
+            self.handler.stop()
+
+        everything = [l for phase in phases.values() for l in phase.pop("_latencies")]
+        total_seconds = sum(phase["seconds"] for phase in phases.values())
+        return {
+            "phases": phases,
+            "overall": {
+                "ops": sum(phase["ops"] for phase in phases.values()),
+                "completed": len(everything),
+                "seconds": round(total_seconds, 3),
+                "throughput_ops_s": round(len(everything) / total_seconds, 2) if total_seconds else 0.0,
+                "latency_s": summarize(everything),
+            },
+            "memory_s": {kind: dict(summarize(values), total=round(sum(values), 3))
+                         for kind, values in self.memory.timings.items()},
+            "rss_mb": {"start": round(rss_start, 1), "peak": round(peak.peak, 1)},
+            "model_calls": self.fake.calls if self.fake else None,
+            "rate_limiter": self.limiter.stats(),
+            "dispatcher": self.handler.dispatcher.stats(),
+            "debouncer": self.handler.debouncer.stats(),
+            "response_cache": self.cache.stats(),
+            "stages": metrics.snapshot()["stages"],
+        }
+
+    @staticmethod
+    def _ms(values: List[float], key: str) -> str:
+        return f"{summarize(values)[key] * 1000:7.0f}ms"
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    """Prints how this run moved against an earlier results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"📈 Against {baseline_path}:")
+    for name, phase in results["phases"].items():
+        before = baseline.get("phases", {}).get(name)
+        if not before:
+            continue
+        for key in ("p50", "p95", "p99"):
+            old, new = before["latency_s"][key], phase["latency_s"][key]
+            change = (new - old) / old * 100 if old else 0.0
+            flag = "⚠️ " if change > 10 else ""
+            print(f"  {flag}{name:<10} {key} {old * 1000:7.0f}ms -> {new * 1000:7.0f}ms ({change:+.0f}%)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    workload = parser.add_argument_group("workload")
+    workload.add_argument("--files", type=int, default=40, help="Empty files created in the burst")
+    workload.add_argument("--updates", type=int, default=20, help="Generated files that get an UPDATE: edit")
+    workload.add_argument("--rollbacks", type=int, default=10, help="Updated files that are rolled back")
+    workload.add_argument("--large", type=int, default=5, help="Large files to learn")
+    workload.add_argument("--large-kb", type=int, default=256)
+    model = parser.add_argument_group("model")
+    model.add_argument("--model", choices=["fake", "mock"], default="fake",
+                       help="fake: FakeModel through the real Brain; mock: the instant MOCK_MODE answers")
+    model.add_argument("--latency", type=float, default=0.5, help="Median seconds per model call")
+    model.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread (0 = fixed)")
+    model.add_argument("--error-rate", type=float, default=0.0)
+    model.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with 429")
+    model.add_argument("--retry-after", type=float, default=0.5, help="Retry hint carried by fake 429s")
+    model.add_argument("--output-chars", type=int, default=2000)
+    model.add_argument("--chunk-size", type=int, default=64, help="Characters per streamed chunk")
+    model.add_argument("--seed", type=int, default=7)
+    pipeline = parser.add_argument_group("pipeline")
+    pipeline.add_argument("--memory", choices=["chroma", "null"], default="chroma")
+    pipeline.add_argument("--workers", type=int, default=WORKER_COUNT)
+    pipeline.add_argument("--rpm", type=float, default=600, help="Client-side request budget")
+    pipeline.add_argument("--window", type=float, default=0.05, help="Debounce window used for the run")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each workload")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the handler's INFO logging")
+    parser.add_argument("--out", default="bench_pipeline.json")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+    base = tempfile.mkdtemp(prefix="pythia_bench_")
+    cwd = os.getcwd()
+    # The memory database and history live relative to the working directory
+    os.chdir(base)
+    saved = (brain_module.MOCK_MODE, brain_module.model)
+    try:
+        pipeline = Pipeline(args, base)
+        brain_module.MOCK_MODE = args.model == "mock"
+        brain_module.model = pipeline.fake
+        print(f"🏁 Pipeline benchmark ({args.model} model, {args.memory} memory, {args.workers} workers)")
+        metrics.reset()
+        results = pipeline.run()
+    finally:
+        brain_module.MOCK_MODE, brain_module.model = saved
+        os.chdir(cwd)
+        shutil.rmtree(base, ignore_errors=True)
+
+    overall = results["overall"]
+    print(f"  {'overall':<10} {overall['completed']:>4}/{overall['ops']:<4} | "
+          f"{overall['throughput_ops_s']} ops/s | embedding+recall {results['memory_s']['memorize']['total'] + results['memory_s']['recall']['total']:.2f}s | "
+          f"peak RSS {results['rss_mb']['peak']} MB")
+    results = {"benchmark": "pipeline", "config": vars(args), **results}
+    save_results(args.out, results)
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
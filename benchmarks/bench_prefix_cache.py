@@ -0,0 +1,65 @@
+"""Input tokens sent with and without provider-side prompt prefix caching.
+
+    python -m benchmarks.bench_prefix_cache
+    python -m benchmarks.bench_prefix_cache --files 40 --context-tokens 6000
+
+Generates a burst of files that share the same recalled context (as files
+created together in one folder do) through the real Brain against a
+FakeModel that implements context caching, once with the cache off and once
+with it on. Reports prompt tokens actually sent and the share served from a
+cached prefix.
+"""
+import argparse
+import logging
+from typing import Any, Dict
+from benchmarks.common import save_results
+from src.core.logger import logger
+from src.services import brain as brain_module
+from src.services.brain import Brain
+from src.services.fake_model import FakeModel
+from src.services.prefix_cache import ContextCache
+from src.utils.tokens import estimate_tokens
+
+def make_context(tokens: int) -> str:
+    line = "--- MEMORY: settings.txt ---\nThe primary color is Neon Green and the API listens on port 8080.\n"
+    return line * max(1, tokens // estimate_tokens(line))
+
+def run(args: argparse.Namespace, cached: bool) -> Dict[str, Any]:
+    fake = FakeModel()
+    brain = Brain(cache=None)
+    brain.context_cache = ContextCache(enabled=cached, min_tokens=args.min_tokens)
+    context = make_context(args.context_tokens)
+    brain_module.model = fake
+    for i in range(args.files):
+        brain.generate(f"page_{i}.css", ".css", context, use_cache=False)
+    sent = estimate_tokens("x" * fake.sent_chars)
+    cached_tokens = estimate_tokens("x" * fake.cached_chars)
+    return {"calls": fake.calls, "sent_tokens": sent, "cached_tokens": cached_tokens, **brain.context_cache.stats()}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--context-tokens", type=int, default=5000, help="Size of the shared recalled context")
+    parser.add_argument("--min-tokens", type=int, default=4096, help="Smallest prefix worth caching")
+    parser.add_argument("--out", default="bench_prefix_cache.json")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    saved = (brain_module.MOCK_MODE, brain_module.model)
+    try:
+        brain_module.MOCK_MODE = False
+        full = run(args, cached=False)
+        cached = run(args, cached=True)
+    finally:
+        brain_module.MOCK_MODE, brain_module.model = saved
+
+    savings = 1 - cached["sent_tokens"] / full["sent_tokens"] if full["sent_tokens"] else 0.0
+    print(f"🏁 Prefix cache benchmark ({args.files} files sharing ~{args.context_tokens} tokens of context)")
+    print(f"  full prompts   | {full['sent_tokens']:>8} input tokens sent")
+    print(f"  cached prefix  | {cached['sent_tokens']:>8} input tokens sent, {cached['cached_tokens']} served from "
+          f"{cached['created']} cached prefix(es) ({savings:.0%} fewer sent)")
+    save_results(args.out, {"benchmark": "prefix_cache", "config": vars(args),
+                            "full": full, "cached": cached, "input_token_savings": round(savings, 3)})
+
+if __name__ == "__main__":
+    main()
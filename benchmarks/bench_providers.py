@@ -0,0 +1,61 @@
+"""Tail latency with one model vs. two backends and hedged requests.
+
+    python -m benchmarks.bench_providers
+    python -m benchmarks.bench_providers --calls 200 --latency 0.2 --sigma 0.8
+
+Sends `--calls` generations one after another through the real Brain and
+rate limiter. Both backends are FakeModels with log-normal latency (median
+`--latency`, spread `--sigma`), so a few calls take far longer than the rest,
+as real APIs do. Reports p50/p95/p99 per call for the single model and for
+a hedged pool, and how many extra requests hedging cost.
+"""
+import argparse
+import logging
+import time
+from typing import Any, Dict, List
+from benchmarks.common import save_results, summarize
+from src.core.logger import logger
+from src.services import brain as brain_module
+from src.services.brain import Brain
+from src.services.fake_model import FakeModel
+from src.services.providers import Backend, ProviderPool
+from src.services.rate_limiter import RateLimiter
+
+def run(args: argparse.Namespace, hedged: bool) -> Dict[str, Any]:
+    fakes = [FakeModel(latency=args.latency, latency_sigma=args.sigma, seed=seed) for seed in (1, 2)]
+    backends = [Backend(f"model_{i}", lambda fake=fake: fake) for i, fake in enumerate(fakes[:2 if hedged else 1])]
+    pool = ProviderPool(backends, hedging=hedged, min_hedge_delay=args.min_delay)
+    brain = Brain(cache=None, limiter=RateLimiter(rpm=100_000), providers=pool)
+    seconds: List[float] = []
+    for i in range(args.calls):
+        started = time.perf_counter()
+        brain.generate(f"file_{i}.py", ".py", use_cache=False)
+        seconds.append(time.perf_counter() - started)
+    return {**summarize(seconds), "requests": sum(fake.calls for fake in fakes), "hedged": pool.hedged}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.1, help="Median seconds per answer")
+    parser.add_argument("--sigma", type=float, default=0.8, help="Log-normal spread; higher means a longer tail")
+    parser.add_argument("--min-delay", type=float, default=0.0, help="Never hedge sooner than this")
+    parser.add_argument("--out", default="bench_providers.json")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    saved = brain_module.MOCK_MODE
+    try:
+        brain_module.MOCK_MODE = False
+        single = run(args, hedged=False)
+        hedged = run(args, hedged=True)
+    finally:
+        brain_module.MOCK_MODE = saved
+
+    print(f"🏁 Provider benchmark ({args.calls} calls, median {args.latency}s, sigma {args.sigma})")
+    for label, result in (("single model", single), ("hedged pool", hedged)):
+        print(f"  {label:<13} | p50 {result['p50']:.3f}s  p95 {result['p95']:.3f}s  p99 {result['p99']:.3f}s  "
+              f"max {result['max']:.3f}s | {result['requests']} requests")
+    save_results(args.out, {"benchmark": "providers", "config": vars(args), "single": single, "hedged": hedged})
+
+if __name__ == "__main__":
+    main()
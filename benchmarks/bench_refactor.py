@@ -0,0 +1,122 @@
+"""UPDATE: cost with search/replace patches vs. full-file rewrites.
+
+    python -m benchmarks.bench_refactor
+    python -m benchmarks.bench_refactor --lines 200 2000 --chars-per-second 400
+
+Writes a Python file of each size with a one-line `UPDATE:` request and runs
+it through the real OracleHandler once per refactor mode. Gemini is replaced
+by a FakeModel that answers the prompt it gets (the edited file, or the
+SEARCH/REPLACE blocks for the same edit) and spends time in proportion to the
+answer's length, like a real model generating tokens. Reports output tokens
+and end-to-end latency per mode and the savings of patching.
+"""
+import argparse
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Dict
+from benchmarks.common import NullMemory, save_results, summarize
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.handlers import handler as handler_module
+from src.handlers.handler import OracleHandler
+from src.handlers.job_store import JobStore
+from src.services import brain as brain_module
+from src.services.brain import Brain
+from src.services.fake_model import FakeModel
+from src.services.rate_limiter import RateLimiter
+from src.utils.file_ops import read_text
+from src.utils.manifest import Manifest
+
+INSTRUCTION = re.compile(r"^# UPDATE: make step_(\d+) return 0$", re.MULTILINE)
+
+def make_file(lines: int) -> str:
+    return "".join(f"def step_{i}(value):\n    return value * {i} + {i % 7}\n\n" for i in range(lines // 3))
+
+def edit(i: int):
+    """(old, new) text of the function the instruction targets."""
+    return (f"def step_{i}(value):\n    return value * {i} + {i % 7}\n",
+            f"def step_{i}(value):\n    return 0\n")
+
+def respond(prompt: str) -> str:
+    """What a well-behaved model would answer to either refactor prompt."""
+    match = INSTRUCTION.search(prompt.rsplit("USER INSTRUCTIONS:", 1)[-1])
+    instruction = match.group(0)
+    old, new = edit(int(match.group(1)))
+    if "SEARCH/REPLACE" in prompt:
+        return (f"<<<<<<< SEARCH\n{old}=======\n{new}>>>>>>> REPLACE\n"
+                f"<<<<<<< SEARCH\n{instruction}\n=======\n>>>>>>> REPLACE\n")
+    content = prompt.split("CURRENT CONTENT:\n", 1)[1].rsplit("\n" + "-" * 50, 1)[0]
+    return content.replace(old, new).replace(instruction + "\n", "").replace(instruction, "")
+
+def run_mode(mode: str, lines: int, runs: int, root: str) -> Dict[str, Any]:
+    handler_module.REFACTOR_MODE = mode
+    handler = OracleHandler(root, manifest=Manifest(None), memory=NullMemory(), jobs=JobStore(None),
+                            brain=Brain(cache=None, limiter=RateLimiter(rpm=10_000)))
+    metrics.reset()
+    latencies, correct = [], 0
+    original = make_file(lines)
+    for run in range(runs):
+        target = (run * 7 + lines // 6) % (lines // 3)
+        path = os.path.join(root, f"{mode}_{lines}_{run}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(original + f"# UPDATE: make step_{target} return 0\n")
+        started = time.perf_counter()
+        handler._process_event(path, "modified")
+        latencies.append(time.perf_counter() - started)
+        old, new = edit(target)
+        result = read_text(path)
+        correct += result.replace("\n", "") == original.replace(old, new).replace("\n", "")
+    sizes = metrics.snapshot()["sizes"]
+    counters = metrics.snapshot()["counters"]
+    return {
+        "response_tokens": round(sizes.get("response_tokens", {}).get("avg", 0)),
+        "latency_s": summarize(latencies),
+        "correct": f"{correct}/{runs}",
+        "patch_fallbacks": counters.get("patch_fallbacks", 0),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 500, 2000], help="File sizes to try")
+    parser.add_argument("--runs", type=int, default=3, help="Updates per size and mode")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fixed seconds per model call")
+    parser.add_argument("--chars-per-second", type=float, default=2000, help="Model output speed")
+    parser.add_argument("--verbose", action="store_true", help="Keep the handler's INFO logging")
+    parser.add_argument("--out", default="bench_refactor.json")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+    base = tempfile.mkdtemp(prefix="pythia_bench_")
+    cwd = os.getcwd()
+    # History backups live relative to the working directory
+    os.chdir(base)
+    saved = (brain_module.MOCK_MODE, brain_module.model, handler_module.REFACTOR_MODE)
+    results: Dict[str, Any] = {}
+    try:
+        brain_module.MOCK_MODE = False
+        brain_module.model = FakeModel(latency=args.latency, responder=respond,
+                                       chars_per_second=args.chars_per_second)
+        print(f"🏁 Refactor benchmark ({args.latency}s per call + {args.chars_per_second:g} output chars/s)")
+        for lines in args.lines:
+            row = {mode: run_mode(mode, lines, args.runs, base) for mode in ("rewrite", "patch")}
+            full, patch = row["rewrite"], row["patch"]
+            row["token_savings"] = round(1 - patch["response_tokens"] / full["response_tokens"], 3) if full["response_tokens"] else 0.0
+            row["latency_savings"] = round(1 - patch["latency_s"]["p50"] / full["latency_s"]["p50"], 3) if full["latency_s"]["p50"] else 0.0
+            results[str(lines)] = row
+            print(f"  {lines:>5} lines | tokens {full['response_tokens']:>6} -> {patch['response_tokens']:<5} "
+                  f"({row['token_savings']:.0%} saved) | p50 {full['latency_s']['p50']:.2f}s -> {patch['latency_s']['p50']:.2f}s "
+                  f"({row['latency_savings']:.0%} saved) | correct {full['correct']} / {patch['correct']}")
+    finally:
+        brain_module.MOCK_MODE, brain_module.model, handler_module.REFACTOR_MODE = saved
+        os.chdir(cwd)
+        shutil.rmtree(base, ignore_errors=True)
+
+    save_results(args.out, {"benchmark": "refactor", "config": vars(args), "sizes": results})
+
+if __name__ == "__main__":
+    main()
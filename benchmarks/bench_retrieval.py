@@ -0,0 +1,91 @@
+"""Retrieval quality and recall latency per recall mode (vector, lexical, hybrid).
+
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --corpus my_project --queries my_queries.json
+
+Memorizes a corpus into a fresh MemoryEngine (in a temp folder), then runs
+every query in each mode and scores where the expected file ranks. The
+default corpus is the fixture used by tests/test_lexical.py. Queries are a
+JSON list of {"query": ..., "expected": <relative path>}.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+from benchmarks.common import save_results, summarize
+from src.services.memory import MemoryEngine
+from src.utils.file_ops import read_text
+from src.utils.paths import walk_workspace
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "retrieval")
+
+def load_corpus(root: str) -> Dict[str, str]:
+    return {key: read_text(entry.path) for key, entry in walk_workspace(root)}
+
+def evaluate(memory: MemoryEngine, queries: List[Dict[str, str]], mode: str, k: int) -> Dict[str, Any]:
+    reciprocal_ranks, latencies = [], []
+    lexical_only_before = memory.lexical_only
+    for case in queries:
+        started = time.perf_counter()
+        results = memory.recall(case["query"], n_results=k, mode=mode)
+        latencies.append(time.perf_counter() - started)
+        files: List[str] = []
+        for meta in (results.get("metadatas") or [[]])[0]:
+            if meta["filename"] not in files:
+                files.append(meta["filename"])
+        rank = files.index(case["expected"]) + 1 if case["expected"] in files else None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {
+        "hit_at_1": round(sum(rr == 1.0 for rr in reciprocal_ranks) / len(queries), 3),
+        f"recall_at_{k}": round(sum(rr > 0 for rr in reciprocal_ranks) / len(queries), 3),
+        "mrr": round(sum(reciprocal_ranks) / len(queries), 3),
+        "latency_s": summarize(latencies),
+        "lexical_only_queries": memory.lexical_only - lexical_only_before,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(FIXTURES, "corpus"))
+    parser.add_argument("--queries", default=os.path.join(FIXTURES, "queries.json"))
+    parser.add_argument("--modes", nargs="+", default=["vector", "lexical", "hybrid"])
+    parser.add_argument("-k", type=int, default=5, help="Chunks recalled per query")
+    parser.add_argument("--out", default="bench_retrieval.json")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    with open(args.queries, encoding="utf-8") as f:
+        queries = json.load(f)
+    out = os.path.abspath(args.out)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The database lives relative to the working directory
+        os.chdir(workdir)
+        try:
+            memory = MemoryEngine()
+            started = time.perf_counter()
+            memory.memorize_many(corpus)
+            learn_seconds = time.perf_counter() - started
+            results = {}
+            for mode in args.modes:
+                # Fresh caches per mode so every query really runs
+                memory._bump_generation()
+                results[mode] = evaluate(memory, queries, mode, args.k)
+                r = results[mode]
+                print(f"{mode:<8} hit@1 {r['hit_at_1']:.2f} | MRR {r['mrr']:.2f} | "
+                      f"p50 {r['latency_s']['p50'] * 1000:.2f}ms | lexical-only {r['lexical_only_queries']}/{len(queries)}")
+        finally:
+            os.chdir(cwd)
+
+    save_results(out, {
+        "benchmark": "retrieval",
+        "files": len(corpus),
+        "queries": len(queries),
+        "learn_seconds": round(learn_seconds, 3),
+        "modes": results,
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Project scaffolding: parallel generation vs. one file at a time.
+
+    python -m benchmarks.bench_scaffold
+    python -m benchmarks.bench_scaffold --files 16 --latency 1.5 --workers 1 4 8
+
+Runs the Architect through the real Brain and rate limiter against a FakeModel
+that plans `--files` files (a config file, models that need it, and modules
+that need the models) and takes `--latency` seconds per answer. Reports the
+wall-clock time for each worker count.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict
+from benchmarks.common import NullMemory, save_results
+from src.core.logger import logger
+from src.services import brain as brain_module
+from src.services.architect import Architect
+from src.services.brain import Brain
+from src.services.cache import ResponseCache
+from src.services.fake_model import FakeModel, synthetic_code
+from src.services.rate_limiter import RateLimiter
+
+def make_plan(files: int) -> str:
+    models = max(1, (files - 1) // 3)
+    entries = [{"path": "config.py", "purpose": "Settings", "depends_on": []}]
+    entries += [{"path": f"models/model_{i}.py", "purpose": "A model", "depends_on": ["config.py"]}
+                for i in range(models)]
+    entries += [{"path": f"app/module_{i}.py", "purpose": "A feature",
+                 "depends_on": [f"models/model_{i % models}.py"]} for i in range(files - 1 - models)]
+    return json.dumps({"files": entries})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per model answer")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rpm", type=float, default=600, help="Client-side request budget")
+    parser.add_argument("--out", default="bench_scaffold.json")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    plan = make_plan(args.files)
+    code = synthetic_code(1500)
+    fake = FakeModel(latency=args.latency, responder=lambda prompt: plan if "Software Architect" in prompt else code)
+    base = tempfile.mkdtemp(prefix="pythia_bench_")
+    saved = (brain_module.MOCK_MODE, brain_module.model)
+    results: Dict[str, Any] = {}
+    try:
+        brain_module.MOCK_MODE = False
+        brain_module.model = fake
+        print(f"🏁 Scaffold benchmark ({args.files} files, {args.latency}s per answer)")
+        for workers in args.workers:
+            # A fresh cache per run, or later runs would just replay the first
+            brain = Brain(cache=ResponseCache(os.path.join(base, f"cache_{workers}")), limiter=RateLimiter(rpm=args.rpm))
+            report = Architect(brain, NullMemory(), workers=workers).scaffold(
+                os.path.join(base, f"project_{workers}"), "demo", "A demo project")
+            results[str(workers)] = {
+                "files": len(report.written),
+                "wall_seconds": round(report.wall_seconds, 3),
+                "sequential_seconds": round(report.sequential_seconds, 3),
+                "speedup": round(report.sequential_seconds / report.wall_seconds, 2),
+            }
+            print(f"  {workers:>2} workers | {len(report.written)} files in {report.wall_seconds:.2f}s "
+                  f"(one at a time ~{report.sequential_seconds:.2f}s, {results[str(workers)]['speedup']}x)")
+    finally:
+        brain_module.MOCK_MODE, brain_module.model = saved
+        shutil.rmtree(base, ignore_errors=True)
+
+    save_results(args.out, {"benchmark": "scaffold", "config": vars(args), "workers": results})
+
+if __name__ == "__main__":
+    main()
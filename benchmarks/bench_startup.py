@@ -0,0 +1,66 @@
+"""Cold-start time: how long until Pythia is online and until it is fully warm.
+
+    python -m benchmarks.bench_startup --runs 5
+
+Each run starts a fresh interpreter (so no module is already imported) that
+imports the handler, builds and starts it, then waits for the background
+warm-up of ChromaDB, the embedding model and Gemini. Reports the median of
+every phase across runs.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from benchmarks.common import save_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from src.handlers.handler import OracleHandler
+t_import = time.perf_counter()
+handler = OracleHandler(sys.argv[1])
+handler.start()
+t_online = time.perf_counter()
+memory_thread = handler.memory.warm_up()
+from src.services import brain
+brain_thread = brain.warm_up()
+memory_thread.join()
+brain_thread.join()
+t_warm = time.perf_counter()
+handler.stop()
+print(json.dumps({
+    "import_s": t_import - t0,
+    "online_s": t_online - t0,
+    "warm_s": t_warm - t0,
+}))
+"""
+
+def run_once(root: str) -> dict:
+    # Run inside the temp folder so the child's database and manifest land there
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    output = subprocess.run([sys.executable, "-c", CHILD, root], capture_output=True, text=True,
+                            check=True, cwd=root, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", default="bench_startup.json")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as root:
+            runs.append(run_once(root))
+    medians = {phase: round(statistics.median(run[phase] for run in runs), 3) for phase in runs[0]}
+    print(f"import {medians['import_s']}s | online {medians['online_s']}s | fully warm {medians['warm_s']}s "
+          f"(median of {len(runs)})")
+    save_results(args.out, {"benchmark": "startup", "median": medians, "runs": runs})
+
+if __name__ == "__main__":
+    main()
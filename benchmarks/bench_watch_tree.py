@@ -0,0 +1,110 @@
+"""Event latency and RSS of recursive watching as the workspace tree grows.
+
+    python -m benchmarks.bench_watch_tree --sizes 1000 10000 100000
+
+Builds a nested tree (100 files per folder) for each size, watches it
+recursively with the real OracleHandler (memory and brain stubbed out), then
+edits random files one at a time and measures how long each edit takes to
+reach _process_event.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock
+from watchdog.observers import Observer
+from benchmarks.common import NullMemory, rss_mb, save_results, summarize
+from src.handlers.debouncer import EventDebouncer
+from src.handlers.handler import OracleHandler
+from src.handlers.job_store import JobStore
+from src.utils.manifest import Manifest
+
+FILES_PER_DIR = 100
+
+def build_tree(root: str, files: int) -> list:
+    paths = []
+    for i in range(files):
+        folder = os.path.join(root, f"pkg_{i // (FILES_PER_DIR * 10)}", f"mod_{i // FILES_PER_DIR}")
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(folder, exist_ok=True)
+            os.makedirs(os.path.join(folder, "__pycache__"), exist_ok=True)
+        path = os.path.join(folder, f"file_{i}.py")
+        with open(path, "w") as f:
+            f.write(f"VALUE = {i}\n")
+        paths.append(path)
+    return paths
+
+def run(files: int, samples: int, window: float) -> dict:
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        paths = build_tree(root, files)
+        build_seconds = time.perf_counter() - started
+
+        handler = OracleHandler(root, manifest=Manifest(None), memory=NullMemory(), brain=MagicMock(),
+                                jobs=JobStore(None))
+        handler.debouncer = EventDebouncer(handler._enqueue, window=window)
+        seen = {}
+        arrived = threading.Event()
+        process = handler._process_event
+
+        def timed_process(file_path, event_type):
+            seen[file_path] = time.perf_counter()
+            arrived.set()
+            process(file_path, event_type)
+
+        handler._process_event = timed_process
+        handler.start()
+
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        observer = Observer()
+        observer.schedule(handler, root, recursive=True)
+        observer.start()
+        watch_seconds = time.perf_counter() - started
+        rss_watching = rss_mb()
+
+        latencies = []
+        for path in random.sample(paths, min(samples, len(paths))):
+            arrived.clear()
+            sent = time.perf_counter()
+            with open(path, "a") as f:
+                f.write("# edited\n")
+            if arrived.wait(timeout=10):
+                latencies.append(seen[path] - sent)
+
+        observer.stop()
+        observer.join()
+        handler.stop()
+
+    return {
+        "files": files,
+        "build_seconds": round(build_seconds, 2),
+        "watch_setup_seconds": round(watch_seconds, 3),
+        "rss_mb_before_watch": round(rss_before, 1),
+        "rss_mb_watching": round(rss_watching, 1),
+        "event_latency_s": summarize(latencies),
+        "debounce_window_s": window,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--window", type=float, default=0.05, help="Debounce window used for the run")
+    parser.add_argument("--out", default="bench_watch_tree.json")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = run(size, args.samples, args.window)
+        latency = result["event_latency_s"]
+        print(f"{size:>7} files | watch setup {result['watch_setup_seconds']:>6}s | "
+              f"RSS {result['rss_mb_watching']:>6} MB | latency p50 {latency['p50'] * 1000:.1f}ms "
+              f"p95 {latency['p95'] * 1000:.1f}ms")
+        results.append(result)
+    save_results(args.out, {"benchmark": "watch_tree", "runs": results})
+
+if __name__ == "__main__":
+    main()
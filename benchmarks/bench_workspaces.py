@@ -0,0 +1,80 @@
+"""Memory footprint: one daemon serving N workspaces vs. N single-folder processes.
+
+    python -m benchmarks.bench_workspaces --workspaces 4
+
+Each setup runs in fresh interpreters inside a temporary folder (mock model,
+metrics off). A process starts its workspaces, waits for the memory warm-up
+(ChromaDB and, if it can be loaded, the embedding model), learns a few files
+per workspace and then reports its resident set size. The single-folder
+setup is the sum over its N processes.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+from benchmarks.common import save_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, os, sys, time
+from benchmarks.common import rss_mb
+from src.core.workspaces import load_workspaces
+from src.handlers.daemon import WorkspaceDaemon
+from src.services import memory
+names = sys.argv[1:]
+workspaces = load_workspaces([{"name": name, "path": name} for name in names])
+daemon = WorkspaceDaemon(workspaces)
+daemon.start()
+for handler in daemon.handlers.values():
+    handler.memory.warm_up().join()
+    for n in range(5):
+        with open(os.path.join(handler.root, f"notes_{n}.txt"), "w") as f:
+            f.write(f"Note {n} of {handler.root}\n" * 20)
+time.sleep(2)
+daemon.dispatcher.join(timeout=30)
+rss = rss_mb()
+daemon.stop()
+try:
+    memory.shared_embedder()(["probe"])
+    loaded = True
+except Exception:
+    loaded = False
+print(json.dumps({"rss_mb": rss, "embedder_loaded": loaded}))
+"""
+
+def run_process(root: str, names: List[str]) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHIA_MOCK_MODE="true", PYTHIA_METRICS="false")
+    output = subprocess.run([sys.executable, "-c", CHILD, *names], capture_output=True, text=True,
+                            check=True, cwd=root, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workspaces", type=int, default=4)
+    parser.add_argument("--out", default="bench_workspaces.json")
+    args = parser.parse_args()
+
+    names = [f"team_{n}" for n in range(args.workspaces)]
+    with tempfile.TemporaryDirectory() as root:
+        shared = run_process(root, names)
+    separate = []
+    for name in names:
+        with tempfile.TemporaryDirectory() as root:
+            separate.append(run_process(root, [name]))
+    total = sum(run["rss_mb"] for run in separate)
+
+    print(f"🏁 Workspace benchmark ({args.workspaces} workspaces)")
+    print(f"  one daemon      | {shared['rss_mb']:8.1f} MB")
+    print(f"  one per folder  | {total:8.1f} MB  ({args.workspaces} x ~{total / args.workspaces:.1f} MB)")
+    print(f"  saved           | {total - shared['rss_mb']:8.1f} MB ({1 - shared['rss_mb'] / total:.0%})")
+    if not shared["embedder_loaded"]:
+        print("  ⚠️ The embedding model could not be loaded (offline?): with it, every extra process holds another copy")
+    save_results(args.out, {"benchmark": "workspaces", "config": vars(args), "shared": shared,
+                            "separate": separate, "separate_total_mb": round(total, 1)})
+
+if __name__ == "__main__":
+    main()
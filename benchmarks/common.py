@@ -0,0 +1,55 @@
+import json
+import os
+import resource
+import sys
+from typing import Any, Dict, List
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        # No /proc (macOS): fall back to the peak, which is the best we have
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+def save_results(path: str, results: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to {path}")
+
+class NullMemory:
+    """MemoryEngine stand-in so benchmarks measure the pipeline, not ChromaDB."""
+
+    def memorize(self, filename: str, content: str) -> None:
+        pass
+
+    def memorize_many(self, files: Dict[str, str]) -> None:
+        pass
+
+    def forget(self, filename: str) -> None:
+        pass
+
+    def forget_many(self, filenames: List[str]) -> None:
+        pass
+
+    def recall(self, query: str, n_results: int = 2) -> Dict[str, Any]:
+        return {"documents": [], "metadatas": []}
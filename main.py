@@ -1,28 +1,47 @@
+import argparse
 import time
-import os
-from watchdog.observers import Observer
-from src.core.config import TARGET_FOLDER
-from src.handlers.handler import OracleHandler
-from src.utils.file_ops import ensure_workspace
+from src.core.metrics import MetricsExporter, metrics
+from src.core.workspaces import load_workspaces
+from src.handlers.daemon import WorkspaceDaemon
+from src.services.memory import MemoryEngine
+
+def compact_memory() -> None:
+    """Applies the retention limits, rebuilds each workspace's memory index and reports what it saved."""
+    print("🧹 Compacting memory (stop the Oracle first; this takes a moment)...")
+    for workspace in load_workspaces():
+        report = MemoryEngine(collection=workspace.collection).compact()
+        before, after = report["before"], report["after"]
+        print(f"   [{workspace.name}]")
+        print(f"   Forgotten:   {report['expired']} expired, {report['evicted']} over the size limits")
+        print(f"   Chunks:      {before['chunks']} -> {after['chunks']}")
+        print(f"   On disk:     {before['bytes_on_disk'] / 1024**2:.1f} MB -> {after['bytes_on_disk'] / 1024**2:.1f} MB")
+        print(f"   Query (p50): {before['query_ms']:.2f} ms -> {after['query_ms']:.2f} ms")
 
 if __name__ == "__main__":
-    # Ensure the target folder exists
-    ensure_workspace(TARGET_FOLDER)
-    
+    parser = argparse.ArgumentParser(description="Pythia, the file-watching oracle")
+    parser.add_argument("--compact", action="store_true",
+                        help="Apply the memory retention limits, rebuild the index, report and exit")
+    if parser.parse_args().compact:
+        compact_memory()
+        raise SystemExit(0)
+
+    daemon = WorkspaceDaemon()
+
     print("---------------------------------------------------")
     print(f"👁️  PYTHIA v2.0 (Refactored) IS ONLINE")
-    print(f"📂 Watching: {TARGET_FOLDER}")
+    for workspace in daemon.workspaces:
+        print(f"📂 Watching: {workspace.root}" + (f"  [{workspace.name}]" if len(daemon.workspaces) > 1 else ""))
     print("---------------------------------------------------")
 
-    event_handler = OracleHandler()
-    observer = Observer()
-    observer.schedule(event_handler, TARGET_FOLDER, recursive=False)
-    observer.start()
+    daemon.start()
+    exporter = MetricsExporter(metrics)
+    exporter.start()
 
     try:
         while True:
             time.sleep(1)
+            daemon.tick()
     except KeyboardInterrupt:
-        observer.stop()
         print("\n💤 The Oracle sleeps.")
-    observer.join()
\ No newline at end of file
+    daemon.stop()
+    exporter.stop()
@@ -8,19 +8,137 @@ load_dotenv()
 API_KEY = os.getenv("GEMINI_API_KEY")
 
 # ⚙️ Settings
-MOCK_MODE = False
+MOCK_MODE = os.getenv("PYTHIA_MOCK_MODE", "false").lower() in ("1", "true", "yes")
 MODEL_NAME = "gemini-2.0-flash" 
 TEMPERATURE = 0.4
 MAX_RETRIES = 3
-RETRY_DELAY_BASE = 30
+RETRY_DELAY_BASE = 2        # First backoff after a 429, doubled on every retry
+RETRY_DELAY_MAX = 60
+
+# 🚦 Rate Limits (shared by every Brain call in the process)
+RATE_LIMIT_RPM = 15             # Requests per minute
+RATE_LIMIT_TPM = 1_000_000      # Prompt tokens per minute
+RATE_LIMIT_MAX_WAIT = 5.0       # Longer waits defer the job instead of blocking a worker
+
+# 🔀 Providers (MODEL_NAME always comes first; the others take over when it is slow or failing)
+FALLBACK_MODEL_NAMES = []       # e.g. ["gemini-1.5-flash"]
+LIGHT_MODEL_NAME = "gemini-2.0-flash-lite"    # Small tasks such as diagrams; None sends them to MODEL_NAME
+LIGHT_TASK_EXTENSIONS = [".mermaid"]
+PROVIDER_WINDOW = 50            # Recent calls per backend used to rank it
+PROVIDER_MIN_SAMPLES = 5        # Calls before a backend's latency counts for ranking and hedging
+PROVIDER_ERROR_PENALTY = 4.0    # A backend failing half its calls ranks as if it were 3x slower
+HEDGE_ENABLED = True            # Race a second backend when a call outlives the first one's p95
+HEDGE_MIN_DELAY = 2.0           # Never hedge sooner than this many seconds
+
+# 🧊 Prompt Prefix Cache (provider-side context caching of the persona + shared context)
+PREFIX_CACHE_ENABLED = True
+PREFIX_CACHE_MIN_TOKENS = 4096  # Gemini refuses to cache less; shorter prefixes are always sent in full
+PREFIX_CACHE_MIN_USES = 2       # A prefix is cached the second time it is seen, not for one-off prompts
+PREFIX_CACHE_TTL = 600          # Seconds a cached prefix lives (and is billed for) on the provider
+PREFIX_CACHE_MAX_ENTRIES = 32
+
+# 🌊 Streaming
+STREAMING_ENABLED = True    # Write answers into the file as they arrive
+STREAM_WRITE_MODE = "inplace"   # "inplace" (fastest first byte) or "atomic" (temp file swapped in at the end)
+
+# 🩹 Refactoring
+REFACTOR_MODE = "patch"         # "patch" (model returns search/replace edits) or "rewrite" (model returns the whole file)
+PATCH_MIN_LINES = 40            # Smaller files are simply rewritten
+PATCH_FUZZY_THRESHOLD = 0.9     # Similarity a SEARCH block needs when it doesn't match exactly
+
+# 🏗️ Scaffolding (The Architect)
+SCAFFOLD_ON_NEW_FOLDER = False      # Also treat a new empty top-level folder's name as a project (.scaffold files always are)
+SCAFFOLD_WORKERS = 4                # Files generated at once (all share the rate limiter)
+SCAFFOLD_MAX_FILES = 20
+SCAFFOLD_DEPENDENCY_CHARS = 4000    # Of each dependency's code, shown to the files that use it
+
+# 🗺️ Diagrams (The Vizier)
+DIAGRAM_MODE = "local"      # "local": Python files are drawn from their syntax tree (instant, no model call); "rich": the model draws every diagram
+DIAGRAM_CACHE_SIZE = 128    # Diagrams kept by source hash
+DIAGRAM_AUTO_REFRESH = True # Redraw a diagram when its Python file is learned again (never once you have edited the diagram)
+
+# 🧵 Dispatch
+WORKER_COUNT = 4            # Jobs for different files run in parallel
+QUEUE_MAX_DEPTH = 256       # Pending jobs before new events are refused
+QUEUE_FULL_TIMEOUT = 1.0    # Seconds a watcher callback may wait for room
+DEBOUNCE_WINDOW = 0.5       # Quiet time before a burst of events becomes one job
+DEBOUNCE_MAX_DELAY = 5.0    # Upper bound on how long a busy file can be held back
+JOB_MAX_ATTEMPTS = 5        # Runs per job (deferrals and crashes included) before it is given up
+
+# 🧩 Memory Chunking
+CHUNK_MAX_CHARS = 1500      # Upper bound for one embedded chunk
+CHUNK_OVERLAP_LINES = 3     # Lines repeated between size-based chunks
+MEMORY_BATCH_SIZE = 500     # Files per database round trip when learning in bulk
+RECALL_CACHE_SIZE = 128             # Cached recall results (dropped whenever memory changes)
+QUERY_EMBEDDING_CACHE_SIZE = 512    # Cached query embeddings (valid until restart)
+
+# 🧹 Memory Retention (whole files are evicted, least recently recalled first; None disables a limit)
+MEMORY_MAX_CHUNKS = 50_000          # Chunks kept in the collection
+MEMORY_MAX_BYTES = 200 * 1024**2    # Chunk text kept in the collection
+MEMORY_TTL_DAYS = 90                # Files neither recalled nor learned for this long are forgotten
+MEMORY_RETENTION_INTERVAL = 600     # Seconds between saving recall times and applying the limits
+
+# 🔤 Hybrid Recall
+RECALL_MODE = "hybrid"              # "hybrid" (BM25 + vectors), "vector" or "lexical" (never embeds)
+LEXICAL_FILENAME_BOOST = 3          # A file-path term counts this many times in its chunks
+RRF_K = 60                          # Reciprocal rank fusion constant
+LEXICAL_DECISIVE_COVERAGE = 0.8     # Top BM25 hit must match this share of the query's weight...
+LEXICAL_DECISIVE_MARGIN = 2.0       # ...and beat the runner-up by this factor to skip the vector search
+
+# 📚 Context Budget (tokens of recalled memory per generation prompt)
+CONTEXT_CANDIDATES = 8          # Chunks recalled before the budget picks the best ones
+CONTEXT_DEFAULT_BUDGET = 2000
+CONTEXT_TOKEN_BUDGETS = {
+    ".py": 3000, ".js": 3000, ".html": 2000, ".css": 1500,
+    ".json": 1500, ".sql": 2000, ".md": 2500, ".txt": 1500, ".mermaid": 3000,
+}
+CONTEXT_MIN_SNIPPET_TOKENS = 64  # Smaller leftovers aren't worth a trimmed snippet
+
+# 🗄️ Response Cache
+CACHE_ENABLED = True
+CACHE_PATH = ".pythia_cache"
+CACHE_MAX_ENTRIES = 256           # In-memory LRU size
+CACHE_MAX_BYTES = 50 * 1024**2    # Disk store size before oldest entries are evicted
+CACHE_TTL = 7 * 24 * 3600         # Seconds an answer stays valid
 
 # 📂 Filesystem
 TARGET_FOLDER = "D:/Oracle_Files"
 BACKUP_FOLDER = ".pythia_history"
+HISTORY_MAX_VERSIONS = 20           # Versions kept per file
+HISTORY_MAX_AGE_DAYS = 30           # Older versions are dropped (the newest always stays)
+HISTORY_MAX_BYTES = 100 * 1024**2   # Compressed size budget for the whole store
+HISTORY_GC_EVERY = 50               # Backups between garbage collections
 DB_PATH = "pythia_memory"  
+MANIFEST_PATH = "pythia_manifest.json"   # What has been learned, so restarts only redo what changed
+JOB_DB_PATH = "pythia_jobs.db"           # Queued jobs (SQLite), resumed after a crash; None keeps them in memory
+HASH_BLOCK_SIZE = 1024 * 1024            # Read size when fingerprinting big files
+
+# 🏢 Workspaces (one process serves them all; leave empty to watch TARGET_FOLDER alone)
+WORKSPACES = []     # e.g. [{"name": "team_a", "path": "D:/Team_A", "settings": {"REFACTOR_MODE": "rewrite"}}]
+                    # A workspace named "default" keeps the single-folder memory, manifest and job files
+
+# 🌲 Watching
+WATCH_RECURSIVE = True      # Watch nested project folders, not just the top level
+INCLUDE_GLOBS = ["*"]       # Matched against the relative path and the file name
+EXCLUDE_GLOBS = []          # e.g. ["*.min.js", "generated/*"]
+ALWAYS_EXCLUDED_DIRS = {
+    BACKUP_FOLDER, os.path.basename(DB_PATH), os.path.basename(CACHE_PATH),
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", "build", "dist",
+}
+
+# 📊 Metrics
+METRICS_ENABLED = os.getenv("PYTHIA_METRICS", "true").lower() in ("1", "true", "yes")
+METRICS_HOST = "127.0.0.1"          # Never exposed beyond this machine
+METRICS_PORT = 9464                 # Prometheus scrape endpoint (/metrics); None to disable
+METRICS_FILE = "pythia_stats.json"  # Rewritten every METRICS_FILE_INTERVAL seconds; None to disable
+METRICS_FILE_INTERVAL = 10
+
+# 🔎 Startup Reconciliation
+RECONCILE_WORKERS = 8           # Threads hashing candidate files
+RECONCILE_PROGRESS_EVERY = 500  # Log progress after this many files
 
 # 📝 Extensions
 VALID_EXTENSIONS = [
     '.txt', '.py', '.js', '.html', '.css', 
-    '.md', '.json', '.sql', '.mermaid'
+    '.md', '.json', '.sql', '.mermaid', '.scaffold'
 ]
\ No newline at end of file
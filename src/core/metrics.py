@@ -0,0 +1,280 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from src.core.config import (
+    METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL
+)
+from src.core.logger import logger
+
+# Upper bounds of the histogram buckets (Prometheus `le`)
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_NO_TIMER = nullcontext()
+# Prometheus rejects the whole scrape over one bad name; workspace and model names may contain "-" or "."
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9_]")
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th value (what Prometheus would estimate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+class Metrics:
+    """Process-wide stage timings, size histograms and counters.
+
+    Stage timings go under `pythia_stage_seconds{stage=...}`, sizes under
+    `pythia_<name>`, counters under `pythia_<name>_total`. Components can
+    also register a stats() callable whose numbers are exported as gauges.
+    When disabled every call returns immediately.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self.started = time.time()
+
+    # --- Recording -------------------------------------------------------
+
+    def timer(self, stage: str):
+        """Context manager timing one run of `stage`."""
+        if not self.enabled:
+            return _NO_TIMER
+        return self._timer(stage)
+
+    @contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Adds a duration measured elsewhere (e.g. time spent waiting in a queue)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(SECONDS_BUCKETS)
+            histogram.add(seconds)
+
+    def observe(self, name: str, value: float) -> None:
+        """Adds a size (characters, tokens, bytes)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._sizes.get(name)
+            if histogram is None:
+                histogram = self._sizes[name] = Histogram(SIZE_BUCKETS)
+            histogram.add(value)
+
+    def inc(self, name: str, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def register(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Exports the numeric values of stats() as `pythia_<name>_<key>` gauges."""
+        with self._lock:
+            self._gauges[name] = stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._sizes.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    # --- Export ----------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "stages": {name: h.summary() for name, h in sorted(self._stages.items())},
+                "sizes": {name: h.summary() for name, h in sorted(self._sizes.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+            gauges = dict(self._gauges)
+        snapshot["components"] = {name: self._numbers(stats) for name, stats in sorted(gauges.items())}
+        return snapshot
+
+    def prometheus(self) -> str:
+        """The snapshot in Prometheus text exposition format."""
+        with self._lock:
+            stages = [(name, h.buckets, list(h.counts), h.count, h.sum) for name, h in sorted(self._stages.items())]
+            sizes = [(name, h.buckets, list(h.counts), h.count, h.sum) for name, h in sorted(self._sizes.items())]
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        lines: List[str] = []
+        if stages:
+            lines += ["# HELP pythia_stage_seconds Time spent per pipeline stage.",
+                      "# TYPE pythia_stage_seconds histogram"]
+            for name, buckets, counts, count, total in stages:
+                lines += _histogram_lines("pythia_stage_seconds", f'stage="{name}"', buckets, counts, count, total)
+        for name, buckets, counts, count, total in sizes:
+            metric = _metric_name(f"pythia_{name}")
+            lines += [f"# TYPE {metric} histogram"]
+            lines += _histogram_lines(metric, "", buckets, counts, count, total)
+        for name, value in counters:
+            metric = _metric_name(f"pythia_{name}_total")
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        for component, stats in gauges:
+            for key, value in self._numbers(stats).items():
+                metric = _metric_name(f"pythia_{component}_{key}")
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def _numbers(self, stats: Callable[[], Dict[str, Any]]) -> Dict[str, float]:
+        try:
+            values = stats()
+        except Exception as e:
+            logger.debug(f"Metrics source failed: {e}")
+            return {}
+        return {key: value for key, value in values.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+def _metric_name(name: str) -> str:
+    return _INVALID_NAME_CHARS.sub("_", name)
+
+def _histogram_lines(metric: str, labels: str, buckets: Tuple[float, ...], counts: List[int],
+                     count: int, total: float) -> List[str]:
+    sep = "," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(buckets, counts):
+        cumulative += bucket_count
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {total:g}")
+    lines.append(f"{metric}_count{suffix} {count}")
+    return lines
+
+class MetricsExporter:
+    """Serves /metrics (Prometheus) and /stats.json on localhost and rewrites a JSON stats file."""
+
+    def __init__(self, registry: Metrics, host: str = METRICS_HOST, port: Optional[int] = METRICS_PORT,
+                 path: Optional[str] = METRICS_FILE, interval: float = METRICS_FILE_INTERVAL) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if not self.registry.enabled:
+            return
+        if self.port is not None:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), self._request_handler())
+            except OSError as e:
+                logger.warning(f"⚠️ [METRICS] Could not listen on {self.host}:{self.port}: {e}")
+            else:
+                self._spawn(self.server.serve_forever, "pythia-metrics-http")
+                logger.info(f"📊 [METRICS] Serving http://{self.host}:{self.server.server_port}/metrics")
+        if self.path:
+            self._spawn(self._write_loop, "pythia-metrics-file")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.path and self.registry.enabled:
+            self.write_file()
+
+    def write_file(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.registry.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Could not write metrics file: {e}")
+
+    def _spawn(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write_file()
+
+    def _request_handler(self) -> type:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/metrics":
+                    body, kind = registry.prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/stats.json":
+                    body, kind = json.dumps(registry.snapshot(), indent=2), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass  # Scrapes every few seconds would drown the console
+
+        return Handler
+
+# Create the singleton instance
+metrics = Metrics()
@@ -0,0 +1,63 @@
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+from src.core.config import JOB_DB_PATH, MANIFEST_PATH, TARGET_FOLDER, WORKSPACES
+
+DEFAULT_WORKSPACE = "default"
+# Letters, digits, "_" and "-": the name ends up in a collection name and in file names
+WORKSPACE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,47}$")
+# Handler settings a workspace may override; everything else applies to the whole process
+WORKSPACE_SETTINGS = {
+    "CONTEXT_CANDIDATES", "DIAGRAM_AUTO_REFRESH", "DIAGRAM_MODE", "JOB_MAX_ATTEMPTS", "PATCH_MIN_LINES",
+    "REFACTOR_MODE", "SCAFFOLD_ON_NEW_FOLDER", "STREAMING_ENABLED", "STREAM_WRITE_MODE",
+}
+
+class Workspace(NamedTuple):
+    """A watched folder and where its state lives (its history stays inside the folder)."""
+    name: str
+    root: str
+    settings: Dict[str, Any]
+
+    @property
+    def collection(self) -> str:
+        return "oracle_knowledge" if self.name == DEFAULT_WORKSPACE else f"oracle_knowledge_{self.name}"
+
+    @property
+    def manifest_path(self) -> Optional[str]:
+        return self._state_path(MANIFEST_PATH)
+
+    @property
+    def jobs_path(self) -> Optional[str]:
+        return self._state_path(JOB_DB_PATH)
+
+    def _state_path(self, path: Optional[str]) -> Optional[str]:
+        if not path or self.name == DEFAULT_WORKSPACE:
+            return path
+        base, ext = os.path.splitext(path)
+        return f"{base}_{self.name}{ext}"
+
+def load_workspaces(entries: Optional[List[Dict[str, Any]]] = None) -> List[Workspace]:
+    """The configured WORKSPACES, or TARGET_FOLDER alone when there are none.
+
+    Raises ValueError for a bad name, a duplicate, an unknown setting or
+    folders nested inside each other (their events would be handled twice).
+    """
+    entries = WORKSPACES if entries is None else entries
+    if not entries:
+        return [Workspace(DEFAULT_WORKSPACE, TARGET_FOLDER, {})]
+    workspaces: List[Workspace] = []
+    for entry in entries:
+        name, root = entry["name"], os.path.abspath(entry["path"])
+        settings = dict(entry.get("settings") or {})
+        if not WORKSPACE_NAME.match(name):
+            raise ValueError(f"Workspace name '{name}' may only use letters, digits, '_' and '-'")
+        unknown = sorted(set(settings) - WORKSPACE_SETTINGS)
+        if unknown:
+            raise ValueError(f"Workspace '{name}' overrides unknown settings: {', '.join(unknown)}")
+        for other in workspaces:
+            if other.name == name:
+                raise ValueError(f"Workspace name '{name}' is used twice")
+            if os.path.commonpath([other.root, root]) in (other.root, root):
+                raise ValueError(f"Workspaces '{other.name}' and '{name}' overlap ({other.root}, {root})")
+        workspaces.append(Workspace(name, root, settings))
+    return workspaces
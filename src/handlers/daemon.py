@@ -0,0 +1,87 @@
+import time
+from typing import Dict, List, Optional
+from watchdog.observers import Observer
+from src.core.config import MEMORY_RETENTION_INTERVAL, WATCH_RECURSIVE
+from src.core.logger import logger
+from src.core.workspaces import Workspace, load_workspaces
+from src.handlers.dispatcher import EventDispatcher
+from src.handlers.handler import OracleHandler
+from src.handlers.job_store import JobStore
+from src.services.brain import Brain
+from src.services.memory import MemoryEngine
+from src.services.reconciler import WorkspaceReconciler
+from src.utils.file_ops import ensure_workspace
+from src.utils.manifest import Manifest
+
+class WorkspaceDaemon:
+    """Serves every configured workspace from one process.
+
+    Each workspace has its own handler, memory collection, manifest, job
+    store and settings; its history lives inside its folder. The Brain
+    (model clients, provider pool, caches, rate limiter), the embedding
+    model and the worker pool are shared, and the dispatcher takes turns
+    between workspaces so a busy one cannot starve the rest.
+    """
+
+    def __init__(self, workspaces: Optional[List[Workspace]] = None, brain: Optional[Brain] = None,
+                 dispatcher: Optional[EventDispatcher] = None) -> None:
+        self.workspaces = workspaces or load_workspaces()
+        self.brain = brain or Brain()
+        self.dispatcher = dispatcher or EventDispatcher()
+        # With a single workspace nothing is named, so metrics keep their usual names
+        named = len(self.workspaces) > 1
+        self.handlers: Dict[str, OracleHandler] = {
+            ws.name: OracleHandler(
+                ws.root,
+                dispatcher=self.dispatcher,
+                manifest=Manifest(ws.manifest_path),
+                memory=MemoryEngine(lazy=True, collection=ws.collection),
+                brain=self.brain,
+                jobs=JobStore(ws.jobs_path),
+                name=ws.name if named else None,
+                settings=ws.settings,
+            )
+            for ws in self.workspaces
+        }
+        self.observer: Optional[Observer] = None
+        self.reconcilers: List[WorkspaceReconciler] = []
+        self._next_retention = time.monotonic() + MEMORY_RETENTION_INTERVAL
+
+    def start(self) -> None:
+        for ws in self.workspaces:
+            ensure_workspace(ws.root)
+        for handler in self.handlers.values():
+            handler.start()
+            handler.warm_up()
+        # One observer thread watches every folder
+        self.observer = Observer()
+        for ws in self.workspaces:
+            self.observer.schedule(self.handlers[ws.name], ws.root, recursive=WATCH_RECURSIVE)
+        self.observer.start()
+        # Catch up on files changed while we were offline, without delaying the watcher
+        for ws in self.workspaces:
+            handler = self.handlers[ws.name]
+            reconciler = WorkspaceReconciler(ws.root, handler.memory, handler.manifest)
+            reconciler.start()
+            self.reconcilers.append(reconciler)
+
+    def tick(self) -> None:
+        """Periodic housekeeping, called about once a second."""
+        for handler in self.handlers.values():
+            handler.manifest.save_if_dirty()
+        if time.monotonic() >= self._next_retention:
+            # Saves recall times and drops expired or least recently used files
+            for handler in self.handlers.values():
+                handler.memory.enforce_retention()
+            self._next_retention = time.monotonic() + MEMORY_RETENTION_INTERVAL
+
+    def stop(self) -> None:
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        # Every workspace hands over its pending events before the shared workers finish the queue
+        for handler in self.handlers.values():
+            handler.debouncer.stop()
+        for handler in self.handlers.values():
+            handler.stop()
+        logger.info(f"💤 [DAEMON] Stopped {len(self.handlers)} workspaces")
@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from src.core.config import DEBOUNCE_WINDOW, DEBOUNCE_MAX_DELAY
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+Sink = Callable[[str, str], None]
+
+class EventDebouncer:
+    """Collapses bursts of watcher events into one logical event per path.
+
+    An event is emitted once its path has been quiet for `window` seconds
+    (or after `max_delay` seconds of continuous activity). Rules:
+      created + modified  -> created
+      moved(a -> b)       -> created at b, and deleted at a (unless a was
+                             only just created, so nothing knows it yet)
+      anything + deleted  -> deleted
+      deleted + created   -> created
+      modified + modified -> modified
+    """
+
+    def __init__(self, sink: Sink, window: float = DEBOUNCE_WINDOW, max_delay: float = DEBOUNCE_MAX_DELAY) -> None:
+        self.sink = sink
+        self.window = window
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        # path -> [event_type, first_seen, due]
+        self._pending: Dict[str, List] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.raw_events = 0
+        self.emitted = 0
+        self.coalesced = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="pythia-debouncer", daemon=True)
+            self._thread.start()
+
+    def stop(self, flush: bool = True) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
+
+    def push(self, path: str, event_type: str, dest_path: Optional[str] = None) -> None:
+        """Records one raw watcher event."""
+        now = time.monotonic()
+        with self._cond:
+            self.raw_events += 1
+            if event_type == "moved":
+                # The old name is gone; whatever was pending for it is folded into the destination
+                entry = self._pending.pop(path, None)
+                if entry is not None:
+                    self.coalesced += 1
+                if entry is None or entry[0] != "created":
+                    self._record(path, "deleted", now)
+                path, event_type = dest_path, "created"
+            self._record(path, event_type, now)
+            self._cond.notify_all()
+
+    def _record(self, path: str, event_type: str, now: float) -> None:
+        entry = self._pending.get(path)
+        if entry is None:
+            self._pending[path] = [event_type, now, now + self.window]
+        else:
+            self.coalesced += 1
+            if event_type in ("created", "deleted"):
+                entry[0] = event_type
+            elif entry[0] == "deleted":
+                # Deleted and written again (some editors save that way)
+                entry[0] = "created"
+            entry[2] = min(now + self.window, entry[1] + self.max_delay)
+        heapq.heappush(self._heap, (self._pending[path][2], next(self._seq), path))
+
+    def flush(self) -> None:
+        """Emits everything that is pending right now, ignoring the quiet window."""
+        with self._cond:
+            ready = [(path, entry[0]) for path, entry in self._pending.items()]
+            self._pending.clear()
+            self._heap.clear()
+        self._emit(ready)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "raw_events": self.raw_events,
+                "emitted": self.emitted,
+                "coalesced": self.coalesced,
+                "pending": len(self._pending),
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                ready = self._pop_due(time.monotonic())
+                if not ready:
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                    continue
+            self._emit(ready)
+
+    def _pop_due(self, now: float) -> List[Tuple[str, str]]:
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, path = heapq.heappop(self._heap)
+            entry = self._pending.get(path)
+            # Stale heap rows are left behind whenever a path's deadline moves
+            if entry is not None and entry[2] == due:
+                metrics.record("debounce", now - entry[1])
+                ready.append((path, entry[0]))
+                del self._pending[path]
+        return ready
+
+    def _emit(self, ready: List[Tuple[str, str]]) -> None:
+        for path, event_type in ready:
+            self.emitted += 1
+            try:
+                self.sink(path, event_type)
+            except Exception as e:
+                logger.error(f"❌ [DEBOUNCE] Could not dispatch {path}: {e}")
@@ -0,0 +1,239 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from src.core.config import WORKER_COUNT, QUEUE_MAX_DEPTH, QUEUE_FULL_TIMEOUT
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+Job = Tuple[Callable[..., Any], Tuple[Any, ...], float, int]  # fn, args, queued at, priority
+Coalesce = Callable[[Tuple[Any, ...], Tuple[Any, ...]], Tuple[Any, ...]]  # (older args, newer args) -> args
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0    # UPDATE: and ROLLBACK, someone is looking at the file
+PRIORITY_GENERATE = 1       # New files and projects
+PRIORITY_BACKGROUND = 2     # Memorizing edits
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_GENERATE: "generate", PRIORITY_BACKGROUND: "background"}
+
+class EventDispatcher:
+    """Runs file jobs on a pool of worker threads.
+
+    Jobs are grouped by key (the file path). Different keys run concurrently,
+    jobs sharing a key always run one at a time in submission order. Among
+    keys that are ready, the one whose next job has the lowest priority
+    number goes first (then the oldest). A job submitted with `coalesce`
+    replaces the jobs still waiting for its key (never the one already
+    running) and keeps the most urgent priority among them.
+
+    Keys may belong to a `group` (a workspace). Equally urgent keys from
+    different groups take turns: the group with the fewest running jobs goes
+    first, then the one that has waited longest for a worker, so one busy
+    workspace cannot starve the others.
+    """
+
+    def __init__(self, workers: int = WORKER_COUNT, max_depth: int = QUEUE_MAX_DEPTH) -> None:
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Deque[Job]] = {}
+        self._ready: Dict[Optional[str], List[Tuple[int, int, str]]] = {}  # group -> heap of (priority, sequence, key)
+        self._groups: Dict[str, Optional[str]] = {}     # key -> its group
+        self._group_running: Dict[Optional[str], int] = {}
+        self._group_turn: Dict[Optional[str], int] = {}  # When each group last got a worker
+        self._sequence = itertools.count()
+        self._scheduled: Set[str] = set()     # Keys waiting in _ready or running
+        self._active: Set[str] = set()        # Keys running right now
+        self._depth = 0
+        self._running = 0
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.superseded = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"pythia-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        logger.debug(f"⚙️ [DISPATCH] Started {self.workers} workers")
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops the workers. With wait=True, queued jobs are finished first."""
+        with self._cond:
+            if not wait:
+                self.dropped += self._depth
+                metrics.inc("events_dropped", self._depth)
+                self._pending.clear()
+                self._ready.clear()
+                self._groups.clear()
+                self._scheduled.clear()
+                self._depth = 0
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = QUEUE_FULL_TIMEOUT,
+               coalesce: Optional[Coalesce] = None, priority: int = PRIORITY_GENERATE,
+               group: Optional[str] = None) -> bool:
+        """Queues fn(*args) behind any earlier jobs for the same key.
+
+        Blocks for up to `timeout` seconds while the queue is full, then drops
+        the job and returns False. With `coalesce`, waiting jobs for the key
+        are folded into this one (oldest first) and it takes their place.
+        """
+        with self._cond:
+            queued = self._pending.get(key)
+            if coalesce and queued and not self._stopping:
+                queued_at = queued[0][2]
+                for _, older, _, older_priority in queued:
+                    args = coalesce(older, args)
+                    priority = min(priority, older_priority)
+                self._depth -= len(queued)
+                self.superseded += len(queued)
+                metrics.inc("jobs_superseded", len(queued))
+                queued.clear()
+                queued.append((fn, args, queued_at, priority))
+                self._depth += 1
+                if key in self._scheduled and key not in self._active:
+                    # Re-rank the waiting key; its old heap entry is skipped when popped
+                    self._push_ready(key, priority)
+                self.submitted += 1
+                self._cond.notify_all()
+                return True
+
+            if not self._cond.wait_for(lambda: self._depth < self.max_depth or self._stopping, timeout):
+                self.dropped += 1
+                metrics.inc("events_dropped")
+                logger.warning(f"🚧 [DISPATCH] Queue full ({self._depth}), dropped job for {key}")
+                return False
+            if self._stopping:
+                self.dropped += 1
+                metrics.inc("events_dropped")
+                return False
+
+            self._pending.setdefault(key, deque()).append((fn, args, time.monotonic(), priority))
+            self._depth += 1
+            self.submitted += 1
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._groups[key] = group
+                self._push_ready(key, priority)
+            self._cond.notify_all()
+            return True
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued job has finished. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._depth == 0 and self._running == 0, timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            by_priority = {f"depth_{name}": 0 for name in PRIORITY_NAMES.values()}
+            by_group: Dict[str, int] = {}
+            for key, jobs in self._pending.items():
+                for job in jobs:
+                    name = f"depth_{PRIORITY_NAMES.get(job[3], job[3])}"
+                    by_priority[name] = by_priority.get(name, 0) + 1
+                group = self._groups.get(key)
+                if group is not None:
+                    by_group[f"queued_{group}"] = by_group.get(f"queued_{group}", 0) + len(jobs)
+            by_group.update({f"running_{group}": running for group, running in self._group_running.items()
+                             if group is not None})
+            return {
+                "depth": self._depth,
+                **by_priority,
+                **by_group,
+                "running": self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "superseded": self.superseded,
+            }
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                key = self._next_key()
+                if key is None:
+                    return
+                fn, args, queued_at, priority = self._pending[key].popleft()
+                group = self._groups.get(key)
+                self._depth -= 1
+                self._running += 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - queued_at
+            metrics.record("queue_wait", waited)
+            metrics.record(f"queue_wait_{PRIORITY_NAMES.get(priority, priority)}", waited)
+            try:
+                fn(*args)
+                ok = True
+            except Exception as e:
+                ok = False
+                logger.error(f"❌ [DISPATCH] Job for {key} failed: {e}")
+
+            with self._cond:
+                self._running -= 1
+                self._group_running[group] -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                # Only now may the next job for this key run, which keeps per-file order
+                self._active.discard(key)
+                if self._pending[key]:
+                    self._push_ready(key, self._pending[key][0][3])
+                else:
+                    del self._pending[key]
+                    self._scheduled.discard(key)
+                    self._groups.pop(key, None)
+                self._cond.notify_all()
+
+    def _push_ready(self, key: str, priority: int) -> None:
+        heapq.heappush(self._ready.setdefault(self._groups.get(key), []), (priority, next(self._sequence), key))
+
+    def _next_key(self) -> Optional[str]:
+        """Pops the most urgent ready key (waiting for one), or None once stopping with nothing left."""
+        while True:
+            self._cond.wait_for(lambda: self._ready or self._stopping)
+            if not self._ready:
+                return None
+            best = None
+            for group in list(self._ready):
+                heap = self._ready[group]
+                self._drop_stale(heap)
+                if not heap:
+                    del self._ready[group]
+                    continue
+                rank = (heap[0][0], self._group_running.get(group, 0), self._group_turn.get(group, -1), heap[0][1])
+                if best is None or rank < best[0]:
+                    best = (rank, group)
+            if best is None:
+                continue
+            group = best[1]
+            _, _, key = heapq.heappop(self._ready[group])
+            self._active.add(key)
+            self._group_running[group] = self._group_running.get(group, 0) + 1
+            self._group_turn[group] = next(self._sequence)
+            return key
+
+    def _drop_stale(self, heap: List[Tuple[int, int, str]]) -> None:
+        # Entries left behind when coalescing re-ranked a key, or for a key that is running
+        while heap:
+            priority, _, key = heap[0]
+            jobs = self._pending.get(key)
+            if jobs and jobs[0][3] == priority and key not in self._active:
+                return
+            heapq.heappop(heap)
@@ -1,111 +1,600 @@
 import os
-import time
+import re
+import threading
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from src.handlers.debouncer import EventDebouncer
+from src.handlers.dispatcher import (
+    PRIORITY_BACKGROUND, PRIORITY_GENERATE, PRIORITY_INTERACTIVE, PRIORITY_NAMES, EventDispatcher
+)
+from src.handlers.job_store import JobStore, StoredJob
+from src.services.architect import SCAFFOLD_EXT, Architect, PlanError
 from src.services.memory import MemoryEngine
-from src.services.brain import Brain
-from src.core.config import VALID_EXTENSIONS
+from src.services.brain import Brain, warm_up as warm_up_brain
+from src.services.context_builder import ContextBuilder
+from src.services.diagrams import DIAGRAM_EXT, DiagramEngine
+from src.services.rate_limiter import RateLimitDeferred
+from src.core.config import (
+    CONTEXT_CANDIDATES, DIAGRAM_AUTO_REFRESH, DIAGRAM_MODE, JOB_MAX_ATTEMPTS, PATCH_MIN_LINES, REFACTOR_MODE,
+    SCAFFOLD_ON_NEW_FOLDER, STREAMING_ENABLED, STREAM_WRITE_MODE, TARGET_FOLDER, VALID_EXTENSIONS
+)
 from src.core.logger import logger
-from src.utils.file_ops import get_file_hash, write_safe
+from src.core.metrics import metrics
+from src.utils.file_ops import hash_file, read_text, write_safe, write_stream
 from src.utils.history import create_backup, perform_rollback
+from src.utils.manifest import Manifest, same_fingerprint, stat_entry
+from src.utils.patching import PatchError, apply_edit_blocks, check_syntax, parse_edit_blocks
+from src.utils.paths import is_excluded_dir, is_watched_key, walk_workspace, workspace_key
+
+PLACEHOLDER_TEXT = "🔮 The Oracle is searching its memories..."
+ROLLBACK_COMMAND = re.compile(r"ROLLBACK(?:[ \t]+(\d+))?")
+DEFAULT_FOLDER_NAMES = re.compile(r"^(new folder|untitled folder)( \(?\d+\)?)?$", re.IGNORECASE)
+COMMAND_SCAN_BYTES = 4096   # UPDATE:/ROLLBACK commands are typed at the end of the file
+
+class StaleJob(Exception):
+    """The file changed while its job was running, so the job's result would overwrite newer edits."""
+
+def merge_events(older: Tuple[str, str], newer: Tuple[str, str]) -> Tuple[str, str]:
+    """Folds a queued job into a newer one for the same file (created + modified -> created, then deleted wins)."""
+    path, event_type = newer
+    if event_type == "deleted":
+        return newer
+    return (path, "created") if older[1] in ("created", "deleted") else (path, event_type)
 
 class OracleHandler(FileSystemEventHandler):
-    def __init__(self) -> None:
-        self.memory = MemoryEngine()
-        self.brain = Brain()
-        self.last_hash = {}
+    def __init__(self, root: str = TARGET_FOLDER, dispatcher: Optional[EventDispatcher] = None,
+                 manifest: Optional[Manifest] = None, memory: Optional[MemoryEngine] = None,
+                 brain: Optional[Brain] = None, jobs: Optional[JobStore] = None,
+                 name: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> None:
+        self.root = root
+        # Set when one process serves several workspaces: scheduling group and metrics suffix
+        self.name = name
+        # Per-workspace overrides of handler settings (see WORKSPACE_SETTINGS)
+        self.settings = settings or {}
+        # Heavy clients connect lazily so the watcher can start queueing events at once
+        self.memory = memory or MemoryEngine(lazy=True)
+        self.brain = brain or Brain()
+        self.context_builder = ContextBuilder()
+        self.architect = Architect(self.brain, self.memory, self.context_builder)
+        self.diagrams = DiagramEngine()
+        # Project folders being scaffolded right now: their own sub-folders are not new projects
+        self._scaffolding: Set[str] = set()
+        self._scaffolding_lock = threading.Lock()
+        # Fingerprint + hash of every file we learned or wrote (our "last_hash"),
+        # persisted so restarts don't re-read or re-learn unchanged files
+        self.manifest = manifest or Manifest()
+        # Watchdog callbacks only record events; the debouncer hands settled
+        # events to the dispatcher, whose workers do the slow part
+        self.dispatcher = dispatcher or EventDispatcher()
+        self.debouncer = EventDebouncer(self._enqueue)
+        # Every job is written down before it is queued, so a crash or kill doesn't lose it
+        self.jobs = jobs or JobStore()
+
+    def start(self) -> None:
+        self.dispatcher.start()
+        self.debouncer.start()
+        self._resume_jobs()
+        # Shared with other workspaces when there are several: registering them again is harmless
+        metrics.register("dispatcher", self.dispatcher.stats)
+        metrics.register("rate_limiter", self.brain.limiter.stats)
+        metrics.register("prefix_cache", self.brain.context_cache.stats)
+        metrics.register("providers", self.brain.providers.stats)
+        if self.brain.cache:
+            metrics.register("response_cache", self.brain.cache.stats)
+        suffix = f"_{self.name}" if self.name else ""
+        metrics.register(f"jobs{suffix}", self.jobs.stats)
+        metrics.register(f"debouncer{suffix}", self.debouncer.stats)
+        metrics.register(f"diagrams{suffix}", self.diagrams.stats)
+        if isinstance(self.memory, MemoryEngine):
+            metrics.register(f"memory{suffix}", self.memory.stats)
+
+    def warm_up(self) -> None:
+        """Loads ChromaDB, the embedding model and Gemini in the background."""
+        if isinstance(self.memory, MemoryEngine):
+            self.memory.warm_up()
+        warm_up_brain()
+
+    def stop(self) -> None:
+        self.debouncer.stop()
+        self.dispatcher.stop()
+        self.manifest.save()
+        stats = self.debouncer.stats()
+        logger.info(f"📊 [DEBOUNCE] {stats['raw_events']} raw events -> {stats['emitted']} jobs ({stats['coalesced']} coalesced)")
 
     def on_created(self, event: FileSystemEvent) -> None:
-        print(f"!!! DEBUG: Watcher sensed CREATED event for {event.src_path}") # RAW PRINT
-        if event.is_directory: return
-        time.sleep(0.5) 
-        self._process_event(event.src_path, "created")
+        if event.is_directory:
+            if self._watches_folder(event.src_path):
+                self.debouncer.push(event.src_path, "folder")
+            return
+        if not self._watches(event.src_path): return
+        logger.debug(f"👀 Watcher sensed CREATED event for {event.src_path}")
+        self.debouncer.push(event.src_path, "created")
 
     def on_modified(self, event: FileSystemEvent) -> None:
-        print(f"!!! DEBUG: Watcher sensed MODIFIED event for {event.src_path}") # RAW PRINT
-        if event.is_directory: return
-        self._process_event(event.src_path, "modified")
+        if event.is_directory or not self._watches(event.src_path): return
+        logger.debug(f"👀 Watcher sensed MODIFIED event for {event.src_path}")
+        self.debouncer.push(event.src_path, "modified")
 
     def on_moved(self, event: FileSystemEvent) -> None:
-        if event.is_directory: return
+        if event.is_directory:
+            # Its files are forgotten under the old path and learned under the new one
+            # ("New folder" renamed to the project name is scaffolded instead)
+            if self._watches_tree(event.src_path):
+                self.debouncer.push(event.src_path, "deleted")
+            if self._watches_tree(event.dest_path):
+                self.debouncer.push(event.dest_path, "tree")
+            return
+        if not self._watches(event.dest_path):
+            # Renamed to something we don't watch (e.g. a .bak): as good as deleted
+            if self._watches(event.src_path):
+                self.debouncer.push(event.src_path, "deleted")
+            return
         
         # In a rename, dest_path is the new name you just typed
         new_filename = os.path.basename(event.dest_path)
         logger.info(f"🚚 [RENAMED] {os.path.basename(event.src_path)} -> {new_filename}")
-        
-        # Small delay to let Windows finalize the file lock
-        time.sleep(0.5) 
-        self._process_event(event.dest_path, "created")
+        self.debouncer.push(event.src_path, "moved", event.dest_path)
+
+    def on_deleted(self, event: FileSystemEvent) -> None:
+        if not (self._watches_tree(event.src_path) if event.is_directory else self._watches(event.src_path)):
+            return
+        logger.debug(f"👀 Watcher sensed DELETED event for {event.src_path}")
+        self.debouncer.push(event.src_path, "deleted")
+
+    def _watches(self, path: str) -> bool:
+        # Cheap filter on the watcher thread: history, memory, VCS and build folders never get queued
+        return is_watched_key(workspace_key(path, self.root))
+
+    def _watches_tree(self, path: str) -> bool:
+        parts = workspace_key(path, self.root).split("/")
+        return parts[0] not in ("..", ".") and not any(is_excluded_dir(part) for part in parts)
+
+    def _watches_folder(self, path: str) -> bool:
+        if not self._setting("SCAFFOLD_ON_NEW_FOLDER", SCAFFOLD_ON_NEW_FOLDER):
+            return False
+        key = workspace_key(path, self.root)
+        # Only folders made right in the workspace: a nested `tests` or a tool's output folder is not a request
+        if "/" in key or key.startswith((".", "~")) or DEFAULT_FOLDER_NAMES.match(key):
+            return False
+        if is_excluded_dir(key):
+            return False
+        with self._scaffolding_lock:
+            return not any(path == root or path.startswith(root + os.sep) for root in self._scaffolding)
+
+    def _enqueue(self, file_path: str, event_type: str) -> None:
+        # A newer event replaces the one still waiting for this file: each job reads the file afresh anyway
+        priority = self._priority(file_path, event_type)
+        job_id, schedule = self.jobs.add(file_path, (file_path, event_type), priority, coalesce=merge_events)
+        if schedule:
+            self._submit(job_id, file_path, priority)
+
+    def _submit(self, job_id: int, file_path: str, priority: int) -> None:
+        # Submitting a job again just re-ranks it in the dispatcher
+        if not self.dispatcher.submit(file_path, self._run_job, job_id, priority=priority, coalesce=self._fold,
+                                      group=self.name):
+            # Dropped by a full queue: forget it too, or later events would fold into a job that never runs
+            self.jobs.finish(job_id)
+
+    def _fold(self, older: Tuple[int], newer: Tuple[int]) -> Tuple[int]:
+        # A deferred job coming back absorbs the one queued behind it (each job reads the file afresh)
+        if older[0] != newer[0]:
+            self.jobs.finish(older[0])
+        return newer
+
+    def _priority(self, file_path: str, event_type: str) -> int:
+        """Interactive commands first, then generation, then learning; judged from the file's tail only."""
+        if event_type in ("folder", "tree") or file_path.endswith(SCAFFOLD_EXT):
+            return PRIORITY_GENERATE
+        try:
+            with open(file_path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - COMMAND_SCAN_BYTES))
+                tail = f.read().decode("utf-8", errors="ignore")
+        except OSError:
+            return PRIORITY_BACKGROUND
+        if size == 0 or tail == PLACEHOLDER_TEXT:
+            return PRIORITY_GENERATE
+        if "UPDATE:" in tail or ROLLBACK_COMMAND.search(tail):
+            return PRIORITY_INTERACTIVE
+        return PRIORITY_BACKGROUND
+
+    def _run_job(self, job_id: int) -> None:
+        job = self.jobs.start(job_id)
+        if job is None:
+            return
+        file_path, event_type = job.args
+        if job.attempts > self._setting("JOB_MAX_ATTEMPTS", JOB_MAX_ATTEMPTS):
+            self._give_up(job)
+            return
+        deferred = False
+        try:
+            self._process_event(file_path, event_type)
+        except RateLimitDeferred as e:
+            deferred = True
+            metrics.inc("events_deferred")
+            logger.warning(f"⏸️ [DEFERRED] '{os.path.basename(file_path)}' is queued, retrying in {e.retry_after:.0f}s")
+            self.jobs.defer(job.id)
+            self._defer(job, e.retry_after)
+        finally:
+            if not deferred:
+                self.jobs.finish(job.id)
+
+    def _give_up(self, job: StoredJob) -> None:
+        file_path = job.args[0]
+        self.jobs.finish(job.id)
+        metrics.inc("jobs_abandoned")
+        logger.error(f"🪦 [JOBS] Gave up on '{os.path.basename(file_path)}' ({PRIORITY_NAMES.get(job.priority)}) "
+                     f"after {job.attempts - 1} attempts")
+        # A placeholder nobody will replace is worse than the empty file the user started with
+        if os.path.isfile(file_path) and self._is_placeholder(file_path, os.path.getsize(file_path)):
+            write_safe(file_path, "")
+            self._remember(file_path, workspace_key(file_path, self.root))
 
     def _process_event(self, file_path: str, event_type: str) -> None:
-        filename = os.path.basename(file_path)
-        
-        if filename.startswith((".", "~")) or "New Text Document" in filename:
+        # Memory, manifest and history are keyed by the path relative to the workspace,
+        # so same-named files in different folders never collide
+        if event_type == "folder":
+            self._handle_folder(file_path)
             return
-        
-        _, ext = os.path.splitext(filename)
-        if ext.lower() not in VALID_EXTENSIONS:
+        if event_type == "tree":
+            self._handle_tree(file_path)
+            return
+        key = workspace_key(file_path, self.root)
+        if event_type == "deleted":
+            if not os.path.exists(file_path):
+                self._handle_deleted(key)
+                return
+            if os.path.isdir(file_path):
+                return
+            # Deleted and written again before we got here (some editors save that way)
+            event_type = "created"
+        if not is_watched_key(key):
             return
+        filename = os.path.basename(file_path)
+        _, ext = os.path.splitext(filename)
+
+        with metrics.timer("process_event"):
+            self._process(file_path, event_type, key, filename, ext)
 
+    def _process(self, file_path: str, event_type: str, key: str, filename: str, ext: str) -> None:
         try:
-            if not os.path.exists(file_path): return
-            
-            size = os.path.getsize(file_path)
-            content = self._get_content(file_path)
+            try:
+                with metrics.timer("stat"):
+                    stat = os.stat(file_path)
+            except FileNotFoundError:
+                return
+
+            # ⚡ Cheapest check first: same size, mtime and inode as last time -> nothing to do
+            known = self.manifest.get(key)
+            if event_type == "modified" and known and same_fingerprint(known, stat):
+                metrics.inc("events_unchanged")
+                return
+            size = stat.st_size
 
-            # 🔮 CASE 1: Brand New Empty File -> GENERATE
-            if size == 0 and event_type == "created":
+            # 🔮 CASE 1: Brand New Empty File (or a deferred one still showing the placeholder) -> GENERATE
+            if event_type == "created" and ext != SCAFFOLD_EXT and (size == 0 or self._is_placeholder(file_path, size)):
+                # A diagram of the file next to it; with no such file the model draws one from memory
+                if ext == DIAGRAM_EXT and self._handle_diagram(file_path, filename, key):
+                    return
                 logger.info(f"🔮 [PROMPT] '{filename}' detected. Fulfilling prophecy...")
-                self._handle_generation(file_path, filename, ext)
+                self._handle_generation(file_path, filename, ext, key)
             
             # 📝 CASE 2: File has content -> UPDATE, ROLLBACK, or MEMORIZE
             elif size > 0:
-                # Prevent infinite loops if the Oracle just wrote this
-                current_hash = get_file_hash(content)
-                if self.last_hash.get(filename) == current_hash:
+                # Prevent infinite loops if the Oracle just wrote this (or learned it before a restart)
+                with metrics.timer("hash"):
+                    current_hash = hash_file(file_path)
+                if known and known["hash"] == current_hash:
+                    metrics.inc("events_unchanged")
+                    self.manifest.set(key, {**known, **stat_entry(file_path, current_hash)})
                     return
 
-                if "ROLLBACK" in content:
-                    perform_rollback(file_path, filename)
+                with metrics.timer("read"):
+                    content = self._get_content(file_path)
+                rollback = ROLLBACK_COMMAND.search(content)
+                if ext == SCAFFOLD_EXT:
+                    # The manifest's name is the project, its text the description
+                    folder = os.path.join(os.path.dirname(file_path), os.path.splitext(filename)[0])
+                    self._handle_scaffold(folder, os.path.splitext(filename)[0], content)
+                    self.manifest.set(key, stat_entry(file_path, current_hash))
+                elif rollback:
+                    with metrics.timer("rollback"):
+                        perform_rollback(file_path, key, int(rollback.group(1) or 1), root=self.root)
                 elif "UPDATE:" in content:
-                    self._handle_update(file_path, filename, ext, content)
+                    self._handle_update(file_path, filename, ext, content, key, current_hash)
                 else:
-                    logger.info(f"🧠 [LEARNING] Absorbed '{filename}'")
-                    self.memory.memorize(filename, content)
-                    self.last_hash[filename] = current_hash
+                    logger.info(f"🧠 [LEARNING] Absorbed '{key}'")
+                    with metrics.timer("memorize"):
+                        self.memory.memorize(key, content)
+                    self.manifest.set(key, stat_entry(file_path, current_hash))
+                    if ext == ".py" and self._setting("DIAGRAM_AUTO_REFRESH", DIAGRAM_AUTO_REFRESH):
+                        self._refresh_diagram(file_path, content)
 
+        except StaleJob:
+            # The edit that made it stale has its own event; re-queueing makes sure it is seen
+            metrics.inc("jobs_stale")
+            logger.warning(f"✋ [STALE] '{filename}' changed while the Oracle was working, result discarded")
+            self._enqueue(file_path, "modified")
+        except RateLimitDeferred:
+            # The job owns retries (see _run_job)
+            raise
         except Exception as e:
             logger.error(f"❌ Handler Error for {filename}: {e}")
 
-    def _handle_generation(self, path: str, name: str, ext: str) -> None:
+    def _defer(self, job: StoredJob, delay: float) -> None:
+        # Re-enter through the dispatcher later instead of holding a worker hostage
+        timer = threading.Timer(delay, self._resume, (job.id,))
+        timer.daemon = True
+        timer.start()
+
+    def _resume_jobs(self) -> None:
+        # Whatever the last run left behind: queued, deferred, or cut off mid-run
+        for job in self.jobs.recover():
+            self._submit(job.id, job.key, job.priority)
+
+    def _resume(self, job_id: int) -> None:
+        # Events that arrived meanwhile were folded into the job and may have changed its priority
+        job = self.jobs.get(job_id)
+        if job:
+            self._submit(job.id, job.key, job.priority)
+
+    def _handle_generation(self, path: str, name: str, ext: str, key: str) -> None:
         # Placeholder text so the user knows it's working
-        write_safe(path, "🔮 The Oracle is searching its memories...")
+        write_safe(path, PLACEHOLDER_TEXT)
+        # Our own placeholder write must not look like a user edit
+        self._remember(path, key)
+        # If the user types over the placeholder meanwhile, their text wins
+        expected = self._expected_hash(key)
         
         # Search RAG Memory
         query = name.replace("_", " ")
-        results = self.memory.recall(query)
-        
-        context_str = ""
-        if results['documents'] and results['documents'][0]:
-            for i, doc in enumerate(results['documents'][0]):
-                context_str += f"\n--- MEMORY: {results['metadatas'][0][i]['filename']} ---\n{doc}\n"
+        with metrics.timer("recall"):
+            results = self.memory.recall(query, n_results=self._setting("CONTEXT_CANDIDATES", CONTEXT_CANDIDATES))
 
-        # Call AI
-        new_content = self.brain.generate(name, ext, context_str)
-        
-        # Write and update hash to prevent loop
-        self.last_hash[name] = get_file_hash(new_content)
-        write_safe(path, new_content)
+        # Best snippets first, trimmed to this file type's token budget
+        context = self.context_builder.build(results, ext)
+        context_str = context.text
+        if context.snippets or context.dropped:
+            logger.info(f"   📚 [CONTEXT] {context.used_tokens} tokens from {context.snippets} snippets "
+                        f"({context.dropped_tokens} tokens dropped, {context.duplicates} duplicates skipped)")
+        metrics.observe("context_tokens", context.used_tokens)
+        metrics.inc("context_tokens_dropped", context.dropped_tokens)
+
+        # Call AI and write (progressively, when streaming; the model call is timed inside Brain)
+        with metrics.timer("generate"):
+            if self._setting("STREAMING_ENABLED", STREAMING_ENABLED):
+                # A failed answer leaves the empty file the user created, not the placeholder
+                self._write_stream(path, key, self.brain.generate_stream(name, ext, context_str), expected,
+                                   original="")
+            else:
+                new_content = self.brain.generate(name, ext, context_str)
+                self._write(path, key, new_content, expected)
         logger.info(f"✅ [SUCCESS] Generated {name}")
 
-    def _handle_update(self, path: str, name: str, ext: str, content: str) -> None:
-        create_backup(path)
+    def _handle_diagram(self, path: str, name: str, key: str) -> bool:
+        """Draws name.mermaid from the source file of the same name; False if there is none."""
+        source = self._diagram_source(path)
+        if source is None:
+            return False
+        source_name = os.path.basename(source)
+        code = read_text(source)
+        expected = hash_file(path)
+        diagram = None
+        if self._setting("DIAGRAM_MODE", DIAGRAM_MODE) == "local" and source.endswith(".py"):
+            with metrics.timer("diagram"):
+                diagram = self.diagrams.render(code, source_name)
+            if diagram is None:
+                logger.warning(f"   🗺️ [DIAGRAM] {source_name} does not parse, asking the model instead")
+        if diagram is None:
+            write_safe(path, PLACEHOLDER_TEXT)
+            self._remember(path, key)
+            expected = self._expected_hash(key)
+            with metrics.timer("visualize"):
+                diagram = self.brain.visualize(source_name, code)
+        self._write(path, key, diagram, expected)
+        self._mark_drawn(key)
+        logger.info(f"✅ [SUCCESS] Drew {name} from {source_name}")
+        return True
+
+    def _refresh_diagram(self, source: str, code: str) -> None:
+        """Redraws source's diagram after an edit, unless the user has changed the diagram since we drew it."""
+        path = os.path.splitext(source)[0] + DIAGRAM_EXT
+        key = workspace_key(path, self.root)
+        known = self.manifest.get(key)
+        local = self._setting("DIAGRAM_MODE", DIAGRAM_MODE) == "local"
+        if not local or not known or not known.get("drawn") or not os.path.isfile(path):
+            return
+        current = hash_file(path)
+        if current != known["hash"]:
+            return
+        diagram = self.diagrams.render(code, os.path.basename(source))
+        # A source that doesn't parse mid-edit keeps its last good diagram
+        if diagram is None or diagram == read_text(path):
+            return
+        self._write(path, key, diagram, current)
+        self._mark_drawn(key)
+        metrics.inc("diagrams_refreshed")
+        logger.info(f"   🗺️ [DIAGRAM] Redrew {os.path.basename(path)}")
+
+    def _diagram_source(self, path: str) -> Optional[str]:
+        stem = os.path.splitext(path)[0]
+        # Python first: it can be drawn locally
+        extensions = [".py"] + [e for e in VALID_EXTENSIONS if e not in (".py", DIAGRAM_EXT, SCAFFOLD_EXT)]
+        for ext in extensions:
+            candidate = stem + ext
+            if os.path.isfile(candidate) and os.path.getsize(candidate) > 0:
+                return candidate
+        return None
+
+    def _mark_drawn(self, key: str) -> None:
+        # Only diagrams Pythia drew (and nobody edited since, which resets the entry) are redrawn
+        entry = self.manifest.get(key)
+        if entry:
+            self.manifest.set(key, {**entry, "drawn": True})
+
+    def _handle_folder(self, folder: str) -> None:
+        # Only a brand new, still empty folder is a project request; copied-in trees are left alone
+        try:
+            if not os.path.isdir(folder) or os.listdir(folder):
+                return
+        except OSError:
+            return
+        if not self._watches_folder(folder):
+            return
+        name = os.path.basename(folder)
+        self._handle_scaffold(folder, name, name.replace("_", " "))
+
+    def _handle_tree(self, folder: str) -> None:
+        """A folder moved into place: its files are queued to be learned (an empty one may be a project)."""
+        try:
+            if not os.listdir(folder):
+                self._handle_folder(folder)
+                return
+        except OSError:
+            return
+        for _, entry in walk_workspace(folder):
+            if is_watched_key(workspace_key(entry.path, self.root)):
+                self._enqueue(entry.path, "modified")
+
+    def _handle_deleted(self, key: str) -> None:
+        """Forgets a deleted file, or every file of a deleted folder."""
+        gone = [k for k in self.manifest.keys() if k == key or k.startswith(key + "/")]
+        if not gone:
+            return
+        with metrics.timer("forget"):
+            self.memory.forget_many(gone)
+        for k in gone:
+            self.manifest.remove(k)
+        metrics.inc("files_forgotten", len(gone))
+        logger.info(f"🗑️ [DELETED] '{key}' forgotten" + (f" ({len(gone)} files)" if len(gone) > 1 else ""))
+
+    def _handle_scaffold(self, folder: str, project: str, description: str) -> None:
+        logger.info(f"🏗️ [ARCHITECT] Scaffolding '{project}'...")
+        with self._scaffolding_lock:
+            self._scaffolding.add(folder)
+        learned = {}
+
+        def on_written(path: str, code: str) -> None:
+            # Written by us: the watcher event for it must not trigger anything
+            key = workspace_key(path, self.root)
+            self._remember(path, key)
+            learned[key] = code
+
+        try:
+            report = self.architect.scaffold(folder, project, description, on_written)
+        except PlanError as e:
+            logger.error(f"❌ [ARCHITECT] Could not plan '{project}': {e}")
+            return
+        finally:
+            with self._scaffolding_lock:
+                self._scaffolding.discard(folder)
+        if learned:
+            with metrics.timer("memorize"):
+                self.memory.memorize_many(learned)
+        speedup = report.sequential_seconds / report.wall_seconds if report.wall_seconds else 1.0
+        logger.info(f"✅ [SUCCESS] Scaffolded '{project}': {len(report.written)} files in {report.wall_seconds:.1f}s "
+                    f"(one at a time ~{report.sequential_seconds:.1f}s, {speedup:.1f}x)"
+                    + (f", {len(report.skipped)} existing kept" if report.skipped else "")
+                    + (f", {len(report.failed)} failed" if report.failed else ""))
+
+    def _handle_update(self, path: str, name: str, ext: str, content: str, key: str,
+                       expected: Optional[str] = None) -> None:
+        with metrics.timer("backup"):
+            create_backup(path, key, root=self.root)
         instruction = content.strip().split('\n')[-1]
-        new_code = self.brain.refactor(name, ext, content, instruction)
-        
-        self.last_hash[name] = get_file_hash(new_code)
-        write_safe(path, new_code)
+        # Small edits to big files: ask for search/replace blocks instead of the whole file
+        patch_lines = self._setting("PATCH_MIN_LINES", PATCH_MIN_LINES)
+        if self._setting("REFACTOR_MODE", REFACTOR_MODE) == "patch" and content.count("\n") + 1 >= patch_lines:
+            try:
+                with metrics.timer("patch"):
+                    new_code = self._patch(name, ext, content, instruction)
+            except PatchError as e:
+                metrics.inc("patch_fallbacks")
+                logger.warning(f"   🩹 [PATCH] {e}, rewriting the whole file instead")
+            else:
+                self._write(path, key, new_code, expected)
+                metrics.inc("patches_applied")
+                logger.info(f"✅ [SUCCESS] Patched {name}")
+                return
+        with metrics.timer("refactor"):
+            if self._setting("STREAMING_ENABLED", STREAMING_ENABLED):
+                self._write_stream(path, key, self.brain.refactor_stream(name, ext, content, instruction), expected,
+                                   original=content)
+            else:
+                new_code = self.brain.refactor(name, ext, content, instruction)
+                self._write(path, key, new_code, expected)
         logger.info(f"✅ [SUCCESS] Refactored {name}")
 
+    def _patch(self, name: str, ext: str, content: str, instruction: str) -> str:
+        answer = self.brain.refactor_patch(name, ext, content, instruction)
+        new_code = apply_edit_blocks(content, parse_edit_blocks(answer))
+        # The instruction must not survive, or the next save would run it again
+        lines = new_code.split("\n")
+        leftover = [i for i, line in enumerate(lines) if line.strip() == instruction.strip()]
+        if leftover:
+            del lines[leftover[-1]]
+            new_code = "\n".join(lines).rstrip() + "\n"
+        check_syntax(name, content, new_code)
+        return new_code
+
+    def _write(self, path: str, key: str, content: str, expected: Optional[str] = None) -> None:
+        self._check_unchanged(path, expected)
+        with metrics.timer("write"):
+            write_safe(path, content)
+        self._remember(path, key)
+
+    def _write_stream(self, path: str, key: str, chunks: Iterator[str], expected: Optional[str] = None,
+                      original: Optional[str] = None) -> None:
+        # Partial writes fire events too, but they queue behind this job on the
+        # dispatcher and only run once the manifest holds the final content
+        atomic = self._setting("STREAM_WRITE_MODE", STREAM_WRITE_MODE) == "atomic"
+        write_stream(path, self._guarded(path, chunks, expected), atomic=atomic, original=original)
+        self._remember(path, key)
+
+    def _guarded(self, path: str, chunks: Iterator[str], expected: Optional[str]) -> Iterator[str]:
+        """Checks the file right before the first chunk touches it; a stale job stops reading the model."""
+        checked = False
+        try:
+            for chunk in chunks:
+                if not checked:
+                    self._check_unchanged(path, expected)
+                    checked = True
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        if not checked:
+            self._check_unchanged(path, expected)
+
+    def _check_unchanged(self, path: str, expected: Optional[str]) -> None:
+        """Raises StaleJob if the file no longer has the hash the job started from."""
+        if expected is None:
+            return
+        try:
+            current = hash_file(path)
+        except FileNotFoundError:
+            raise StaleJob(path)
+        if current != expected:
+            raise StaleJob(path)
+
+    def _expected_hash(self, key: str) -> Optional[str]:
+        known = self.manifest.get(key)
+        return known["hash"] if known else None
+
+    def _remember(self, path: str, key: str) -> None:
+        """Records what the Oracle itself just wrote, so the resulting event is ignored."""
+        try:
+            self.manifest.set(key, stat_entry(path, hash_file(path)))
+        except OSError as e:
+            logger.debug(f"Could not fingerprint {key}: {e}")
+
+    def _setting(self, name: str, default: Any) -> Any:
+        # The module-level value unless this workspace overrides it
+        return self.settings.get(name, default)
+
+    def _is_placeholder(self, path: str, size: int) -> bool:
+        return size == len(PLACEHOLDER_TEXT.encode("utf-8")) and self._get_content(path) == PLACEHOLDER_TEXT
+
     def _get_content(self, path: str) -> str:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
\ No newline at end of file
+        return read_text(path)
\ No newline at end of file
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from src.core.config import JOB_DB_PATH
+from src.core.logger import logger
+
+Coalesce = Callable[[Tuple[Any, ...], Tuple[Any, ...]], Tuple[Any, ...]]  # (older args, newer args) -> args
+
+class StoredJob(NamedTuple):
+    id: int
+    key: str
+    args: Tuple[Any, ...]
+    priority: int
+    attempts: int       # Runs started so far, including ones cut short by a crash or a deferral
+    queued_at: float    # Wall-clock time, so waits that span a restart are measured too
+
+class JobStore:
+    """Every queued job, written to SQLite before it runs, so a restart can pick up where the last run stopped.
+
+    A job is 'queued' until a worker starts it, 'running' until it finishes
+    (then it is deleted) and 'deferred' while it waits out a rate limit.
+    Jobs still in the table at startup were interrupted. A newer job for a
+    key folds into the one still waiting for it, as in the dispatcher.
+    WAL mode with synchronous=NORMAL makes a write a cheap append that
+    survives the process being killed (not a power cut).
+    """
+
+    def __init__(self, path: Optional[str] = JOB_DB_PATH) -> None:
+        # No path: same bookkeeping, kept in memory only
+        self.path = path or ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, args TEXT NOT NULL,"
+            " priority INTEGER NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " state TEXT NOT NULL DEFAULT 'queued', queued_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_by_key ON jobs (key, state)")
+
+    def add(self, key: str, args: Tuple[Any, ...], priority: int,
+            coalesce: Optional[Coalesce] = None) -> Tuple[int, bool]:
+        """Records a job and returns (id, whether the dispatcher needs to hear about it).
+
+        With coalesce, a job still waiting for the key absorbs this one and
+        keeps the more urgent priority. It only needs scheduling again if it
+        is queued and just became more urgent; a deferred job is rescheduled
+        when its wait is over.
+        """
+        with self._lock:
+            if coalesce:
+                row = self._db.execute(
+                    "SELECT id, args, priority, state FROM jobs WHERE key = ? AND state != 'running' "
+                    "ORDER BY id LIMIT 1", (key,)).fetchone()
+                if row:
+                    merged = coalesce(tuple(json.loads(row[1])), args)
+                    self._db.execute("UPDATE jobs SET args = ?, priority = ? WHERE id = ?",
+                                     (json.dumps(merged), min(priority, row[2]), row[0]))
+                    return row[0], row[3] == "queued" and priority < row[2]
+            cursor = self._db.execute("INSERT INTO jobs (key, args, priority, queued_at) VALUES (?, ?, ?, ?)",
+                                      (key, json.dumps(args), priority, time.time()))
+            return cursor.lastrowid, True
+
+    def start(self, job_id: int) -> Optional[StoredJob]:
+        """Marks a job as running and counts the attempt. None if it is gone or already running."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1 WHERE id = ? AND state != 'running'",
+                (job_id,))
+            if not cursor.rowcount:
+                return None
+            return self._get(job_id)
+
+    def finish(self, job_id: int) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def defer(self, job_id: int) -> None:
+        """Parks a started job until it is scheduled again; new events for its key fold into it meanwhile."""
+        with self._lock:
+            self._db.execute("UPDATE jobs SET state = 'deferred' WHERE id = ?", (job_id,))
+
+    def get(self, job_id: int) -> Optional[StoredJob]:
+        with self._lock:
+            return self._get(job_id)
+
+    def recover(self) -> List[StoredJob]:
+        """Everything left over from the last run, most urgent first, all back to 'queued'."""
+        with self._lock:
+            interrupted = self._db.execute("UPDATE jobs SET state = 'queued' WHERE state = 'running'").rowcount
+            self._db.execute("UPDATE jobs SET state = 'queued' WHERE state = 'deferred'")
+            rows = self._db.execute(
+                "SELECT id, key, args, priority, attempts, queued_at FROM jobs ORDER BY priority, id").fetchall()
+        if rows:
+            logger.info(f"📼 [JOBS] Resuming {len(rows)} unfinished jobs ({interrupted} were interrupted mid-run)")
+        return [self._row(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            oldest = self._db.execute("SELECT MIN(queued_at) FROM jobs WHERE state != 'running'").fetchone()[0]
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "deferred": counts.get("deferred", 0),
+            "oldest_wait_seconds": round(time.time() - oldest, 1) if oldest else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _get(self, job_id: int) -> Optional[StoredJob]:
+        row = self._db.execute(
+            "SELECT id, key, args, priority, attempts, queued_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    @staticmethod
+    def _row(row: Tuple[Any, ...]) -> StoredJob:
+        return StoredJob(row[0], row[1], tuple(json.loads(row[2])), row[3], row[4], row[5])
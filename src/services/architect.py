@@ -0,0 +1,173 @@
+import json
+import os
+import posixpath
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from src.core.config import (
+    CONTEXT_CANDIDATES, MAX_RETRIES, SCAFFOLD_DEPENDENCY_CHARS, SCAFFOLD_MAX_FILES, SCAFFOLD_WORKERS
+)
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.services.brain import Brain
+from src.services.context_builder import ContextBuilder
+from src.services.rate_limiter import RateLimitDeferred
+from src.utils.file_ops import is_tracked_file, write_atomic
+from src.utils.paths import is_excluded_dir
+
+SCAFFOLD_EXT = ".scaffold"
+
+class PlanError(Exception):
+    """The model's project plan was not usable JSON."""
+
+class PlannedFile(NamedTuple):
+    path: str                     # Relative to the project folder, '/' separated
+    purpose: str
+    depends_on: Tuple[str, ...]   # Other planned paths it needs to see first
+
+class ScaffoldReport(NamedTuple):
+    written: List[str]
+    skipped: List[str]            # Already existed; never overwritten
+    failed: List[str]
+    wall_seconds: float
+    sequential_seconds: float     # Sum of the individual generations: the time one at a time would take
+
+def parse_plan(text: str, max_files: int = SCAFFOLD_MAX_FILES) -> List[PlannedFile]:
+    """Reads {"files": [{"path", "purpose", "depends_on"}]}, dropping unsafe or unsupported paths."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        raise PlanError("no JSON object in the plan")
+    try:
+        entries = json.loads(text[start:end + 1]).get("files")
+    except (ValueError, AttributeError) as e:
+        raise PlanError(f"plan is not valid JSON: {e}")
+    if not isinstance(entries, list):
+        raise PlanError("plan has no 'files' list")
+
+    files: Dict[str, PlannedFile] = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+            continue
+        path = _clean_path(entry["path"])
+        if path is None or path in files:
+            continue
+        depends_on = entry.get("depends_on") or []
+        deps = tuple(d for d in (_clean_path(d) for d in depends_on if isinstance(d, str)) if d and d != path)
+        files[path] = PlannedFile(path, str(entry.get("purpose", "")), deps)
+        if len(files) == max_files:
+            break
+    if not files:
+        raise PlanError("plan lists no usable files")
+    # Dependencies outside the plan can't be waited for
+    return [f._replace(depends_on=tuple(d for d in f.depends_on if d in files)) for f in files.values()]
+
+def _clean_path(path: str) -> Optional[str]:
+    path = posixpath.normpath(path.strip().replace("\\", "/"))
+    parts = path.split("/")
+    if path.startswith("/") or ".." in parts or ":" in parts[0] or any(is_excluded_dir(p) for p in parts[:-1]):
+        return None
+    if path.endswith(SCAFFOLD_EXT) or not is_tracked_file(parts[-1]):
+        return None
+    return path
+
+class Architect:
+    """Generates a whole project: one planning call, then every file in parallel.
+
+    A file starts as soon as the files it depends on are written, so config
+    and models come before the code that uses them. The project description,
+    the plan and the recalled memory are assembled once and shared by every
+    file; each file also sees the code of its dependencies. All files go
+    through the shared Brain, so they share its rate limiter and cache.
+    """
+
+    def __init__(self, brain: Brain, memory, context_builder: Optional[ContextBuilder] = None,
+                 workers: int = SCAFFOLD_WORKERS) -> None:
+        self.brain = brain
+        self.memory = memory
+        self.context_builder = context_builder or ContextBuilder()
+        self.workers = max(1, workers)
+
+    def scaffold(self, folder: str, project: str, description: str,
+                 on_written: Optional[Callable[[str, str], None]] = None) -> ScaffoldReport:
+        """Plans and writes the project into folder. Existing files are left alone."""
+        started = time.perf_counter()
+        memory_context = self._memory_context(description)
+        with metrics.timer("scaffold_plan"):
+            answer = self.brain.plan_project(project, description, memory_context)
+        plan = parse_plan(answer)
+        logger.info(f"🏗️ [ARCHITECT] Planned {len(plan)} files for '{project}'")
+
+        shared = self._shared_context(project, description, plan, memory_context)
+        written: Dict[str, str] = {}
+        skipped: List[str] = []
+        failed: List[str] = []
+        durations: List[float] = []
+        remaining = {f.path: f for f in plan}
+        for f in plan:
+            if os.path.exists(os.path.join(folder, f.path)):
+                skipped.append(f.path)
+                del remaining[f.path]
+        finished: Set[str] = set(skipped)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pythia-architect") as pool:
+            running: Dict[Future, PlannedFile] = {}
+            while remaining or running:
+                ready = [f for f in remaining.values() if all(d in finished for d in f.depends_on)]
+                if not ready and not running:
+                    # A dependency cycle: let the rest go without waiting
+                    ready = list(remaining.values())
+                for f in ready:
+                    del remaining[f.path]
+                    deps = {d: written[d] for d in f.depends_on if d in written}
+                    running[pool.submit(self._generate, f, shared, deps)] = f
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    f = running.pop(future)
+                    finished.add(f.path)
+                    try:
+                        code, seconds = future.result()
+                    except Exception as e:
+                        failed.append(f.path)
+                        logger.error(f"❌ [ARCHITECT] {f.path}: {e}")
+                        continue
+                    durations.append(seconds)
+                    path = os.path.join(folder, *f.path.split("/"))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    write_atomic(path, code)
+                    written[f.path] = code
+                    if on_written:
+                        on_written(path, code)
+                    logger.info(f"   🧱 [ARCHITECT] Wrote {f.path}")
+
+        metrics.inc("scaffold_files", len(written))
+        report = ScaffoldReport(sorted(written), skipped, failed, time.perf_counter() - started, sum(durations))
+        metrics.record("scaffold", report.wall_seconds)
+        return report
+
+    def _memory_context(self, description: str) -> str:
+        results = self.memory.recall(description, n_results=CONTEXT_CANDIDATES)
+        return self.context_builder.build(results, SCAFFOLD_EXT).text
+
+    def _shared_context(self, project: str, description: str, plan: List[PlannedFile], memory_context: str) -> str:
+        listing = "\n".join(f"- {f.path}: {f.purpose}" for f in plan)
+        return (f"PROJECT: {project}\n{description}\n\nFILES IN THIS PROJECT:\n{listing}\n"
+                + (f"\nBACKGROUND:{memory_context}" if memory_context else ""))
+
+    def _generate(self, planned: PlannedFile, shared: str, deps: Dict[str, str]) -> Tuple[str, float]:
+        context = shared + f"\nTHIS FILE ({planned.path}): {planned.purpose}\n"
+        for path, code in deps.items():
+            context += f"\n--- DEPENDENCY: {path} ---\n{code[:SCAFFOLD_DEPENDENCY_CHARS]}\n"
+        _, ext = os.path.splitext(planned.path)
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                code = self.brain.generate(planned.path, ext, context)
+                break
+            except RateLimitDeferred as e:
+                # A batch has nowhere to be re-queued to, so wait out the budget here
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(e.retry_after)
+        if code.startswith("# Error"):
+            raise RuntimeError(code)
+        return code, time.perf_counter() - started
@@ -1,66 +1,446 @@
+import datetime
+import hashlib
+import itertools
+import json
+import threading
 import time
-import google.generativeai as genai
-from typing import Optional, Dict, Any
-from src.core.config import API_KEY, MOCK_MODE, MODEL_NAME, TEMPERATURE, MAX_RETRIES, RETRY_DELAY_BASE
-from src.services.prompts import PERSONAS, DEFAULT_PERSONA, GENERATE_TEMPLATE, REFACTOR_TEMPLATE, VISUALIZE_TEMPLATE
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from src.core.config import (
+    API_KEY, MOCK_MODE, MODEL_NAME, TEMPERATURE, MAX_RETRIES, CACHE_ENABLED, SCAFFOLD_MAX_FILES, VALID_EXTENSIONS,
+    FALLBACK_MODEL_NAMES, LIGHT_MODEL_NAME, LIGHT_TASK_EXTENSIONS
+)
+from src.services.cache import ResponseCache
+from src.services.rate_limiter import RateLimiter, RateLimitDeferred, rate_limiter, is_rate_limit_error, parse_retry_after
+from src.services.prefix_cache import ContextCache
+from src.services.providers import Backend, ProviderPool
+from src.services.prompts import (
+    PERSONAS, DEFAULT_PERSONA, Prompt, GENERATE_PREFIX, GENERATE_SUFFIX, GENERATE_TEMPLATE, REFACTOR_PREFIX,
+    PATCH_PREFIX, EDIT_SUFFIX, PLAN_TEMPLATE, VISUALIZE_PREFIX, VISUALIZE_SUFFIX, VISUALIZE_TEMPLATE
+)
 from src.core.logger import logger
+from src.core.metrics import metrics
+from src.utils.lazy import lazy_import
+from src.utils.singleflight import Flight, SingleFlight
+from src.utils.tokens import estimate_tokens
 
-if not MOCK_MODE:
-    genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel(
-        MODEL_NAME, 
-        generation_config=genai.GenerationConfig(temperature=TEMPERATURE)
-    )
+# The Gemini SDK takes about a second to import, so it is only loaded when first used
+genai = lazy_import("google.generativeai")
+model = None
+_model_lock = threading.Lock()
+
+class GeminiModel:
+    """genai.GenerativeModel plus context caching, so a long shared prompt prefix is uploaded once."""
+
+    def __init__(self, name: str = MODEL_NAME) -> None:
+        genai.configure(api_key=API_KEY)
+        self.name = name
+        self.config = genai.GenerationConfig(temperature=TEMPERATURE)
+        self.model = genai.GenerativeModel(name, generation_config=self.config)
+
+    def generate_content(self, prompt: str, stream: bool = False, cached_prefix: Any = None) -> Any:
+        if cached_prefix is None:
+            return self.model.generate_content(prompt, stream=stream)
+        cached = genai.GenerativeModel.from_cached_content(cached_prefix, generation_config=self.config)
+        return cached.generate_content(prompt, stream=stream)
+
+    def cache_prefix(self, prefix: str, ttl: float) -> Any:
+        return genai.caching.CachedContent.create(
+            model=self.name, contents=[prefix], ttl=datetime.timedelta(seconds=ttl)
+        )
+
+def get_model():
+    """The shared Gemini model, created on first use (callers wait if it is mid-creation)."""
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                model = GeminiModel()
+    return model
+
+def _lazy_model(name: str) -> Callable[[], GeminiModel]:
+    """Factory for an extra backend's model, created on its first request."""
+    models: List[GeminiModel] = []
+    lock = threading.Lock()
+
+    def factory() -> GeminiModel:
+        if not models:
+            with lock:
+                if not models:
+                    models.append(GeminiModel(name))
+        return models[0]
+    return factory
+
+def default_providers() -> ProviderPool:
+    """MODEL_NAME (via get_model, so a patched model is used), then the configured fallbacks and light model."""
+    backends = [Backend(MODEL_NAME, get_model)]
+    backends += [Backend(name, _lazy_model(name)) for name in FALLBACK_MODEL_NAMES if name != MODEL_NAME]
+    if LIGHT_MODEL_NAME:
+        backends.append(Backend(LIGHT_MODEL_NAME, _lazy_model(LIGHT_MODEL_NAME), light=True))
+    return ProviderPool(backends)
+
+def warm_up() -> threading.Thread:
+    """Loads the SDK and builds the model on a background thread."""
+    thread = threading.Thread(target=lambda: MOCK_MODE or get_model(), name="pythia-brain-warmup", daemon=True)
+    thread.start()
+    return thread
+
+class FenceStripper:
+    """Streaming version of Brain._clean_text.
+
+    Feed it chunks as they arrive; it drops an opening ``` line straight away
+    and holds back only trailing lines that could still turn out to be the
+    closing fence.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._head_done = False
+        self._fenced = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if not self._head_done:
+            if len(self._buffer) < 3 and "```".startswith(self._buffer):
+                return ""
+            if self._buffer.startswith("```"):
+                if "\n" not in self._buffer:
+                    return ""
+                self._buffer = self._buffer.split("\n", 1)[1]
+                self._fenced = True
+            self._head_done = True
+
+        lines = self._buffer.split("\n")
+        keep = len(lines) - 1  # The last line may still be incomplete
+        while keep > 0 and lines[keep - 1].strip() in ("", "`", "``", "```"):
+            keep -= 1
+        out = "\n".join(lines[:keep])
+        if not out:
+            return ""
+        out += "\n"
+        self._buffer = self._buffer[len(out):]
+        return out
+
+    def finish(self) -> str:
+        tail, self._buffer = self._buffer, ""
+        if self._fenced and tail.strip().endswith("```"):
+            tail = tail.rsplit("```", 1)[0]
+        return tail
 
 class Brain:
-    def generate(self, filename: str, file_ext: str, context_str: str = "") -> str:
+    def __init__(self, cache: Optional[ResponseCache] = None, limiter: Optional[RateLimiter] = None,
+                 providers: Optional[ProviderPool] = None) -> None:
+        if cache is None and CACHE_ENABLED:
+            cache = ResponseCache()
+        self.cache = cache
+        self.limiter = limiter or rate_limiter
+        # Identical prompts already on their way to the model share that answer
+        self.flights = SingleFlight()
+        # Long prefixes that keep repeating (persona + shared context) are cached by the provider
+        self.context_cache = ContextCache()
+        # Which model answers: the fastest healthy one, with a light model for small tasks
+        self.providers = providers or default_providers()
+
+    def generate(self, filename: str, file_ext: str, context_str: str = "", use_cache: bool = True) -> str:
         if MOCK_MODE: return self._get_mock_content(filename, file_ext)
 
-        persona: str = PERSONAS.get(file_ext, DEFAULT_PERSONA)
-        full_prompt: str = GENERATE_TEMPLATE.format(
-            system_instruction=persona,
-            context_str=context_str,
-            filename=filename,
-            file_ext=file_ext
-        )
-        return self._call_ai(full_prompt, filename, action="generating logic")
+        prompt, key = self._generate_prompt(filename, file_ext, context_str, use_cache)
+        return self._call_ai(prompt, filename, action="generating logic", cache_key=key,
+                             light=file_ext in LIGHT_TASK_EXTENSIONS)
+
+    def generate_stream(self, filename: str, file_ext: str, context_str: str = "", use_cache: bool = True) -> Iterator[str]:
+        """Same as generate, but yields the cleaned answer piece by piece as it arrives."""
+        if MOCK_MODE:
+            yield self._get_mock_content(filename, file_ext)
+            return
 
-    def refactor(self, filename: str, file_ext: str, content: str, instruction: str) -> str:
+        prompt, key = self._generate_prompt(filename, file_ext, context_str, use_cache)
+        yield from self._stream_ai(prompt, filename, action="generating logic", cache_key=key,
+                                   light=file_ext in LIGHT_TASK_EXTENSIONS)
+
+    def refactor(self, filename: str, file_ext: str, content: str, instruction: str, use_cache: bool = True) -> str:
         if MOCK_MODE: return content + f"\n\n# REFACTORED: {instruction}"
 
-        persona: str = PERSONAS.get(file_ext, DEFAULT_PERSONA)
-        full_prompt: str = REFACTOR_TEMPLATE.format(
-            system_instruction=persona,
-            filename=filename,
-            current_content=content,
-            instructions=instruction
-        )
-        return self._call_ai(full_prompt, filename, action="refactoring")
+        prompt, key = self._refactor_prompt(filename, file_ext, content, instruction, use_cache)
+        return self._call_ai(prompt, filename, action="refactoring", cache_key=key)
+
+    def refactor_stream(self, filename: str, file_ext: str, content: str, instruction: str, use_cache: bool = True) -> Iterator[str]:
+        """Same as refactor, but yields the cleaned answer piece by piece as it arrives."""
+        if MOCK_MODE:
+            yield content + f"\n\n# REFACTORED: {instruction}"
+            return
+
+        prompt, key = self._refactor_prompt(filename, file_ext, content, instruction, use_cache)
+        yield from self._stream_ai(prompt, filename, action="refactoring", cache_key=key)
+
+    def refactor_patch(self, filename: str, file_ext: str, content: str, instruction: str, use_cache: bool = True) -> str:
+        """Asks for SEARCH/REPLACE edit blocks instead of the whole file (see src.utils.patching)."""
+        if MOCK_MODE: return f"<<<<<<< SEARCH\n{instruction}\n=======\n# REFACTORED: {instruction}\n>>>>>>> REPLACE"
+
+        prompt, key = self._refactor_prompt(filename, file_ext, content, instruction, use_cache, PATCH_PREFIX)
+        return self._call_ai(prompt, filename, action="patching", cache_key=key)
 
-    def visualize(self, target_filename: str, code_content: str) -> str:
+    def plan_project(self, project: str, description: str, context_str: str = "", use_cache: bool = True) -> str:
+        """Asks for the file list of a project as JSON (see src.services.architect)."""
+        if MOCK_MODE:
+            return json.dumps({"files": [
+                {"path": "config.py", "purpose": "Settings.", "depends_on": []},
+                {"path": "main.py", "purpose": f"Entry point of {project}.", "depends_on": ["config.py"]},
+                {"path": "README.md", "purpose": "How to run it.", "depends_on": ["main.py"]},
+            ]})
+
+        with metrics.timer("prompt_build"):
+            extensions = ", ".join(ext for ext in VALID_EXTENSIONS if ext != ".scaffold")
+            full_prompt: str = PLAN_TEMPLATE.format(
+                context_str=context_str,
+                project=project,
+                description=description,
+                max_files=SCAFFOLD_MAX_FILES,
+                extensions=extensions
+            )
+            key = self._cache_key("", PLAN_TEMPLATE, full_prompt) if use_cache else None
+        return self._call_ai(full_prompt, project, action="planning", cache_key=key)
+
+    def visualize(self, target_filename: str, code_content: str, use_cache: bool = True) -> str:
         if MOCK_MODE: return f'graph TD;\nA["{target_filename}"] --> B["Mock Diagram"];'
 
-        full_prompt: str = VISUALIZE_TEMPLATE.format(
+        prompt = Prompt(VISUALIZE_PREFIX, VISUALIZE_SUFFIX.format(
             target_filename=target_filename,
             code_content=code_content
-        )
-        return self._call_ai(full_prompt, target_filename, action="visualizing")
+        ))
+        key = self._cache_key("", VISUALIZE_TEMPLATE, prompt.text) if use_cache else None
+        return self._call_ai(prompt, target_filename, action="visualizing", cache_key=key, light=True)
+
+    def _generate_prompt(self, filename: str, file_ext: str, context_str: str, use_cache: bool) -> Tuple[Prompt, Optional[str]]:
+        with metrics.timer("prompt_build"):
+            persona: str = PERSONAS.get(file_ext, DEFAULT_PERSONA)
+            # Files generated from the same memories share the prefix; only the name differs
+            prompt = Prompt(
+                GENERATE_PREFIX.format(system_instruction=persona, context_str=context_str),
+                GENERATE_SUFFIX.format(filename=filename, file_ext=file_ext)
+            )
+            key = self._cache_key(persona, GENERATE_TEMPLATE, prompt.text) if use_cache else None
+        return prompt, key
+
+    def _refactor_prompt(self, filename: str, file_ext: str, content: str, instruction: str, use_cache: bool,
+                         prefix: str = REFACTOR_PREFIX) -> Tuple[Prompt, Optional[str]]:
+        with metrics.timer("prompt_build"):
+            persona: str = PERSONAS.get(file_ext, DEFAULT_PERSONA)
+            prompt = Prompt(
+                prefix.format(system_instruction=persona, filename=filename),
+                EDIT_SUFFIX.format(
+                    current_content=content,
+                    instructions=instruction
+                )
+            )
+            key = self._cache_key(persona, prefix + EDIT_SUFFIX, prompt.text) if use_cache else None
+        return prompt, key
+
+    def _cache_key(self, persona: str, template: str, prompt: str) -> Optional[str]:
+        """Everything but the model; _routed_key adds the backend that is asked (or that answered)."""
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(TEMPERATURE, persona, template, prompt)
+
+    def _routed_key(self, cache_key: str, backend: str) -> str:
+        return ResponseCache.make_key(cache_key, backend)
 
-    def _call_ai(self, prompt: str, filename: str, action: str = "processing") -> str:
+    def _route(self, light: bool) -> str:
+        # The backend the pool will ask first; a light or fallback model's answer never passes for the primary's
+        return self.providers.ranked(light)[0].name
+
+    def _call_ai(self, prompt: Union[str, Prompt], filename: str, action: str = "processing",
+                 cache_key: Optional[str] = None, light: bool = False) -> str:
+        if isinstance(prompt, str):
+            prompt = Prompt("", prompt)
+        route = self._route(light)
+        if cache_key:
+            cached = self.cache.get(self._routed_key(cache_key, route))
+            if cached is not None:
+                metrics.inc("brain_cache_hits")
+                logger.info(f"   ⚡ Brain cache hit while {action} for {filename}")
+                return cached
+            metrics.inc("brain_cache_misses")
+
+        flight_key = self._routed_key(cache_key, route) if cache_key else self._flight_key(prompt.text, route)
+        flight, leader = self.flights.join(flight_key)
+        if not leader:
+            shared = self._shared_answer(flight, filename, action)
+            return shared if shared is not None else self._call_model(prompt, filename, action, cache_key, light)
+        try:
+            text = self._call_model(prompt, filename, action, cache_key, light)
+        except BaseException as e:
+            self.flights.finish(flight_key, flight, error=e)
+            raise
+        self.flights.finish(flight_key, flight, result=text)
+        return text
+
+    def _call_model(self, prompt: Prompt, filename: str, action: str, cache_key: Optional[str], light: bool = False) -> str:
+        tokens = estimate_tokens(prompt.text)
+        delay = 0.0
         for attempt in range(MAX_RETRIES):
+            # Raises RateLimitDeferred instead of stalling when the budget is gone
+            with metrics.timer("rate_limit_wait"):
+                self.limiter.acquire(tokens)
             try:
                 logger.info(f"   🧠 Brain {action} for {filename}...")
-                response = model.generate_content(prompt)
-                return self._clean_text(response.text)
+                metrics.inc("model_calls")
+                with metrics.timer("model_call"):
+                    response = self.providers.call(lambda m: self._send(m, prompt), light,
+                                                   can_hedge=lambda: self._hedge_budget(tokens))
+                text = self._clean_text(response.text)
+                self._record_usage(prompt.text, text, response)
+                # Only real answers are cached, never the error strings below
+                self._cache_answer(cache_key, text)
+                return text
             except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg:
-                    wait: int = RETRY_DELAY_BASE * (attempt + 1)
-                    logger.warning(f"   ⏳ Rate limit. Cooling down for {wait}s...")
-                    time.sleep(wait)
+                if is_rate_limit_error(e):
+                    metrics.inc("model_retries")
+                    delay = self.limiter.backoff(attempt, parse_retry_after(e))
+                    self.limiter.penalize(delay)
                 else:
+                    metrics.inc("model_errors")
                     return f"# Error {action}: {e}"
-        return "# Error: Failed after max retries."
+        # Still rate limited: hand the job back rather than writing an error into the file
+        raise RateLimitDeferred(delay)
+
+    def _stream_ai(self, prompt: Union[str, Prompt], filename: str, action: str = "processing",
+                   cache_key: Optional[str] = None, light: bool = False) -> Iterator[str]:
+        if isinstance(prompt, str):
+            prompt = Prompt("", prompt)
+        route = self._route(light)
+        if cache_key:
+            cached = self.cache.get(self._routed_key(cache_key, route))
+            if cached is not None:
+                metrics.inc("brain_cache_hits")
+                logger.info(f"   ⚡ Brain cache hit while {action} for {filename}")
+                yield cached
+                return
+            metrics.inc("brain_cache_misses")
+
+        flight_key = self._routed_key(cache_key, route) if cache_key else self._flight_key(prompt.text, route)
+        flight, leader = self.flights.join(flight_key)
+        if not leader:
+            shared = self._shared_answer(flight, filename, action)
+            if shared is not None:
+                yield shared
+            else:
+                yield from self._stream_model(prompt, filename, action, cache_key, light)
+            return
+        parts: List[str] = []
+        complete = False
+        try:
+            for piece in self._stream_model(prompt, filename, action, cache_key, light):
+                parts.append(piece)
+                yield piece
+            complete = True
+        except Exception as e:
+            self.flights.finish(flight_key, flight, error=e)
+            raise
+        finally:
+            # A stream abandoned by its reader leaves the waiters to ask for themselves
+            if not flight.done.is_set():
+                self.flights.finish(flight_key, flight, result="".join(parts) if complete else None)
+
+    def _hedge_budget(self, tokens: int) -> bool:
+        """A hedge is a second request, so it only goes out if the budget has room for it right now."""
+        try:
+            self.limiter.acquire(tokens, max_wait=0)
+        except RateLimitDeferred:
+            return False
+        return True
+
+    def _flight_key(self, prompt: str, backend: str) -> str:
+        return hashlib.sha256(f"{backend}|{TEMPERATURE}|{prompt}".encode("utf-8")).hexdigest()
+
+    def _cache_answer(self, cache_key: Optional[str], text: str) -> None:
+        # Filed under the backend that actually answered, which may be a fallback
+        backend = self.providers.served_by()
+        if cache_key and backend:
+            self.cache.put(self._routed_key(cache_key, backend), text)
+
+    def _shared_answer(self, flight: Flight, filename: str, action: str) -> Optional[str]:
+        metrics.inc("brain_shared_calls")
+        logger.info(f"   🔗 Brain is already {action} the same prompt, {filename} will share the answer")
+        return self.flights.wait(flight)
+
+    def _stream_model(self, prompt: Prompt, filename: str, action: str, cache_key: Optional[str],
+                      light: bool = False) -> Iterator[str]:
+        tokens = estimate_tokens(prompt.text)
+        delay = 0.0
+        for attempt in range(MAX_RETRIES):
+            with metrics.timer("rate_limit_wait"):
+                self.limiter.acquire(tokens)
+            stripper = FenceStripper()
+            parts: List[str] = []
+            chunk = None
+            chunk_count = 0
+            try:
+                logger.info(f"   🧠 Brain {action} for {filename} (streaming)...")
+                metrics.inc("model_calls")
+                started = time.perf_counter()
+                for chunk in self.providers.open_stream(lambda m: self._send(m, prompt, stream=True), light):
+                    if chunk_count == 0:
+                        metrics.record("model_first_chunk", time.perf_counter() - started)
+                    chunk_count += 1
+                    piece = stripper.feed(chunk.text)
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+                tail = stripper.finish()
+                if tail:
+                    parts.append(tail)
+                    yield tail
+                # Includes the time the caller spent writing each piece
+                metrics.record("model_stream", time.perf_counter() - started)
+                self._record_usage(prompt.text, "".join(parts), chunk)
+                self._cache_answer(cache_key, "".join(parts))
+                return
+            except Exception as e:
+                # Part of the answer is already in the file, so a retry would duplicate it
+                if parts:
+                    raise
+                if is_rate_limit_error(e):
+                    metrics.inc("model_retries")
+                    delay = self.limiter.backoff(attempt, parse_retry_after(e))
+                    self.limiter.penalize(delay)
+                else:
+                    metrics.inc("model_errors")
+                    yield f"# Error {action}: {e}"
+                    return
+        raise RateLimitDeferred(delay)
+
+    def _send(self, model: Any, prompt: Prompt, stream: bool = False) -> Any:
+        """Sends just the suffix when the prefix has a live provider-side cache, otherwise the full prompt."""
+        handle = self.context_cache.handle_for(model, prompt.prefix)
+        if handle is not None:
+            try:
+                response = model.generate_content(prompt.suffix, stream=stream, cached_prefix=handle)
+                if not stream:
+                    return response
+                # An expired cache may only show up once the first chunk is read
+                chunks = iter(response)
+                first = next(chunks, None)
+                return itertools.chain([] if first is None else [first], chunks)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    raise
+                self.context_cache.invalidate(model, prompt.prefix)
+                metrics.inc("prefix_cache_fallbacks")
+                logger.debug(f"Cached prefix rejected, sending the full prompt: {e}")
+        return model.generate_content(prompt.text, stream=True) if stream else model.generate_content(prompt.text)
+
+    def _record_usage(self, prompt: str, text: str, response: Any) -> None:
+        # Gemini reports real token counts (on the last chunk when streaming); estimate otherwise
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        cached_tokens = getattr(usage, "cached_content_token_count", None)
+        if isinstance(cached_tokens, int) and cached_tokens:
+            metrics.observe("cached_prompt_tokens", cached_tokens)
+        metrics.observe("prompt_chars", len(prompt))
+        metrics.observe("response_chars", len(text))
+        metrics.observe("prompt_tokens", prompt_tokens if isinstance(prompt_tokens, int) else estimate_tokens(prompt))
+        metrics.observe("response_tokens", response_tokens if isinstance(response_tokens, int) else estimate_tokens(text))
 
     def _get_mock_content(self, filename: str, ext: str) -> str:
         logger.info(f"   🤖 [MOCK] Generating fake content for {filename}...")
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from src.core.config import CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL
+from src.core.logger import logger
+
+class ResponseCache:
+    """Two-tier cache for model answers: an in-memory LRU in front of a disk store.
+
+    Keys are content hashes (see make_key), so identical prompts sent with the
+    same model settings map to the same answer.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # key -> (created, size) for everything on disk, oldest first
+        self._disk: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.path:
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hashes everything that influences an answer into one cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+            entry = self._read_disk(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: str) -> None:
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk):
+                self._drop_disk(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- Disk tier -------------------------------------------------------
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def _scan_disk(self) -> None:
+        found = []
+        if os.path.isdir(self.path):
+            for bucket in os.scandir(self.path):
+                if not bucket.is_dir():
+                    continue
+                for item in os.scandir(bucket.path):
+                    if item.name.endswith(".json"):
+                        stat = item.stat()
+                        found.append((stat.st_mtime, item.name[:-5], stat.st_size))
+        for created, key, size in sorted(found):
+            self._disk[key] = (created, size)
+            self._disk_bytes += size
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        if not self.path or key not in self._disk:
+            return None
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug(f"🗄️ [CACHE] Dropping unreadable entry {key[:8]}: {e}")
+            self._drop_disk(key)
+            return None
+        if now - data["created"] > self.ttl:
+            self._drop_disk(key)
+            return None
+        return data["created"], data["value"]
+
+    def _write_disk(self, key: str, entry: Tuple[float, str]) -> None:
+        if not self.path:
+            return
+        file_path = self._file(key)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": entry[0], "value": entry[1]}, f)
+            os.replace(tmp_path, file_path)
+            size = os.path.getsize(file_path)
+        except OSError as e:
+            logger.warning(f"⚠️ [CACHE] Could not store entry on disk: {e}")
+            return
+
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)[1]
+        self._disk[key] = (entry[0], size)
+        self._disk_bytes += size
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            self._drop_disk(next(iter(self._disk)))
+
+    def _drop_disk(self, key: str) -> None:
+        _, size = self._disk.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
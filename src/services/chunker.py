@@ -0,0 +1,73 @@
+import ast
+import os
+import re
+from typing import List, NamedTuple
+from src.core.config import CHUNK_MAX_CHARS, CHUNK_OVERLAP_LINES
+from src.utils.file_ops import get_file_hash
+
+_JS_BOUNDARY = re.compile(r"^(export\s+)?(default\s+)?(async\s+)?(function\b|class\b|(const|let|var)\s+\w+\s*=)")
+_MD_BOUNDARY = re.compile(r"^#{1,6}\s")
+
+class Chunk(NamedTuple):
+    text: str
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    hash: str
+
+def chunk_file(filename: str, content: str, max_chars: int = CHUNK_MAX_CHARS,
+               overlap: int = CHUNK_OVERLAP_LINES) -> List[Chunk]:
+    """Splits a file into embedding-sized chunks along syntax boundaries where possible.
+
+    Python and JS split at top-level definitions, Markdown at headings; anything
+    else (and any section that is still too big) is cut by size with a few
+    lines of overlap.
+    """
+    lines = content.splitlines(keepends=True)
+    _, ext = os.path.splitext(filename)
+    starts = _boundaries(ext.lower(), content, lines)
+
+    chunks = []
+    edges = sorted(set([0] + starts)) + [len(lines)]
+    for begin, end in zip(edges, edges[1:]):
+        for a, b in _split_by_size(lines, begin, end, max_chars, overlap):
+            text = "".join(lines[a:b])
+            if text.strip():
+                chunks.append(Chunk(text, a + 1, b, get_file_hash(text)))
+    return chunks
+
+def _boundaries(ext: str, content: str, lines: List[str]) -> List[int]:
+    """0-based line indexes where a new section starts."""
+    if ext == ".py":
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError, SystemError):
+            # SystemError: some CPython 3.11 builds trip over ast.parse running on several threads
+            return []
+        starts = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                starts.append(first - 1)
+                # Module-level code after a definition starts its own section
+                starts.append(node.end_lineno)
+        return [s for s in starts if s < len(lines)]
+    if ext == ".js":
+        return [i for i, line in enumerate(lines) if _JS_BOUNDARY.match(line)]
+    if ext == ".md":
+        return [i for i, line in enumerate(lines) if _MD_BOUNDARY.match(line)]
+    return []
+
+def _split_by_size(lines: List[str], begin: int, end: int, max_chars: int, overlap: int) -> List[tuple]:
+    windows = []
+    start = begin
+    while start < end:
+        size = 0
+        stop = start
+        while stop < end and (stop == start or size + len(lines[stop]) <= max_chars):
+            size += len(lines[stop])
+            stop += 1
+        windows.append((start, stop))
+        if stop >= end:
+            break
+        start = max(stop - overlap, start + 1)
+    return windows
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from src.core.config import CONTEXT_TOKEN_BUDGETS, CONTEXT_DEFAULT_BUDGET, CONTEXT_MIN_SNIPPET_TOKENS
+from src.utils.tokens import estimate_tokens
+
+class Snippet(NamedTuple):
+    filename: str
+    text: str
+    start_line: Optional[int]  # None for documents memorized before chunking
+    end_line: Optional[int]
+    distance: float
+
+    def header(self) -> str:
+        where = self.filename
+        if self.start_line is not None:
+            where += f" (lines {self.start_line}-{self.end_line})"
+        return f"\n--- MEMORY: {where} ---\n"
+
+class BuiltContext(NamedTuple):
+    text: str
+    used_tokens: int
+    dropped_tokens: int
+    snippets: int     # Snippets that made it in (whole or trimmed)
+    dropped: int      # Snippets left out for lack of room
+    duplicates: int   # Snippets left out because their lines were already in
+
+class ContextBuilder:
+    """Turns recall results into a CONTEXT block that fits a token budget.
+
+    Snippets are taken most relevant first. Exact duplicates and lines already
+    included from the same file are removed, and the last snippet that doesn't
+    fit is cut at a line boundary.
+    """
+
+    def __init__(self, budgets: Dict[str, int] = CONTEXT_TOKEN_BUDGETS,
+                 default_budget: int = CONTEXT_DEFAULT_BUDGET,
+                 min_snippet_tokens: int = CONTEXT_MIN_SNIPPET_TOKENS) -> None:
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.min_snippet_tokens = min_snippet_tokens
+
+    def budget_for(self, ext: str) -> int:
+        return self.budgets.get(ext, self.default_budget)
+
+    def build(self, results: Dict[str, Any], ext: str, budget: Optional[int] = None) -> BuiltContext:
+        remaining = self.budget_for(ext) if budget is None else budget
+        parts: List[str] = []
+        used = dropped_tokens = dropped = duplicates = 0
+        seen_texts = set()
+        covered: Dict[str, List[Tuple[int, int]]] = {}
+
+        for snippet in self._ranked(results):
+            if snippet.text in seen_texts:
+                duplicates += 1
+                continue
+            seen_texts.add(snippet.text)
+            snippet = self._without_covered(snippet, covered.get(snippet.filename, []))
+            if snippet is None:
+                duplicates += 1
+                continue
+            full_tokens = estimate_tokens(snippet.text)
+
+            part = self._format(snippet)
+            cost = estimate_tokens(part)
+            if cost > remaining:
+                trimmed = self._trim(snippet, remaining - estimate_tokens(snippet.header()) - 1)
+                part = self._format(trimmed) if trimmed else ""
+                if trimmed is None or estimate_tokens(part) > remaining:
+                    dropped += 1
+                    dropped_tokens += full_tokens
+                    continue
+                snippet, cost = trimmed, estimate_tokens(part)
+
+            parts.append(part)
+            remaining -= cost
+            used += cost
+            dropped_tokens += max(0, full_tokens - estimate_tokens(snippet.text))
+            if snippet.start_line is not None:
+                covered.setdefault(snippet.filename, []).append((snippet.start_line, snippet.end_line))
+
+        return BuiltContext("".join(parts), used, dropped_tokens, len(parts), dropped, duplicates)
+
+    def _format(self, snippet: Snippet) -> str:
+        return f"{snippet.header()}{snippet.text.rstrip()}\n"
+
+    def _ranked(self, results: Dict[str, Any]) -> List[Snippet]:
+        documents = (results.get("documents") or [[]])[0] or []
+        metadatas = (results.get("metadatas") or [[]])[0] or []
+        distances = (results.get("distances") or [[]])[0] or []
+        snippets = []
+        for i, text in enumerate(documents):
+            meta = metadatas[i] if i < len(metadatas) and metadatas[i] else {}
+            # Without distances, keep the order the database returned
+            distance = distances[i] if i < len(distances) else float(i)
+            snippets.append(Snippet(meta.get("filename", "unknown"), text,
+                                    meta.get("start_line"), meta.get("end_line"), distance))
+        return sorted(snippets, key=lambda s: s.distance)
+
+    def _without_covered(self, snippet: Snippet, covered: List[Tuple[int, int]]) -> Optional[Snippet]:
+        """Drops the lines of snippet that an earlier snippet from the same file already showed."""
+        if snippet.start_line is None or not covered:
+            return snippet
+        lines = snippet.text.splitlines(keepends=True)
+        keep = [not any(a <= snippet.start_line + i <= b for a, b in covered) for i in range(len(lines))]
+        if all(keep):
+            return snippet
+        if not any(keep):
+            return None
+        # Chunks only overlap at their edges, so keep the longest uncovered run
+        best_start, best_len, run_start = 0, 0, None
+        for i, k in enumerate(keep + [False]):
+            if k and run_start is None:
+                run_start = i
+            elif not k and run_start is not None:
+                if i - run_start > best_len:
+                    best_start, best_len = run_start, i - run_start
+                run_start = None
+        text = "".join(lines[best_start:best_start + best_len])
+        if not text.strip():
+            return None
+        start = snippet.start_line + best_start
+        return snippet._replace(text=text, start_line=start, end_line=start + best_len - 1)
+
+    def _trim(self, snippet: Snippet, tokens: int) -> Optional[Snippet]:
+        """Keeps the leading whole lines of snippet that fit in `tokens`."""
+        if tokens < self.min_snippet_tokens:
+            return None
+        lines = snippet.text.splitlines(keepends=True)
+        # Binary search for the most lines that fit
+        low, high = 0, len(lines)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if estimate_tokens("".join(lines[:mid]).rstrip() + "\n") <= tokens:
+                low = mid
+            else:
+                high = mid - 1
+        text = "".join(lines[:low])
+        if not text.strip():
+            return None
+        end_line = snippet.start_line + low - 1 if snippet.start_line is not None else None
+        return snippet._replace(text=text, end_line=end_line)
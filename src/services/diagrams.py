@@ -0,0 +1,139 @@
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from src.core.config import DIAGRAM_CACHE_SIZE
+
+DIAGRAM_EXT = ".mermaid"
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+def python_diagram(source: str, name: str) -> str:
+    """Mermaid `graph TD` of a Python module: its functions and classes (solid arrows) and who calls whom (dotted).
+
+    Only calls that resolve to something defined in the module are drawn.
+    Raises SyntaxError (or ValueError) if the source does not parse.
+    """
+    tree = ast.parse(source)
+    module_id = _node_id("mod", name)
+    functions: Dict[str, str] = {}                         # function name -> node id
+    classes: Dict[str, Tuple[str, Dict[str, str]]] = {}    # class name -> (node id, method name -> node id)
+    module_code: List[ast.AST] = []
+    callers: List[Tuple[str, Optional[str], List[ast.AST]]] = [(module_id, None, module_code)]
+    lines = ["graph TD", f"    %% Drawn from {name}: solid arrows contain, dotted arrows call",
+             f'    {module_id}["{_label(name)}"]']
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = _node_id("fn", node.name)
+            callers.append((functions[node.name], None, [node]))
+        elif isinstance(node, ast.ClassDef):
+            methods = {}
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    methods[item.name] = _node_id("m", f"{node.name}__{item.name}")
+                    callers.append((methods[item.name], node.name, [item]))
+            classes[node.name] = (_node_id("cls", node.name), methods)
+        else:
+            # Module-level code, e.g. `if __name__ == "__main__": main()`
+            module_code.append(node)
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.append(f'    {functions[node.name]}["{_signature(node)}"]')
+            lines.append(f"    {module_id} --> {functions[node.name]}")
+        elif isinstance(node, ast.ClassDef):
+            class_id, methods = classes[node.name]
+            title = _label(f"class {node.name}")
+            if methods:
+                # An empty subgraph doesn't render, so method-less classes are plain nodes
+                lines.append(f'    subgraph {class_id}["{title}"]')
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        lines.append(f'        {methods[item.name]}["{_signature(item)}"]')
+                lines.append("    end")
+            else:
+                lines.append(f'    {class_id}["{title}"]')
+            lines.append(f"    {module_id} --> {class_id}")
+            for base in node.bases:
+                if isinstance(base, ast.Name) and base.id in classes and base.id != node.name:
+                    lines.append(f"    {class_id} -->|inherits| {classes[base.id][0]}")
+
+    edges: Dict[Tuple[str, str], None] = {}
+    for caller_id, owner, nodes in callers:
+        for call in (c for n in nodes for c in ast.walk(n) if isinstance(c, ast.Call)):
+            callee = _resolve(call.func, owner, functions, classes)
+            if callee:
+                edges[(caller_id, callee)] = None
+    lines += [f"    {caller} -.-> {callee}" for caller, callee in edges]
+    return "\n".join(lines) + "\n"
+
+def _resolve(func: ast.expr, owner: Optional[str], functions: Dict[str, str],
+             classes: Dict[str, Tuple[str, Dict[str, str]]]) -> Optional[str]:
+    if isinstance(func, ast.Name):
+        if func.id in functions:
+            return functions[func.id]
+        if func.id in classes:
+            # Instantiating a class runs its __init__
+            class_id, methods = classes[func.id]
+            return methods.get("__init__", class_id)
+        return None
+    if not isinstance(func, ast.Attribute):
+        return None
+    target = func.value.id if isinstance(func.value, ast.Name) else None
+    if target in ("self", "cls") and owner:
+        target = owner
+    if target in classes:
+        return classes[target][1].get(func.attr)
+    # obj.method(): only drawn when a single class in the module has that method
+    matches = [methods[func.attr] for _, methods in classes.values() if func.attr in methods]
+    return matches[0] if len(matches) == 1 else None
+
+def _signature(node: FunctionNode) -> str:
+    prefix = "async " if isinstance(node, ast.AsyncFunctionDef) else ""
+    return _label(f"{prefix}{node.name}()")
+
+def _node_id(kind: str, name: str) -> str:
+    return f"{kind}_{re.sub(r'[^0-9A-Za-z_]', '_', name)}"
+
+def _label(text: str) -> str:
+    return text.replace('"', "#quot;")
+
+class DiagramEngine:
+    """Local diagrams of Python files, cached by source hash (a re-save without changes costs a dict lookup)."""
+
+    def __init__(self, max_entries: int = DIAGRAM_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def render(self, source: str, name: str) -> Optional[str]:
+        """The diagram for this source, or None if it does not parse (e.g. mid-edit)."""
+        key = hashlib.sha256(f"{name}\x1f{source}".encode("utf-8")).hexdigest()
+        with self._lock:
+            diagram = self._cache.get(key)
+            if diagram is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return diagram
+            self.misses += 1
+        try:
+            diagram = python_diagram(source, name)
+        except (SyntaxError, ValueError):
+            with self._lock:
+                self.failures += 1
+            return None
+        with self._lock:
+            self._cache[key] = diagram
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return diagram
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses, "failures": self.failures}
@@ -0,0 +1,142 @@
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+class FakeRateLimitError(Exception):
+    """Looks like the 429 the Gemini client raises."""
+
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        message = "429 Resource has been exhausted (e.g. check quota)."
+        if retry_after is not None:
+            message += f" retry_delay {{ seconds: {retry_after:g} }}"
+        super().__init__(message)
+        self.code = 429
+
+class FakeResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+class FakeModel:
+    """Local stand-in for genai.GenerativeModel.
+
+    `schedule` lists the HTTP status of successive calls (e.g. [429, 429, 200]);
+    once it runs out, calls fail at random with `error_rate` (500) and
+    `rate_limit_rate` (429) and otherwise succeed.
+
+    Latency is log-normal around `latency` seconds (`latency_sigma` = 0 makes it
+    fixed). Streaming spends `first_chunk_share` of it before the first chunk
+    and spreads the rest over the others. `output_chars` replaces `text` with
+    synthetic code of that size; `responder` builds the answer from the prompt
+    instead. `chars_per_second` adds generation time proportional to the
+    answer's length, so long answers cost what they would on a real model.
+
+    cache_prefix() stores a prefix like Gemini context caching does; calls that
+    pass its handle send only the rest. `sent_chars` and `cached_chars` count
+    prompt text sent vs. served from a cached prefix.
+    """
+
+    def __init__(self, text: str = "print('fake')", schedule: Iterable[int] = (),
+                 retry_after: Optional[float] = None, chunk_size: int = 16,
+                 latency: float = 0.0, latency_sigma: float = 0.0, first_chunk_share: float = 0.3,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 output_chars: Optional[int] = None, seed: Optional[int] = None,
+                 responder: Optional[Callable[[str], str]] = None, chars_per_second: Optional[float] = None) -> None:
+        self.text = text if output_chars is None else synthetic_code(output_chars)
+        self.responder = responder
+        self.chars_per_second = chars_per_second
+        self.retry_after = retry_after
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.first_chunk_share = first_chunk_share
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._schedule = list(schedule)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompts: List[str] = []
+        self.sent_chars = 0
+        self.cached_chars = 0
+        self._prefixes: Dict[str, Tuple[str, float]] = {}  # handle -> (prefix, expires)
+
+    def cache_prefix(self, prefix: str, ttl: float) -> str:
+        with self._lock:
+            handle = f"cachedContents/fake-{len(self._prefixes)}"
+            self._prefixes[handle] = (prefix, time.monotonic() + ttl)
+        return handle
+
+    def expire_prefixes(self) -> None:
+        """Forgets every cached prefix, as the provider does when they expire."""
+        with self._lock:
+            self._prefixes.clear()
+
+    def generate_content(self, prompt: str, stream: bool = False, cached_prefix: Any = None,
+                         **kwargs) -> Union[FakeResponse, Iterator[FakeResponse]]:
+        with self._lock:
+            if cached_prefix is not None:
+                prefix, expires = self._prefixes.get(cached_prefix, ("", 0.0))
+                if expires < time.monotonic():
+                    raise RuntimeError(f"404 CachedContent not found: {cached_prefix}")
+                self.cached_chars += len(prefix)
+                self.sent_chars += len(prompt)
+                prompt = prefix + prompt
+            else:
+                self.sent_chars += len(prompt)
+            status = self._schedule[self.calls] if self.calls < len(self._schedule) else self._random_status()
+            delay = self._sample_latency()
+            self.calls += 1
+            self.prompts.append(prompt)
+        if status == 429:
+            raise FakeRateLimitError(self.retry_after)
+        if status != 200:
+            raise RuntimeError(f"{status} Fake server error")
+        text = self.responder(prompt) if self.responder else self.text
+        if self.chars_per_second:
+            delay += len(text) / self.chars_per_second
+        if stream:
+            return self._stream(text, delay)
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    def _stream(self, text: str, delay: float) -> Iterator[FakeResponse]:
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        if not delay:
+            yield from (FakeResponse(piece) for piece in pieces)
+            return
+        time.sleep(delay * self.first_chunk_share)
+        gap = delay * (1 - self.first_chunk_share) / max(1, len(pieces) - 1)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(gap)
+            yield FakeResponse(piece)
+
+    def _random_status(self) -> int:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return 200
+
+    def _sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency
+        # Median = latency, with the long right tail real APIs have
+        return self._rng.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+def synthetic_code(chars: int) -> str:
+    """Plausible Python of roughly `chars` characters."""
+    lines = []
+    size = 0
+    i = 0
+    while size < chars:
+        line = f"def step_{i}(value):\n    return value * {i} + {i % 7}\n\n"
+        lines.append(line)
+        size += len(line)
+        i += 1
+    return "".join(lines)[:chars]
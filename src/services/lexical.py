@@ -0,0 +1,130 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+from src.core.config import LEXICAL_FILENAME_BOOST
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case terms: whole identifiers plus their snake_case / camelCase parts."""
+    terms = []
+    for word in _IDENTIFIER.findall(text):
+        whole = word.strip("_").lower()
+        if len(whole) > 1:
+            terms.append(whole)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL_PART.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if len(p) > 1)
+    return terms
+
+class LexicalHit(NamedTuple):
+    doc_id: str
+    score: float
+    coverage: float  # Share of the query's IDF weight this document matched (0-1)
+    metadata: Dict[str, Any]
+
+class LexicalIndex:
+    """In-memory BM25 index over memory chunks.
+
+    Each chunk is indexed under its text plus its file path, repeated
+    `filename_boost` times so a name match outweighs a passing mention.
+    Documents are added and removed one chunk at a time, mirroring the
+    vector collection.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, filename_boost: int = LEXICAL_FILENAME_BOOST) -> None:
+        self.k1 = k1
+        self.b = b
+        self.filename_boost = filename_boost
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._files: Dict[str, Set[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, filename: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        terms = Counter(tokenize(text))
+        for term in tokenize(filename):
+            terms[term] += self.filename_boost
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            length = sum(terms.values())
+            self._lengths[doc_id] = length
+            self._terms[doc_id] = list(terms)
+            self._total_length += length
+            self._metadata[doc_id] = dict(metadata or {}, filename=filename)
+            self._files.setdefault(filename, set()).add(doc_id)
+
+    def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            if doc_id in self._metadata:
+                self._metadata[doc_id].update(metadata)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def remove_file(self, filename: str) -> None:
+        with self._lock:
+            for doc_id in list(self._files.get(filename, ())):
+                self._remove(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._terms.clear()
+            self._metadata.clear()
+            self._files.clear()
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 10) -> List[LexicalHit]:
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not terms or not count:
+                return []
+            average = self._total_length / count
+            weights = {term: self._idf(len(self._postings.get(term, ())), count) for term in terms}
+            total_weight = sum(weights.values())
+            scores: Dict[str, float] = {}
+            matched: Dict[str, float] = {}
+            for term, idf in weights.items():
+                for doc_id, tf in self._postings.get(term, {}).items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                    matched[doc_id] = matched.get(doc_id, 0.0) + idf
+            best = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+            return [LexicalHit(doc_id, score, matched[doc_id] / total_weight, dict(self._metadata[doc_id]))
+                    for doc_id, score in best]
+
+    def _idf(self, df: int, count: int) -> float:
+        return math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+    def _remove(self, doc_id: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        metadata = self._metadata.pop(doc_id)
+        files = self._files.get(metadata["filename"])
+        if files is not None:
+            files.discard(doc_id)
+            if not files:
+                del self._files[metadata["filename"]]
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
@@ -1,50 +1,581 @@
 import os
-import chromadb
-from typing import Dict, Any, List, Optional
-from src.core.config import DB_PATH
+import sqlite3
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from src.core.config import (
+    CONTEXT_CANDIDATES, DB_PATH, MEMORY_BATCH_SIZE, RECALL_CACHE_SIZE, QUERY_EMBEDDING_CACHE_SIZE,
+    RECALL_MODE, RRF_K, LEXICAL_DECISIVE_COVERAGE, LEXICAL_DECISIVE_MARGIN,
+    MEMORY_MAX_BYTES, MEMORY_MAX_CHUNKS, MEMORY_TTL_DAYS
+)
 from src.core.logger import logger
+from src.services.chunker import chunk_file
+from src.services.lexical import LexicalHit, LexicalIndex
+from src.utils.lazy import lazy_import
+
+# chromadb pulls in a large import tree; load it only when memory is first touched
+chromadb = lazy_import("chromadb")
+
+COLLECTION_NAME = "oracle_knowledge"
+COMPACT_SUFFIX = "_compact"     # compact() builds <collection>_compact, then renames it over the original
+
+# One embedding model per process, however many workspaces (collections) are served
+_embedder = None
+# Workspaces connect at the same time on startup; the first touch of the lazy chromadb module must not race
+_chromadb_lock = threading.Lock()
+
+def shared_embedder() -> Any:
+    global _embedder
+    if _embedder is None:
+        with _chromadb_lock:
+            if _embedder is None:
+                from chromadb.utils import embedding_functions
+                # Same model the collections use for documents
+                _embedder = embedding_functions.DefaultEmbeddingFunction()
+    return _embedder
 
 class MemoryEngine:
-    def __init__(self) -> None:
-        try:
-            self.client = chromadb.PersistentClient(path=DB_PATH)
-            self.collection = self.client.get_or_create_collection(
-                name="oracle_knowledge",
-                metadata={"hnsw:space": "cosine"}
-            )
-            logger.debug(f"🧠 [MEMORY] Connected to database at {DB_PATH}")
-        
-        except Exception as e:
-            logger.critical(f"🔥 [MEMORY CRASH] Could not load database: {e}")
+    def __init__(self, lazy: bool = False, collection: str = COLLECTION_NAME) -> None:
+        """Opens the database now, or on first use when lazy=True (see warm_up).
+
+        Each workspace has its own collection in the shared database.
+        """
+        self.collection_name = collection
+        # Recall results are cached per generation; memorize/forget bump it
+        self._generation = 0
+        self._cache_lock = threading.Lock()
+        self._recall_cache: "OrderedDict[Tuple[str, int, str, int], Dict[str, Any]]" = OrderedDict()
+        self._embedding_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._embedder = None
+        self.recall_hits = 0
+        self.recall_misses = 0
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.lexical_only = 0
+        # BM25 twin of the collection, rebuilt from it on first use after a restart
+        self.lexical = LexicalIndex()
+        self._lexical_ready = False
+        self._lexical_lock = threading.RLock()
+        # filename -> [chunks, bytes of text, last learned or recalled], filled alongside the lexical index
+        self._usage: Dict[str, List[float]] = {}
+        # Recall times not yet saved to the chunks' metadata (see enforce_retention)
+        self._recalled: Dict[str, float] = {}
+        self.evicted = 0
+        self.client = None
+        self._collection = None
+        self._connect_lock = threading.Lock()
+        if not lazy:
+            self._connect()
+
+    @property
+    def collection(self) -> Any:
+        if self._collection is None:
+            self._connect()
+        return self._collection
+
+    def warm_up(self) -> threading.Thread:
+        """Connects and loads the embedding model on a background thread."""
+        def warm() -> None:
+            self._connect()
+            try:
+                self._ensure_lexical()
+                self._get_embedder()(["warm up"])
+            except Exception as e:
+                logger.warning(f"⚠️ [MEMORY] Warm-up incomplete (lexical index or embedding model): {e}")
+
+        thread = threading.Thread(target=warm, name="pythia-memory-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _connect(self) -> None:
+        # Everyone who needs the database before it is ready waits here for the first caller
+        with self._connect_lock:
+            if self._collection is not None:
+                return
+            try:
+                with _chromadb_lock:
+                    self.client = chromadb.PersistentClient(path=DB_PATH)
+                self._recover_compaction()
+                self._collection = self.client.get_or_create_collection(
+                    name=self.collection_name,
+                    metadata={"hnsw:space": "cosine"}
+                )
+                logger.debug(f"🧠 [MEMORY] Connected to '{self.collection_name}' at {DB_PATH}")
+            except Exception as e:
+                logger.critical(f"🔥 [MEMORY CRASH] Could not load database: {e}")
+
+    def _recover_compaction(self) -> None:
+        names = {getattr(c, "name", c) for c in self.client.list_collections()}
+        compacted = self.collection_name + COMPACT_SUFFIX
+        if compacted in names and self.collection_name not in names:
+            # compact() stopped between dropping the old collection and renaming its (complete) copy
+            self.client.get_collection(compacted).modify(name=self.collection_name)
+            logger.warning("🧹 [MEMORY] Finished a compaction that was interrupted")
 
     def memorize(self, filename: str, content: str) -> None:
-        """Saves file content into the vector database."""
-        try:
-            self.collection.upsert(
-                documents=[content],
-                metadatas=[{"filename": filename}],
-                ids=[filename]
-            )
-            logger.info(f"✅ [MEMORY] Learned contents of '{filename}'")
-        except Exception as e:
-            logger.error(f"⚠️ [MEMORY ERROR] Failed to memorize {filename}: {e}")
+        """Saves file content into the vector database, one chunk per section.
+
+        Chunks are keyed by filename + content hash, so only sections that
+        changed since the last call are embedded again.
+        """
+        self.memorize_many({filename: content})
+
+    def memorize_many(self, files: Dict[str, str]) -> None:
+        """Bulk version of memorize: one round of database calls per batch of files."""
+        names = list(files)
+        for i in range(0, len(names), MEMORY_BATCH_SIZE):
+            batch = names[i:i + MEMORY_BATCH_SIZE]
+            try:
+                self._memorize_batch({name: files[name] for name in batch})
+            except Exception as e:
+                logger.error(f"⚠️ [MEMORY ERROR] Failed to memorize {', '.join(batch[:3])}: {e}")
+        # Sizes are only known once the collection has been scanned (see _ensure_lexical)
+        if self._lexical_ready and self._over_budget(*self._totals()):
+            self.enforce_retention()
 
     def forget(self, filename: str) -> None:
-        """Removes a file from memory."""
+        """Removes a file (all of its chunks) from memory."""
         try:
-            self.collection.delete(ids=[filename])
+            self.collection.delete(where={"filename": filename})
+            with self._lexical_lock:
+                self.lexical.remove_file(filename)
+                self._usage.pop(filename, None)
+                self._recalled.pop(filename, None)
+            self._bump_generation()
             logger.warning(f"🗑️ [MEMORY] Forgot '{filename}'")
         except Exception as e:
             logger.error(f"⚠️ [MEMORY ERROR] Failed to forget {filename}: {e}")
 
-    def recall(self, query: str, n_results: int = 2) -> Dict[str, Any]:
-        """Finds relevant code/text based on a query."""
+    def forget_many(self, filenames: List[str]) -> None:
+        """Bulk version of forget."""
+        for i in range(0, len(filenames), MEMORY_BATCH_SIZE):
+            batch = filenames[i:i + MEMORY_BATCH_SIZE]
+            try:
+                self.collection.delete(where={"filename": {"$in": batch}})
+                with self._lexical_lock:
+                    for filename in batch:
+                        self.lexical.remove_file(filename)
+                        self._usage.pop(filename, None)
+                        self._recalled.pop(filename, None)
+                self._bump_generation()
+                logger.warning(f"🗑️ [MEMORY] Forgot {len(batch)} files")
+            except Exception as e:
+                logger.error(f"⚠️ [MEMORY ERROR] Failed to forget {', '.join(batch[:3])}: {e}")
+
+    def recall(self, query: str, n_results: int = 2, mode: Optional[str] = None) -> Dict[str, Any]:
+        """Finds relevant chunks based on a query.
+
+        Each hit's metadata carries its filename and start_line/end_line.
+        In "hybrid" mode BM25 and vector results are merged by reciprocal rank
+        fusion, and the vector search is skipped entirely when the best BM25
+        hit is decisive. "distances" always sort best-first (0 = best).
+        Repeated queries are answered from cache until memory changes.
+        Every file recalled counts as used for the retention policy.
+        """
+        mode = mode or RECALL_MODE
+        key = (query, n_results, mode, self._generation)
+        with self._cache_lock:
+            cached = self._recall_cache.get(key)
+            if cached is not None:
+                self._recall_cache.move_to_end(key)
+                self.recall_hits += 1
+            else:
+                self.recall_misses += 1
+        if cached is not None:
+            self._touch(cached)
+            return cached
+
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            return results
+            if mode == "vector":
+                results = self._vector_recall(query, n_results)
+            else:
+                self._ensure_lexical()
+                hits = self.lexical.search(query, n_results * 2)
+                if mode == "lexical" or self._decisive(hits):
+                    with self._cache_lock:
+                        self.lexical_only += 1
+                    results = self._lexical_results(hits[:n_results])
+                else:
+                    results = self._fuse(self._vector_recall(query, n_results * 2), hits, n_results)
         except Exception as e:
             logger.error(f"⚠️ [MEMORY ERROR] Recall failed: {e}")
-            return {'documents': [], 'metadatas': []}
\ No newline at end of file
+            return {'documents': [], 'metadatas': []}
+
+        with self._cache_lock:
+            # Only cache if nothing was learned or forgotten while we were searching
+            if key[3] == self._generation:
+                self._recall_cache[key] = results
+                while len(self._recall_cache) > RECALL_CACHE_SIZE:
+                    self._recall_cache.popitem(last=False)
+        self._touch(results)
+        return results
+
+    def enforce_retention(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Saves recall times, then forgets expired files and, least recently used first, what exceeds the limits.
+
+        A file's last use is the later of when it was learned and when it was
+        last recalled; evicted files come back the next time they change.
+        """
+        self._ensure_lexical()
+        now = now or time.time()
+        self._save_recall_times()
+        with self._lexical_lock:
+            usage = {filename: list(entry) for filename, entry in self._usage.items()}
+
+        expired = []
+        if MEMORY_TTL_DAYS is not None:
+            cutoff = now - MEMORY_TTL_DAYS * 86400
+            expired = [filename for filename, entry in usage.items() if entry[2] < cutoff]
+        for filename in expired:
+            del usage[filename]
+        chunks = int(sum(entry[0] for entry in usage.values()))
+        size = int(sum(entry[1] for entry in usage.values()))
+        over_budget = []
+        for filename in sorted(usage, key=lambda name: usage[name][2]):
+            if not self._over_budget(chunks, size):
+                break
+            over_budget.append(filename)
+            chunks -= int(usage[filename][0])
+            size -= int(usage[filename][1])
+
+        if expired or over_budget:
+            self.forget_many(expired + over_budget)
+            with self._lexical_lock:
+                self.evicted += len(expired) + len(over_budget)
+            logger.info(f"♻️ [MEMORY] Retention: forgot {len(expired)} expired and {len(over_budget)} least recently "
+                        f"used files ({chunks} chunks, {size / 1024**2:.1f} MB left)")
+        return {"expired": len(expired), "evicted": len(over_budget), "chunks": chunks, "bytes": size}
+
+    def compact(self, probes: int = 20) -> Dict[str, Any]:
+        """Applies the retention policy, then rebuilds the collection and reclaims disk space.
+
+        Deleted chunks leave holes in the HNSW index and the SQLite file.
+        The live chunks are copied with their stored embeddings (nothing is
+        embedded again) into a fresh collection that replaces the old one,
+        and the database is vacuumed. Returns size on disk, chunk count and
+        median vector query latency before and after.
+        """
+        queries = self._probe_queries(probes)
+        before = self._footprint(queries)
+        retention = self.enforce_retention()
+        copied = self._rebuild()
+        self._vacuum()
+        after = self._footprint(queries)
+        logger.info(f"🧹 [MEMORY] Compacted {before['chunks']} -> {after['chunks']} chunks, "
+                    f"{before['bytes_on_disk'] / 1024**2:.1f} -> {after['bytes_on_disk'] / 1024**2:.1f} MB on disk")
+        return {"before": before, "after": after, "expired": retention["expired"],
+                "evicted": retention["evicted"], "copied": copied}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            recalls = self.recall_hits + self.recall_misses
+            embeds = self.embedding_hits + self.embedding_misses
+            return {
+                "generation": self._generation,
+                "recall_hits": self.recall_hits,
+                "recall_misses": self.recall_misses,
+                "recall_hit_rate": self.recall_hits / recalls if recalls else 0.0,
+                "embedding_hits": self.embedding_hits,
+                "embedding_misses": self.embedding_misses,
+                "embedding_hit_rate": self.embedding_hits / embeds if embeds else 0.0,
+                "lexical_only": self.lexical_only,
+                "lexical_docs": len(self.lexical),
+                **self._retention_stats(),
+            }
+
+    def _retention_stats(self) -> Dict[str, int]:
+        chunks, size = self._totals()
+        with self._lexical_lock:
+            return {"files": len(self._usage), "chunks": chunks, "bytes": size, "evicted": self.evicted}
+
+    def _vector_recall(self, query: str, n_results: int) -> Dict[str, Any]:
+        return self.collection.query(
+            query_embeddings=[self._embed_query(query)],
+            n_results=n_results
+        )
+
+    def _decisive(self, hits: List[LexicalHit]) -> bool:
+        """True when the best BM25 hit is clearly the answer, so embedding the query can't help."""
+        if not hits or hits[0].coverage < LEXICAL_DECISIVE_COVERAGE:
+            return False
+        return len(hits) == 1 or hits[0].score >= LEXICAL_DECISIVE_MARGIN * hits[1].score
+
+    def _lexical_results(self, hits: List[LexicalHit]) -> Dict[str, Any]:
+        documents = self._fetch_documents([hit.doc_id for hit in hits])
+        hits = [hit for hit in hits if hit.doc_id in documents]
+        top = hits[0].score if hits else 1.0
+        return {
+            "ids": [[hit.doc_id for hit in hits]],
+            "documents": [[documents[hit.doc_id] for hit in hits]],
+            "metadatas": [[hit.metadata for hit in hits]],
+            "distances": [[1 - hit.score / top for hit in hits]],
+        }
+
+    def _fuse(self, vector: Dict[str, Any], hits: List[LexicalHit], n_results: int) -> Dict[str, Any]:
+        """Reciprocal rank fusion of the vector and BM25 rankings."""
+        documents = (vector.get("documents") or [[]])[0] or []
+        metadatas = (vector.get("metadatas") or [[]])[0] or []
+        ids = (vector.get("ids") or [[]])[0] or [f"{(m or {}).get('filename')}::{i}" for i, m in enumerate(metadatas)]
+        found: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        scores: Dict[str, float] = {}
+        for rank, (doc_id, doc, meta) in enumerate(zip(ids, documents, metadatas)):
+            found[doc_id] = (doc, meta)
+            scores[doc_id] = 1 / (RRF_K + rank + 1)
+        for rank, hit in enumerate(hits):
+            scores[hit.doc_id] = scores.get(hit.doc_id, 0.0) + 1 / (RRF_K + rank + 1)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:n_results]
+        missing = self._fetch_documents([doc_id for doc_id in best if doc_id not in found])
+        lexical_meta = {hit.doc_id: hit.metadata for hit in hits}
+        for doc_id, doc in missing.items():
+            found[doc_id] = (doc, lexical_meta[doc_id])
+        best = [doc_id for doc_id in best if doc_id in found]
+        top = scores[best[0]] if best else 1.0
+        return {
+            "ids": [best],
+            "documents": [[found[doc_id][0] for doc_id in best]],
+            "metadatas": [[found[doc_id][1] for doc_id in best]],
+            "distances": [[1 - scores[doc_id] / top for doc_id in best]],
+        }
+
+    def _fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        if not ids:
+            return {}
+        page = self.collection.get(ids=ids, include=["documents"])
+        return dict(zip(page["ids"], page["documents"]))
+
+    def _ensure_lexical(self) -> None:
+        """Indexes everything already in the collection (once per process)."""
+        if self._lexical_ready:
+            return
+        with self._lexical_lock:
+            if self._lexical_ready:
+                return
+            offset = 0
+            # Chunks learned before recall times were recorded start their clock now
+            now = time.time()
+            self._usage.clear()
+            while True:
+                page = self.collection.get(include=["documents", "metadatas"],
+                                           limit=MEMORY_BATCH_SIZE, offset=offset)
+                ids = list(page["ids"])
+                for doc_id, text, meta in zip(ids, page["documents"], page["metadatas"]):
+                    meta = meta or {}
+                    filename = meta.get("filename", doc_id.rsplit("::", 1)[0])
+                    self.lexical.add(doc_id, filename, text or "", meta)
+                    entry = self._usage.setdefault(filename, [0, 0, 0.0])
+                    entry[0] += 1
+                    entry[1] += len((text or "").encode("utf-8"))
+                    entry[2] = max(entry[2], meta.get("last_used", now), self._recalled.get(filename, 0.0))
+                if len(ids) < MEMORY_BATCH_SIZE:
+                    break
+                offset += len(ids)
+            self._lexical_ready = True
+            logger.debug(f"🔤 [MEMORY] Lexical index holds {len(self.lexical)} chunks")
+
+    def _embed_query(self, query: str) -> Any:
+        with self._cache_lock:
+            if query in self._embedding_cache:
+                self._embedding_cache.move_to_end(query)
+                self.embedding_hits += 1
+                return self._embedding_cache[query]
+            self.embedding_misses += 1
+
+        embedding = self._get_embedder()([query])[0]
+
+        with self._cache_lock:
+            self._embedding_cache[query] = embedding
+            while len(self._embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return embedding
+
+    def _get_embedder(self) -> Any:
+        if self._embedder is None:
+            self._embedder = shared_embedder()
+        return self._embedder
+
+    def _touch(self, results: Dict[str, Any]) -> None:
+        now = time.time()
+        metadatas = (results.get("metadatas") or [[]])[0] or []
+        with self._lexical_lock:
+            for meta in metadatas:
+                filename = (meta or {}).get("filename")
+                if filename:
+                    self._recalled[filename] = now
+                    if filename in self._usage:
+                        self._usage[filename][2] = now
+
+    def _save_recall_times(self) -> None:
+        """Writes pending recall times into the chunks' metadata, so LRU order survives a restart."""
+        with self._lexical_lock:
+            recalled, self._recalled = self._recalled, {}
+        filenames = list(recalled)
+        for i in range(0, len(filenames), MEMORY_BATCH_SIZE):
+            batch = filenames[i:i + MEMORY_BATCH_SIZE]
+            try:
+                page = self.collection.get(where={"filename": {"$in": batch}}, include=["metadatas"])
+                if page["ids"]:
+                    # Metadata updates are merged, so only the timestamp is sent
+                    self.collection.update(
+                        ids=list(page["ids"]),
+                        metadatas=[{"last_used": recalled[meta["filename"]]} for meta in page["metadatas"]]
+                    )
+            except Exception as e:
+                logger.error(f"⚠️ [MEMORY ERROR] Failed to save recall times: {e}")
+
+    def _totals(self) -> Tuple[int, int]:
+        with self._lexical_lock:
+            return (int(sum(entry[0] for entry in self._usage.values())),
+                    int(sum(entry[1] for entry in self._usage.values())))
+
+    @staticmethod
+    def _over_budget(chunks: int, size: int) -> bool:
+        return ((MEMORY_MAX_CHUNKS is not None and chunks > MEMORY_MAX_CHUNKS)
+                or (MEMORY_MAX_BYTES is not None and size > MEMORY_MAX_BYTES))
+
+    def _probe_queries(self, count: int) -> List[Any]:
+        # Stored embeddings make realistic queries without loading the embedding model
+        page = self.collection.get(limit=count, include=["embeddings"])
+        embeddings = page.get("embeddings")
+        return [] if embeddings is None else list(embeddings)
+
+    def _footprint(self, queries: List[Any]) -> Dict[str, Any]:
+        count = self.collection.count()
+        seconds = []
+        if queries and count:
+            n_results = min(CONTEXT_CANDIDATES, count)
+            # The first query loads the index from disk; don't time that
+            self.collection.query(query_embeddings=[queries[0]], n_results=n_results)
+            for embedding in queries:
+                started = time.perf_counter()
+                self.collection.query(query_embeddings=[embedding], n_results=n_results)
+                seconds.append(time.perf_counter() - started)
+        return {
+            "chunks": count,
+            "bytes_on_disk": _disk_usage(DB_PATH),
+            "query_ms": round(statistics.median(seconds) * 1000, 2) if seconds else 0.0,
+        }
+
+    def _rebuild(self) -> int:
+        compacted = self.collection_name + COMPACT_SUFFIX
+        if compacted in {getattr(c, "name", c) for c in self.client.list_collections()}:
+            # Left over from a compaction that never finished copying
+            self.client.delete_collection(compacted)
+        old = self.collection
+        fresh = self.client.create_collection(name=compacted, metadata=old.metadata)
+        copied = 0
+        while True:
+            page = old.get(include=["embeddings", "documents", "metadatas"],
+                           limit=MEMORY_BATCH_SIZE, offset=copied)
+            ids = list(page["ids"])
+            if ids:
+                fresh.add(ids=ids, embeddings=page["embeddings"], documents=page["documents"],
+                          metadatas=page["metadatas"])
+            copied += len(ids)
+            if len(ids) < MEMORY_BATCH_SIZE:
+                break
+        self.client.delete_collection(self.collection_name)
+        fresh.modify(name=self.collection_name)
+        self._collection = fresh
+        self._bump_generation()
+        return copied
+
+    def _vacuum(self) -> None:
+        path = os.path.join(DB_PATH, "chroma.sqlite3")
+        if not os.path.exists(path):
+            return
+        try:
+            db = sqlite3.connect(path)
+            try:
+                db.execute("VACUUM")
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ [MEMORY] Could not vacuum {path}: {e}")
+
+    def _bump_generation(self) -> None:
+        with self._cache_lock:
+            self._generation += 1
+            self._recall_cache.clear()
+
+    def _memorize_batch(self, files: Dict[str, str]) -> None:
+        chunks = {}
+        for filename, content in files.items():
+            seen: Dict[str, int] = {}
+            for c in chunk_file(filename, content):
+                # Ids follow the text, so moved sections keep their embedding; a repeated section gets
+                # its own id (::hash:2, ::hash:3...) instead of overwriting the first copy
+                seen[c.hash] = seen.get(c.hash, 0) + 1
+                suffix = f":{seen[c.hash]}" if seen[c.hash] > 1 else ""
+                chunks[f"{filename}::{c.hash}{suffix}"] = (filename, c)
+
+        where = {"filename": next(iter(files))} if len(files) == 1 else {"filename": {"$in": list(files)}}
+        existing = self.collection.get(where=where, include=["metadatas"])
+        known = dict(zip(existing["ids"], existing["metadatas"]))
+
+        new_ids = [i for i in chunks if i not in known]
+        moved_ids = [i for i in chunks if i in known and self._lines_changed(known[i], chunks[i][1])]
+        stale_ids = [i for i in known if i not in chunks]
+
+        if new_ids:
+            self.collection.upsert(
+                documents=[chunks[i][1].text for i in new_ids],
+                metadatas=[self._chunk_metadata(*chunks[i]) for i in new_ids],
+                ids=new_ids
+            )
+        if moved_ids:
+            # Same text at new line numbers: refresh metadata without re-embedding
+            self.collection.update(
+                ids=moved_ids,
+                metadatas=[self._chunk_metadata(*chunks[i]) for i in moved_ids]
+            )
+        if stale_ids:
+            self.collection.delete(ids=stale_ids)
+        now = time.time()
+        usage: Dict[str, List[float]] = {}
+        for filename, c in chunks.values():
+            entry = usage.setdefault(filename, [0, 0, now])
+            entry[0] += 1
+            entry[1] += len(c.text.encode("utf-8"))
+        with self._lexical_lock:
+            for filename in files:
+                if filename in usage:
+                    self._usage[filename] = usage[filename]
+                else:
+                    self._usage.pop(filename, None)
+            for i in new_ids:
+                self.lexical.add(i, chunks[i][0], chunks[i][1].text, self._chunk_metadata(*chunks[i]))
+            for i in moved_ids:
+                self.lexical.update_metadata(i, self._chunk_metadata(*chunks[i]))
+            for i in stale_ids:
+                self.lexical.remove(i)
+        if new_ids or moved_ids or stale_ids:
+            self._bump_generation()
+
+        what = f"'{next(iter(files))}'" if len(files) == 1 else f"{len(files)} files"
+        logger.info(f"✅ [MEMORY] Learned contents of {what} "
+                    f"({len(new_ids)} new, {len(stale_ids)} removed, {len(chunks) - len(new_ids)} unchanged chunks)")
+
+    def _chunk_metadata(self, filename: str, chunk) -> Dict[str, Any]:
+        return {
+            "filename": filename,
+            "start_line": chunk.start_line,
+            "end_line": chunk.end_line,
+            "last_used": time.time(),
+        }
+
+    def _lines_changed(self, metadata: Optional[Dict[str, Any]], chunk) -> bool:
+        metadata = metadata or {}
+        return metadata.get("start_line") != chunk.start_line or metadata.get("end_line") != chunk.end_line
+
+def _disk_usage(path: str) -> int:
+    total = 0
+    for folder, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                continue
+    return total
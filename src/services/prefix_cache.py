@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from src.core.config import (
+    PREFIX_CACHE_ENABLED, PREFIX_CACHE_MIN_TOKENS, PREFIX_CACHE_MIN_USES, PREFIX_CACHE_TTL, PREFIX_CACHE_MAX_ENTRIES
+)
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.utils.tokens import estimate_tokens
+
+def supports_prefix_cache(model: Any) -> bool:
+    """Models that can cache a prefix expose cache_prefix(prefix, ttl) and accept generate_content(..., cached_prefix=handle)."""
+    return callable(getattr(type(model), "cache_prefix", None))
+
+class ContextCache:
+    """Provider-side handles for prompt prefixes that keep coming back.
+
+    A prefix gets a handle the `min_uses`-th time it is seen within `ttl`
+    (one-off prefixes would only pay for storage) and only if it is at least
+    `min_tokens` long. While the handle is alive, requests send just their
+    suffix. Handles are dropped shortly before they expire, when evicted, or
+    when the provider rejects them; callers then send the full prompt.
+    """
+
+    def __init__(self, enabled: bool = PREFIX_CACHE_ENABLED, min_tokens: int = PREFIX_CACHE_MIN_TOKENS,
+                 min_uses: int = PREFIX_CACHE_MIN_USES, ttl: float = PREFIX_CACHE_TTL,
+                 max_entries: int = PREFIX_CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic) -> None:
+        self.enabled = enabled
+        self.min_tokens = min_tokens
+        self.min_uses = max(1, min_uses)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._handles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # key -> handle, expires, tokens
+        self._sightings: "OrderedDict[str, list]" = OrderedDict()             # key -> [count, first seen]
+        self.hits = 0
+        self.created = 0
+        self.failures = 0
+        self.saved_tokens = 0
+
+    def handle_for(self, model: Any, prefix: str) -> Optional[Any]:
+        """A live handle for prefix on this model, creating one if the prefix has earned it."""
+        if not self.enabled or not prefix or not supports_prefix_cache(model):
+            return None
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            return None
+        key = self._key(model, prefix)
+        now = self._clock()
+        with self._lock:
+            entry = self._handles.get(key)
+            # A little slack so a handle never expires mid-request
+            if entry and entry["expires"] - now > self.ttl * 0.1:
+                self._handles.move_to_end(key)
+                self.hits += 1
+                self.saved_tokens += entry["tokens"]
+                metrics.inc("prefix_cache_hits")
+                metrics.inc("prefix_cache_tokens_saved", entry["tokens"])
+                return entry["handle"]
+            # A prefix whose handle just ran out is clearly still in use
+            expired = self._handles.pop(key, None) is not None
+            if not expired and not self._seen_enough(key, now):
+                return None
+
+        # Creating a handle is a network round trip; done outside the lock
+        try:
+            handle = model.cache_prefix(prefix, self.ttl)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.debug(f"Could not cache prompt prefix ({tokens} tokens): {e}")
+            return None
+        with self._lock:
+            self._handles[key] = {"handle": handle, "expires": now + self.ttl, "tokens": tokens}
+            self._sightings.pop(key, None)
+            while len(self._handles) > self.max_entries:
+                self._handles.popitem(last=False)
+            self.created += 1
+        metrics.inc("prefix_cache_created")
+        logger.info(f"   🧊 [PREFIX CACHE] Cached a {tokens}-token prompt prefix for {self.ttl:.0f}s")
+        return handle
+
+    def invalidate(self, model: Any, prefix: str) -> None:
+        """Stops using a handle the provider rejected; the next request for the prefix gets a new one."""
+        key = self._key(model, prefix)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry:
+                entry["expires"] = float("-inf")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "handles": len(self._handles),
+                "hits": self.hits,
+                "created": self.created,
+                "failures": self.failures,
+                "saved_tokens": self.saved_tokens,
+            }
+
+    def _key(self, model: Any, prefix: str) -> str:
+        # A handle belongs to the model it was created on
+        return hashlib.sha256(f"{getattr(model, 'name', '')}|{prefix}".encode("utf-8")).hexdigest()
+
+    def _seen_enough(self, key: str, now: float) -> bool:
+        sighting = self._sightings.get(key)
+        if sighting is None or now - sighting[1] > self.ttl:
+            sighting = self._sightings[key] = [0, now]
+        sighting[0] += 1
+        self._sightings.move_to_end(key)
+        while len(self._sightings) > self.max_entries * 8:
+            self._sightings.popitem(last=False)
+        return sighting[0] >= self.min_uses
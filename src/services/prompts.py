@@ -1,4 +1,5 @@
 # src/prompts.py
+from typing import NamedTuple
 
 # 🎭 SYSTEM PERSONAS
 # Maps file extensions to specific AI roles
@@ -17,23 +18,37 @@ DEFAULT_PERSONA = "You are a helpful AI assistant."
 
 # 📝 TASK TEMPLATES
 
+# Each template is a stable PREFIX (persona, rules, shared context), which
+# related requests repeat word for word and providers can cache, followed by
+# a per-request SUFFIX. TEMPLATE = PREFIX + SUFFIX is the full prompt.
+
+class Prompt(NamedTuple):
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
 # 1. Generation (Creating new files)
-GENERATE_TEMPLATE = """
+GENERATE_PREFIX = """
 {system_instruction}
 --------------------------------------------------
 CONTEXT (Background Information):
 {context_str}
 --------------------------------------------------
-TASK: Write the code for a file named '{filename}'.
+"""
+GENERATE_SUFFIX = """TASK: Write the code for a file named '{filename}'.
 INSTRUCTIONS:
 1. Use the variables/data from the CONTEXT above if relevant.
 2. You MUST write valid {file_ext} code. Do NOT just copy the context text.
 3. Example: If context says 'Port: 80', your Python code should be 'PORT = 80'.
 4. Output ONLY the code. No markdown formatting (no ```).
 """
+GENERATE_TEMPLATE = GENERATE_PREFIX + GENERATE_SUFFIX
 
 # 2. Refactoring (Editing existing files)
-REFACTOR_TEMPLATE = """
+REFACTOR_PREFIX = """
 {system_instruction}
 --------------------------------------------------
 TASK: The user wants to modify the file '{filename}'.
@@ -43,15 +58,60 @@ TASK: The user wants to modify the file '{filename}'.
 4. REMOVE the user's instruction comment from the final output.
 5. Output ONLY the code. No markdown.
 --------------------------------------------------
-CURRENT CONTENT:
+"""
+# The file name stays in the edit prefixes: they are far below PREFIX_CACHE_MIN_TOKENS
+# either way, and this keeps the prompts the model sees unchanged
+EDIT_SUFFIX = """CURRENT CONTENT:
 {current_content}
 --------------------------------------------------
 USER INSTRUCTIONS:
 {instructions}
 """
+REFACTOR_TEMPLATE = REFACTOR_PREFIX + EDIT_SUFFIX
+
+# 2b. Patching (Editing existing files with search/replace edits instead of a full rewrite)
+PATCH_PREFIX = """
+{system_instruction}
+--------------------------------------------------
+TASK: The user wants to modify the file '{filename}'.
+1. Read the CURRENT CONTENT below.
+2. Follow the USER INSTRUCTIONS at the bottom.
+3. Do NOT rewrite the file. Answer ONLY with SEARCH/REPLACE blocks like this:
+<<<<<<< SEARCH
+lines copied exactly from the current content
+=======
+the new version of those lines
+>>>>>>> REPLACE
+4. Each SEARCH must be copied character for character and match only one place.
+   Include a few unchanged lines around the change if needed to make it unique.
+5. Use one block per separate change, in file order. An empty REPLACE deletes the lines.
+6. Add a block that REMOVES the user's instruction comment.
+7. No explanations and no markdown.
+--------------------------------------------------
+"""
+PATCH_TEMPLATE = PATCH_PREFIX + EDIT_SUFFIX
+
+# 2c. Planning (Scaffolding a whole project)
+PLAN_TEMPLATE = """
+You are a Software Architect. Plan the files of a small, complete project.
+--------------------------------------------------
+CONTEXT (Background Information):
+{context_str}
+--------------------------------------------------
+PROJECT: {project}
+DESCRIPTION:
+{description}
+--------------------------------------------------
+INSTRUCTIONS:
+1. List every file the project needs (at most {max_files}), using only these extensions: {extensions}.
+2. Paths are relative to the project folder and use '/' (e.g. 'models/user.py').
+3. In "depends_on", list the files of this plan that the file imports or relies on.
+4. Output ONLY JSON. No markdown:
+{{"files": [{{"path": "config.py", "purpose": "One sentence.", "depends_on": []}}]}}
+"""
 
 # 3. Visualization (Mermaid Diagrams)
-VISUALIZE_TEMPLATE = """
+VISUALIZE_PREFIX = """
 You are a Systems Architect. Your goal is to visualize code logic.
 --------------------------------------------------
 TASK: Analyze the code below and generate a Mermaid.js diagram.
@@ -63,6 +123,8 @@ INSTRUCTIONS:
 3. Keep it simple and high-level (show relationships, not every line of code).
 4. Output ONLY the mermaid code. No markdown blocks.
 --------------------------------------------------
-CODE TO ANALYZE ({target_filename}):
+"""
+VISUALIZE_SUFFIX = """CODE TO ANALYZE ({target_filename}):
 {code_content}
-"""
\ No newline at end of file
+"""
+VISUALIZE_TEMPLATE = VISUALIZE_PREFIX + VISUALIZE_SUFFIX
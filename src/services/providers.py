@@ -0,0 +1,219 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+from src.core.config import (
+    HEDGE_ENABLED, HEDGE_MIN_DELAY, PROVIDER_ERROR_PENALTY, PROVIDER_MIN_SAMPLES, PROVIDER_WINDOW
+)
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.services.rate_limiter import is_rate_limit_error
+
+T = TypeVar("T")
+
+class Backend:
+    """One model endpoint plus a rolling window of its recent latencies and errors.
+
+    `factory` returns the model object (anything with generate_content); it is
+    called for every request so a lazily created or swapped model is picked up.
+    Light backends serve small tasks such as diagrams.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], light: bool = False,
+                 window: int = PROVIDER_WINDOW) -> None:
+        self.name = name
+        self.factory = factory
+        self.light = light
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.hedge_wins = 0
+
+    def model(self) -> Any:
+        return self.factory()
+
+    def record(self, seconds: Optional[float], ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self._outcomes.append(ok)
+            if ok and seconds is not None:
+                self._latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def latency(self, q: float) -> Optional[float]:
+        """The q-quantile of recent successful call times, once there are enough of them."""
+        with self._lock:
+            if len(self._latencies) < PROVIDER_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def score(self) -> float:
+        """Expected cost of a call (lower is better). Unmeasured backends keep their configured place at the back."""
+        p50 = self.latency(0.5)
+        if p50 is None:
+            return float("inf")
+        return p50 * (1 + PROVIDER_ERROR_PENALTY * self.error_rate())
+
+    def stats(self) -> Dict[str, float]:
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "hedge_wins": self.hedge_wins,
+            "p50_seconds": round(p50, 3) if p50 is not None else 0.0,
+            "p95_seconds": round(p95, 3) if p95 is not None else 0.0,
+        }
+
+class ProviderPool:
+    """Routes model calls to the backend that has lately been fastest and most reliable.
+
+    A failed call moves on to the next backend. With hedging, a call still
+    running after the primary's p95 latency is raced against the next-best
+    backend; the first good answer wins and the other is abandoned
+    (its answer, when it comes, is dropped). Streams are not hedged, since
+    part of the answer may already be in the file.
+    """
+
+    def __init__(self, backends: List[Backend], hedging: bool = HEDGE_ENABLED,
+                 min_hedge_delay: float = HEDGE_MIN_DELAY) -> None:
+        if not backends:
+            raise ValueError("ProviderPool needs at least one backend")
+        self.backends = backends
+        self.hedging = hedging
+        self.min_hedge_delay = min_hedge_delay
+        self.hedged = 0
+        # Which backend answered each thread's latest call (the winner is always picked on the caller's thread)
+        self._local = threading.local()
+
+    def ranked(self, light: bool = False) -> List[Backend]:
+        """Backends best first. Light tasks try the light backends first; other tasks never use them."""
+        normal = sorted((b for b in self.backends if not b.light), key=lambda b: b.score())
+        if not light:
+            return normal
+        return sorted((b for b in self.backends if b.light), key=lambda b: b.score()) + normal
+
+    def served_by(self) -> Optional[str]:
+        """Name of the backend that answered this thread's latest call or stream."""
+        return getattr(self._local, "backend", None)
+
+    def call(self, fn: Callable[[Any], T], light: bool = False,
+             can_hedge: Callable[[], bool] = lambda: True) -> T:
+        """fn(model) on the best backend, falling back (or hedging) to the others."""
+        order = self.ranked(light)
+        hedge_to = self._hedge_partner(order)
+        delay = self._hedge_delay(order[0]) if hedge_to else None
+        if delay is None:
+            return self._sequential(fn, order)
+        return self._hedged(fn, order, hedge_to, delay, can_hedge)
+
+    def open_stream(self, fn: Callable[[Any], Any], light: bool = False) -> Any:
+        """fn(model) must return an iterable of chunks; moves on to the next backend until one yields."""
+        errors: List[Exception] = []
+        for backend in self.ranked(light):
+            started = time.perf_counter()
+            try:
+                chunks = iter(fn(backend.model()))
+                first = next(chunks, None)
+            except Exception as e:
+                backend.record(None, False)
+                errors.append(e)
+                logger.debug(f"Backend {backend.name} failed to stream: {e}")
+                continue
+            backend.record(time.perf_counter() - started, True)
+            self._local.backend = backend.name
+            return _prepend(first, chunks)
+        raise _pick_error(errors)
+
+    def stats(self) -> Dict[str, float]:
+        stats: Dict[str, float] = {"hedged": self.hedged}
+        for backend in self.backends:
+            for key, value in backend.stats().items():
+                stats[f"{backend.name}_{key}".replace("-", "_").replace(".", "_")] = value
+        return stats
+
+    def _hedge_partner(self, order: List[Backend]) -> Optional[Backend]:
+        return order[1] if self.hedging and len(order) > 1 else None
+
+    def _hedge_delay(self, backend: Backend) -> Optional[float]:
+        p95 = backend.latency(0.95)
+        return None if p95 is None else max(self.min_hedge_delay, p95)
+
+    def _sequential(self, fn: Callable[[Any], T], order: List[Backend]) -> T:
+        errors: List[Exception] = []
+        for backend in order:
+            ok, value = self._run(fn, backend)
+            if ok:
+                self._local.backend = backend.name
+                return value
+            errors.append(value)
+        raise _pick_error(errors)
+
+    def _hedged(self, fn: Callable[[Any], T], order: List[Backend], hedge_to: Backend,
+                delay: float, can_hedge: Callable[[], bool]) -> T:
+        results: "queue.Queue[Tuple[Backend, bool, Any]]" = queue.Queue()
+        untried = [b for b in order if b is not order[0]]
+
+        def launch(backend: Backend) -> None:
+            if backend in untried:
+                untried.remove(backend)
+            # Daemon: an abandoned call must not keep the process alive
+            threading.Thread(target=lambda: results.put((backend,) + self._run(fn, backend)),
+                             name=f"pythia-provider-{backend.name}", daemon=True).start()
+
+        launch(order[0])
+        pending = 1
+        errors: List[Exception] = []
+        try:
+            first = results.get(timeout=delay)
+        except queue.Empty:
+            first = None
+            if can_hedge():
+                self.hedged += 1
+                metrics.inc("hedged_requests")
+                logger.info(f"   🏁 [HEDGE] {order[0].name} is slower than {delay:.1f}s, racing {hedge_to.name}")
+                launch(hedge_to)
+                pending += 1
+
+        while pending:
+            backend, ok, value = first if first is not None else results.get()
+            first = None
+            pending -= 1
+            if ok:
+                if backend is not order[0]:
+                    backend.hedge_wins += 1
+                self._local.backend = backend.name
+                return value
+            errors.append(value)
+            if not pending and untried:
+                launch(untried[0])
+                pending += 1
+        raise _pick_error(errors)
+
+    def _run(self, fn: Callable[[Any], T], backend: Backend) -> Tuple[bool, Any]:
+        started = time.perf_counter()
+        try:
+            value = fn(backend.model())
+        except Exception as e:
+            backend.record(None, False)
+            logger.debug(f"Backend {backend.name} failed: {e}")
+            return False, e
+        backend.record(time.perf_counter() - started, True)
+        return True, value
+
+def _pick_error(errors: List[Exception]) -> Exception:
+    # A 429 anywhere means "back off and retry", which the caller knows how to do
+    return next((e for e in errors if is_rate_limit_error(e)), errors[0])
+
+def _prepend(first: Any, chunks: Any) -> Any:
+    if first is not None:
+        yield first
+    yield from chunks
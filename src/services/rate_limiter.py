@@ -0,0 +1,136 @@
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+from src.core.config import (
+    RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_MAX_WAIT, RETRY_DELAY_BASE, RETRY_DELAY_MAX
+)
+from src.core.logger import logger
+
+_RETRY_HINTS = [
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry[- ]after:?\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry in\s*(\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+class RateLimitDeferred(Exception):
+    """Raised instead of sleeping when the budget will not free up soon enough."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Rate limit budget exhausted, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return (
+        getattr(error, "code", None) == 429
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+        or "429" in str(error)
+    )
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Pulls a server retry hint out of an API error, if it carries one."""
+    hint = getattr(error, "retry_after", None)
+    if hint is not None:
+        return float(hint)
+    message = str(error)
+    for pattern in _RETRY_HINTS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `capacity` per minute."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self._clock = clock
+        self._stamp = clock()
+
+    def refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount: float) -> float:
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        # May go negative: the debt is what makes later callers wait their turn
+        self.level -= min(amount, self.capacity)
+
+class RateLimiter:
+    """Process-wide request and token budget shared by every Brain call."""
+
+    def __init__(self, rpm: float = RATE_LIMIT_RPM, tpm: float = RATE_LIMIT_TPM,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None) -> None:
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm, clock)
+        self._tokens = TokenBucket(tpm, clock)
+        self._blocked_until = 0.0
+        self.granted = 0
+        self.deferred = 0
+        self.waited = 0.0
+        self.throttled = 0
+
+    def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> None:
+        """Reserves one request and `tokens` tokens, waiting at most `max_wait` seconds.
+
+        Raises RateLimitDeferred (without waiting) when the budget would take
+        longer than that to free up.
+        """
+        limit = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            self._requests.refill()
+            self._tokens.refill()
+            wait = max(
+                self._blocked_until - self._clock(),
+                self._requests.wait_time(1),
+                self._tokens.wait_time(tokens),
+            )
+            if wait > limit:
+                self.deferred += 1
+                raise RateLimitDeferred(wait)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self.granted += 1
+            self.waited += max(0.0, wait)
+
+        if wait > 0:
+            self._sleep(wait)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based) after a 429."""
+        if retry_after is not None:
+            # The server knows best; add a little jitter so callers don't stampede
+            return retry_after * (1 + 0.1 * self._rng.random())
+        ceiling = min(RETRY_DELAY_MAX, RETRY_DELAY_BASE * (2 ** attempt))
+        return ceiling * (0.5 + 0.5 * self._rng.random())
+
+    def penalize(self, delay: float) -> None:
+        """Blocks every caller for `delay` seconds after the server pushed back."""
+        with self._lock:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+        logger.warning(f"   ⏳ Rate limit. All Brain calls paused for {delay:.1f}s")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "granted": self.granted,
+                "deferred": self.deferred,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited, 3),
+            }
+
+# Create the singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.core.config import RECONCILE_WORKERS, RECONCILE_PROGRESS_EVERY
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.services.memory import MemoryEngine
+from src.utils.file_ops import hash_file, read_text
+from src.utils.manifest import Manifest
+from src.utils.paths import walk_workspace
+
+class WorkspaceReconciler:
+    """Brings memory in line with the workspace (the whole tree) after a restart.
+
+    Files whose size and mtime match the manifest are skipped without being
+    read; the rest are hashed in parallel and only real content changes are
+    memorized. Files that disappeared are forgotten.
+    """
+
+    def __init__(self, root: str, memory: MemoryEngine, manifest: Manifest,
+                 workers: int = RECONCILE_WORKERS) -> None:
+        self.root = root
+        self.memory = memory
+        self.manifest = manifest
+        self.workers = workers
+        self.stats: Dict[str, float] = {}
+        self.done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> threading.Thread:
+        """Runs the scan on a background thread so the watcher can serve events meanwhile."""
+        self._thread = threading.Thread(target=self.run, name="pythia-reconciler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self) -> Dict[str, float]:
+        started = time.perf_counter()
+        logger.info(f"🔎 [RECONCILE] Scanning {self.root}...")
+        try:
+            # What we knew before scanning: only these may be forgotten, so files the watcher
+            # learns while the scan runs are never mistaken for deleted ones
+            known = {key: self.manifest.get(key) for key in self.manifest.keys()}
+            on_disk = self._scan()
+            candidates = [(key, path) for key, (path, size, mtime_ns) in on_disk.items()
+                          if not self._stat_matches(key, size, mtime_ns)]
+            learned, vanished = self._learn(candidates)
+            # Deleted or renamed between the scan and hashing: gone, like files never seen
+            for key in vanished:
+                on_disk.pop(key)
+            removed = [key for key, entry in known.items()
+                       if key not in on_disk and self.manifest.get(key) == entry
+                       and not os.path.exists(os.path.join(self.root, *key.split("/")))]
+            if removed:
+                self.memory.forget_many(removed)
+                for key in removed:
+                    self.manifest.remove(key)
+            self.manifest.save()
+            metrics.record("reconcile", time.perf_counter() - started)
+
+            self.stats = {
+                "files": len(on_disk),
+                "candidates": len(candidates),
+                "learned": learned,
+                "forgotten": len(removed),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            logger.info(f"✅ [RECONCILE] {self.stats['files']} files in {self.stats['seconds']}s: "
+                        f"{learned} learned, {len(removed)} forgotten, {len(on_disk) - learned} unchanged")
+        except Exception as e:
+            logger.error(f"❌ [RECONCILE] Startup scan failed: {e}")
+        finally:
+            self.done.set()
+        return self.stats
+
+    def _scan(self) -> Dict[str, Tuple[str, int, int]]:
+        found = {}
+        for key, entry in walk_workspace(self.root):
+            try:
+                stat = entry.stat()
+            except OSError:
+                # Deleted between listing and stat: not on disk
+                continue
+            found[key] = (entry.path, stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def _stat_matches(self, key: str, size: int, mtime_ns: int) -> bool:
+        entry = self.manifest.get(key)
+        return bool(entry) and entry["size"] == size and entry["mtime_ns"] == mtime_ns
+
+    def _learn(self, candidates: List[Tuple[str, str]]) -> Tuple[int, List[str]]:
+        """Memorizes the candidates whose content changed; returns that count and the ones that vanished."""
+        if not candidates:
+            return 0, []
+        before = {key: self.manifest.get(key) for key, _ in candidates}
+        changed: Dict[str, str] = {}
+        entries = {}
+        vanished: List[str] = []
+
+        def inspect(item: Tuple[str, str]):
+            key, path = item
+            try:
+                stat = os.stat(path)
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ino": stat.st_ino,
+                         "hash": hash_file(path)}
+                # Only the mtime moved (e.g. touched or copied): nothing to re-read or re-learn
+                content = read_text(path) if entry["hash"] != self.manifest.hash_of(key) else ""
+            except OSError:
+                # One missing file must not abort the whole scan
+                return key, None, None
+            return key, content, entry
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for done, (key, content, entry) in enumerate(pool.map(inspect, candidates), 1):
+                if entry is None:
+                    vanished.append(key)
+                    continue
+                entries[key] = entry
+                if content.strip():
+                    changed[key] = content
+                if done % RECONCILE_PROGRESS_EVERY == 0:
+                    logger.info(f"🔎 [RECONCILE] {done}/{len(candidates)} changed candidates hashed")
+
+        # The watcher may have handled some of these files while we were hashing
+        changed = {key: content for key, content in changed.items() if self.manifest.get(key) == before[key]}
+        if changed:
+            self.memory.memorize_many(changed)
+        for key, entry in entries.items():
+            if self.manifest.get(key) == before[key]:
+                self.manifest.set(key, entry)
+        return len(changed), vanished
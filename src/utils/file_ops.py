@@ -1,11 +1,43 @@
 import os
 import hashlib
+import time
+import zlib
+from typing import Iterable, Optional
+from src.core.config import VALID_EXTENSIONS, HASH_BLOCK_SIZE
 from src.core.logger import logger
 
+def is_tracked_file(filename: str) -> bool:
+    """True for files the Oracle should react to (right extension, not hidden/temporary)."""
+    if filename.startswith((".", "~")) or "New Text Document" in filename:
+        return False
+    _, ext = os.path.splitext(filename)
+    return ext.lower() in VALID_EXTENSIONS
+
+def read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
 def get_file_hash(content: str) -> str:
     """Generates a hash to prevent infinite loops."""
     return hashlib.md5(content.encode('utf-8')).hexdigest()
 
+def hash_file(file_path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """Fast, non-cryptographic fingerprint of a file's bytes, read in blocks.
+
+    CRC32 and Adler-32 (both C-speed in zlib) plus the length: plenty to tell
+    "did this file change?" and far cheaper than reading and MD5-ing text.
+    """
+    crc, adler, size = 0, 1, 0
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            crc = zlib.crc32(block, crc)
+            adler = zlib.adler32(block, adler)
+            size += len(block)
+    return f"{size:x}-{crc:08x}{adler:08x}"
+
 def write_safe(file_path: str, content: str) -> None:
     """Writes to file safely and logs the action."""
     try:
@@ -14,6 +46,65 @@ def write_safe(file_path: str, content: str) -> None:
     except Exception as e:
         logger.error(f"🛑 Write Error: {e}")
 
+def write_atomic(file_path: str, content: str) -> None:
+    """Writes to a hidden temp file next to the target, then swaps it in."""
+    tmp_path = _temp_path(file_path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        logger.error(f"🛑 Write Error: {e}")
+        _discard(tmp_path)
+
+def write_stream(file_path: str, chunks: Iterable[str], atomic: bool = False,
+                 original: Optional[str] = None) -> str:
+    """Writes chunks as they arrive and returns the full text.
+
+    In-place mode flushes every chunk so editors see output immediately; atomic
+    mode streams into a temp file and swaps it in at the end. The target is not
+    touched until the first chunk arrives. If the stream fails after that, an
+    in-place write puts `original` back instead of leaving half an answer.
+    """
+    target = _temp_path(file_path) if atomic else file_path
+    parts = []
+    started = time.perf_counter()
+    f = None
+    try:
+        for chunk in chunks:
+            if f is None:
+                f = open(target, "w", encoding="utf-8")
+                logger.debug(f"⚡ First bytes for {os.path.basename(file_path)} after {(time.perf_counter() - started) * 1000:.0f}ms")
+            f.write(chunk)
+            f.flush()
+            parts.append(chunk)
+        if f is None:
+            f = open(target, "w", encoding="utf-8")
+        f.close()
+        if atomic:
+            os.replace(target, file_path)
+    except BaseException:
+        if f is not None:
+            f.close()
+        if atomic:
+            _discard(target)
+        elif f is not None and original is not None:
+            logger.warning(f"⏪ Stream into {os.path.basename(file_path)} failed partway, original text restored")
+            write_safe(file_path, original)
+        raise
+    return "".join(parts)
+
+def _temp_path(file_path: str) -> str:
+    # Leading dot: the handler ignores hidden files, so temp files never trigger it
+    folder, name = os.path.split(file_path)
+    return os.path.join(folder, f".{name}.pythia-tmp")
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 def ensure_workspace(folder_path: str) -> None:
     """Self-healing: Creates the target folder if it's missing."""
     if not os.path.exists(folder_path):
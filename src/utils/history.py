@@ -1,49 +1,230 @@
+import hashlib
+import json
 import os
-import shutil
+import re
+import threading
 import time
+import zlib
 from datetime import datetime
-from typing import List
-from src.core.config import BACKUP_FOLDER
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+from src.core.config import (
+    BACKUP_FOLDER, HISTORY_MAX_VERSIONS, HISTORY_MAX_AGE_DAYS, HISTORY_MAX_BYTES, HISTORY_GC_EVERY
+)
 from src.core.logger import logger
 from src.utils.file_ops import write_safe
 
-def create_backup(file_path: str) -> None:
+_LEGACY_BACKUP = re.compile(r"^(?P<name>.+)_(?P<stamp>\d{8}_\d{6})\.bak$")
+
+class HistoryStore:
+    """Content-addressed version store behind BACKUP and ROLLBACK.
+
+    Layout inside the history folder:
+      objects/ab/abcdef...   zlib-compressed file versions, keyed by SHA-256
+      index/<file>.json      that file's versions, oldest first
+
+    Identical versions are stored once, the latest version is the last index
+    entry, and retention trims by count, age and total bytes.
+    """
+
+    def __init__(self, history_dir: str, max_versions: int = HISTORY_MAX_VERSIONS,
+                 max_age_days: float = HISTORY_MAX_AGE_DAYS, max_bytes: int = HISTORY_MAX_BYTES) -> None:
+        self.history_dir = history_dir
+        self.max_versions = max_versions
+        self.max_age_ns = int(max_age_days * 86400 * 1e9)
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._saves = 0
+        os.makedirs(self._objects_dir(), exist_ok=True)
+        os.makedirs(self._index_dir(), exist_ok=True)
+        self.migrate_legacy()
+
+    # --- Public API ------------------------------------------------------
+
+    def save(self, file_path: str, key: str) -> Optional[str]:
+        """Stores the current content of file_path as the newest version of key."""
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return self.save_bytes(key, data)
+
+    def save_bytes(self, key: str, data: bytes, timestamp_ns: Optional[int] = None) -> Optional[str]:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            versions = self.versions(key)
+            if versions and versions[-1]["hash"] == digest:
+                return None
+            self._write_object(digest, data)
+            versions.append({"hash": digest, "ts": timestamp_ns or time.time_ns(), "size": len(data)})
+            versions.sort(key=lambda v: v["ts"])
+            self._write_index(key, self._apply_retention(versions))
+            self._saves += 1
+            if self._saves % HISTORY_GC_EVERY == 0:
+                self.gc()
+        return digest
+
+    def versions(self, key: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._index_file(key), "r", encoding="utf-8") as f:
+                return json.load(f)["versions"]
+        except FileNotFoundError:
+            return []
+
+    def latest(self, key: str, steps: int = 1) -> Optional[Dict[str, Any]]:
+        """The version `steps` back from the newest (1 = newest)."""
+        versions = self.versions(key)
+        if steps < 1 or steps > len(versions):
+            return None
+        return versions[-steps]
+
+    def load(self, digest: str) -> bytes:
+        with open(self._object_file(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def gc(self) -> Dict[str, int]:
+        """Applies the byte budget across all files and deletes unreferenced objects."""
+        with self._lock:
+            indexes = {name: self._read_index_file(name)
+                       for name in os.listdir(self._index_dir()) if name.endswith(".json")}
+            sizes = self._object_sizes()
+            referenced = {v["hash"] for versions in indexes.values() for v in versions}
+            total = sum(size for digest, size in sizes.items() if digest in referenced)
+
+            # Oldest versions go first, but every file keeps at least its newest one
+            candidates = sorted(
+                (v["ts"], name, v) for name, versions in indexes.items() for v in versions[:-1]
+            )
+            dropped = 0
+            for _, name, version in candidates:
+                if total <= self.max_bytes:
+                    break
+                indexes[name].remove(version)
+                dropped += 1
+                if not any(v["hash"] == version["hash"] for vs in indexes.values() for v in vs):
+                    total -= sizes.get(version["hash"], 0)
+            if dropped:
+                for name, versions in indexes.items():
+                    self._write_json(os.path.join(self._index_dir(), name), versions)
+
+            referenced = {v["hash"] for versions in indexes.values() for v in versions}
+            removed = 0
+            for digest in sizes:
+                if digest not in referenced:
+                    os.remove(self._object_file(digest))
+                    removed += 1
+            return {"versions_dropped": dropped, "objects_removed": removed, "bytes": total}
+
+    def migrate_legacy(self) -> int:
+        """Imports old `<file>_<timestamp>.bak` full copies, then deletes them."""
+        legacy = []
+        for name in os.listdir(self.history_dir):
+            match = _LEGACY_BACKUP.match(name)
+            if match:
+                stamp = datetime.strptime(match.group("stamp"), "%Y%m%d_%H%M%S")
+                legacy.append((stamp, name, match.group("name")))
+        for seq, (stamp, name, key) in enumerate(sorted(legacy)):
+            path = os.path.join(self.history_dir, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            # Legacy stamps only have second resolution; seq keeps same-second copies ordered
+            self.save_bytes(key, data, timestamp_ns=int(stamp.timestamp() * 1e9) + seq)
+            os.remove(path)
+        if legacy:
+            logger.info(f"   📦 [HISTORY] Migrated {len(legacy)} legacy backups into the version store")
+            self.gc()
+        return len(legacy)
+
+    # --- Internals -------------------------------------------------------
+
+    def _apply_retention(self, versions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        cutoff = time.time_ns() - self.max_age_ns
+        newest = versions[-1]
+        kept = [v for v in versions[:-1] if v["ts"] >= cutoff] + [newest]
+        return kept[-self.max_versions:]
+
+    def _objects_dir(self) -> str:
+        return os.path.join(self.history_dir, "objects")
+
+    def _index_dir(self) -> str:
+        return os.path.join(self.history_dir, "index")
+
+    def _object_file(self, digest: str) -> str:
+        return os.path.join(self._objects_dir(), digest[:2], digest)
+
+    def _index_file(self, key: str) -> str:
+        return os.path.join(self._index_dir(), quote(key, safe="") + ".json")
+
+    def _write_object(self, digest: str, data: bytes) -> None:
+        path = self._object_file(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(tmp_path, path)
+
+    def _write_index(self, key: str, versions: List[Dict[str, Any]]) -> None:
+        self._write_json(self._index_file(key), versions)
+
+    def _write_json(self, path: str, versions: List[Dict[str, Any]]) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"versions": versions}, f)
+        os.replace(tmp_path, path)
+
+    def _read_index_file(self, name: str) -> List[Dict[str, Any]]:
+        with open(os.path.join(self._index_dir(), name), "r", encoding="utf-8") as f:
+            return json.load(f)["versions"]
+
+    def _object_sizes(self) -> Dict[str, int]:
+        sizes = {}
+        for bucket in os.scandir(self._objects_dir()):
+            if bucket.is_dir():
+                for item in os.scandir(bucket.path):
+                    if not item.name.endswith(".tmp"):
+                        sizes[item.name] = item.stat().st_size
+        return sizes
+
+_stores: Dict[str, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(folder: str) -> HistoryStore:
+    """One shared store per workspace folder."""
+    history_dir = os.path.join(folder, BACKUP_FOLDER)
+    with _stores_lock:
+        if history_dir not in _stores:
+            _stores[history_dir] = HistoryStore(history_dir)
+        return _stores[history_dir]
+
+def create_backup(file_path: str, key: Optional[str] = None, root: Optional[str] = None) -> None:
+    """Saves a version of file_path under `key` in the store of workspace `root`.
+
+    Defaults to the file name and the file's own folder.
+    """
     try:
-        folder = os.path.dirname(file_path)
-        history_dir = os.path.join(folder, BACKUP_FOLDER)
-        if not os.path.exists(history_dir):
-            os.makedirs(history_dir)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.basename(file_path)
-        backup_name = f"{filename}_{timestamp}.bak"
-        shutil.copy2(file_path, os.path.join(history_dir, backup_name))
-        logger.info(f"   🛡️ [BACKUP] Saved to {BACKUP_FOLDER}/{backup_name}")
+        key = key or os.path.basename(file_path)
+        digest = get_store(root or os.path.dirname(file_path)).save(file_path, key)
+        if digest:
+            logger.info(f"   🛡️ [BACKUP] Saved {key} as version {digest[:8]}")
     except Exception as e:
         logger.warning(f"   ⚠️ Backup failed: {e}")
 
-def perform_rollback(file_path: str, filename: str) -> None:
+def perform_rollback(file_path: str, filename: str, steps: int = 1, root: Optional[str] = None) -> None:
     try:
-        folder = os.path.dirname(file_path)
-        history_dir = os.path.join(folder, BACKUP_FOLDER)
-        
-        backups = [f for f in os.listdir(history_dir) if f.startswith(filename + "_") and f.endswith(".bak")]
-        if not backups:
-            logger.warning(f"   ⚠️ [ROLLBACK] No backups found.")
+        store = get_store(root or os.path.dirname(file_path))
+        version = store.latest(filename, steps)
+        if version is None:
+            logger.warning(f"   ⚠️ [ROLLBACK] No backup {steps} step(s) back for {filename}.")
             return
 
-        backups.sort()
-        latest_backup = backups[-1]
-        
-        with open(os.path.join(history_dir, latest_backup), 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = store.load(version["hash"]).decode("utf-8", errors="ignore").replace("\r\n", "\n")
 
         # Remove the command lines that triggered the rollback
         lines = content.split('\n')
         while lines and ("UPDATE:" in lines[-1] or "ROLLBACK" in lines[-1] or not lines[-1].strip()):
             lines.pop()
-        
+
         write_safe(file_path, "\n".join(lines))
-        logger.warning(f"   ⏪ [ROLLBACK] Restored {filename} from {latest_backup}")
+        logger.warning(f"   ⏪ [ROLLBACK] Restored {filename} from version {version['hash'][:8]} ({steps} back)")
     except Exception as e:
-        logger.error(f"   🛑 Rollback failed: {e}")
\ No newline at end of file
+        logger.error(f"   🛑 Rollback failed: {e}")
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+from src.core.config import MANIFEST_PATH
+from src.core.logger import logger
+
+MANIFEST_VERSION = 2
+
+class Manifest:
+    """Persisted record of every workspace file Pythia has learned.
+
+    Maps a file key to {"size", "mtime_ns", "ino", "hash"}: the stat
+    fingerprint says whether a file needs reading at all, the content hash
+    (see hash_file) whether it really changed.
+    """
+
+    def __init__(self, path: Optional[str] = MANIFEST_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ [MANIFEST] Ignoring unreadable manifest: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning("⚠️ [MANIFEST] Manifest format changed, rebuilding it")
+            return
+        with self._lock:
+            self._files = data.get("files", {})
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "files": dict(self._files)}
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"⚠️ [MANIFEST] Could not save manifest: {e}")
+
+    def save_if_dirty(self) -> None:
+        if self._dirty:
+            self.save()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._files.get(key)
+
+    def hash_of(self, key: str) -> Optional[str]:
+        entry = self.get(key)
+        return entry["hash"] if entry else None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._files[key] = entry
+            self._dirty = True
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            if self._files.pop(key, None) is not None:
+                self._dirty = True
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._files)
+
+def stat_entry(path: str, content_hash: str) -> Dict[str, Any]:
+    """Manifest entry for a file whose content hashed to content_hash."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ino": stat.st_ino, "hash": content_hash}
+
+def same_fingerprint(entry: Dict[str, Any], stat: os.stat_result) -> bool:
+    return (
+        entry.get("size") == stat.st_size
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+        and entry.get("ino") == stat.st_ino
+    )
@@ -0,0 +1,114 @@
+import ast
+import difflib
+import re
+from typing import List, NamedTuple, Optional, Tuple
+from src.core.config import PATCH_FUZZY_THRESHOLD
+
+_BLOCK = re.compile(
+    r"^<{5,9} ?SEARCH[ \t]*\n(?P<search>.*?)^={5,9}[ \t]*\n(?P<replace>.*?)^>{5,9} ?REPLACE[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+
+class PatchError(Exception):
+    """The model's edits could not be applied safely; the caller should rewrite the file instead."""
+
+class EditBlock(NamedTuple):
+    search: str
+    replace: str
+
+def parse_edit_blocks(text: str) -> List[EditBlock]:
+    """Reads SEARCH/REPLACE blocks:
+
+        <<<<<<< SEARCH
+        lines copied from the file
+        =======
+        what they become
+        >>>>>>> REPLACE
+    """
+    blocks = [EditBlock(m.group("search"), m.group("replace")) for m in _BLOCK.finditer(text)]
+    if not blocks:
+        raise PatchError("no SEARCH/REPLACE blocks in the answer")
+    leftover = _BLOCK.sub("", text)
+    if re.search(r"^(<{5,9} ?SEARCH|>{5,9} ?REPLACE)", leftover, re.MULTILINE):
+        raise PatchError("malformed SEARCH/REPLACE block")
+    return blocks
+
+def apply_edit_blocks(content: str, blocks: List[EditBlock], threshold: float = PATCH_FUZZY_THRESHOLD) -> str:
+    """Applies the blocks in order. Each SEARCH must match exactly once, or else
+    match ignoring indentation/trailing spaces, or else be at least `threshold`
+    similar to exactly one window of lines. An empty SEARCH appends."""
+    lines = content.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+        trailing_newline = False
+    else:
+        trailing_newline = True
+
+    for number, block in enumerate(blocks, 1):
+        search = block.search.splitlines(keepends=True)
+        replace = block.replace.splitlines(keepends=True)
+        if not "".join(search).strip():
+            lines += replace
+            continue
+        start, indent = _locate(lines, search, threshold, number)
+        if indent:
+            replace = [indent + line if line.strip() else line for line in replace]
+        lines[start:start + len(search)] = replace
+
+    result = "".join(lines)
+    if not trailing_newline and result.endswith("\n"):
+        result = result[:-1]
+    return result
+
+def check_syntax(filename: str, before: str, after: str) -> None:
+    """Rejects an edit that breaks a Python file which parsed before."""
+    if not filename.endswith(".py"):
+        return
+    try:
+        ast.parse(before)
+    except (SyntaxError, ValueError):
+        return
+    try:
+        ast.parse(after)
+    except (SyntaxError, ValueError) as e:
+        raise PatchError(f"patched file no longer parses ({e.msg if isinstance(e, SyntaxError) else e})")
+
+def _locate(lines: List[str], search: List[str], threshold: float, number: int) -> Tuple[int, str]:
+    """(first line index, indentation to add to the replacement)."""
+    size = len(search)
+    windows = range(len(lines) - size + 1)
+
+    exact = [i for i in windows if lines[i:i + size] == search]
+    if len(exact) == 1:
+        return exact[0], ""
+    if len(exact) > 1:
+        raise PatchError(f"block {number} matches {len(exact)} places")
+
+    wanted = [line.strip() for line in search]
+    loose = [i for i in windows if [line.strip() for line in lines[i:i + size]] == wanted]
+    if len(loose) > 1:
+        raise PatchError(f"block {number} matches {len(loose)} places")
+    if loose:
+        return loose[0], _indent_shift(lines[loose[0]], search[0])
+
+    best: Optional[int] = None
+    best_ratio = 0.0
+    runner_up = 0.0
+    target = "".join(wanted)
+    for i in windows:
+        ratio = difflib.SequenceMatcher(None, target, "".join(line.strip() for line in lines[i:i + size])).ratio()
+        if ratio > best_ratio:
+            best, best_ratio, runner_up = i, ratio, best_ratio
+        elif ratio > runner_up:
+            runner_up = ratio
+    if best is None or best_ratio < threshold:
+        raise PatchError(f"block {number} does not match the file (best similarity {best_ratio:.2f})")
+    if runner_up >= threshold:
+        raise PatchError(f"block {number} is ambiguous (two windows above {threshold:.2f})")
+    return best, _indent_shift(lines[best], search[0])
+
+def _indent_shift(found: str, searched: str) -> str:
+    """Extra indentation the file has compared to the model's SEARCH text."""
+    have = found[:len(found) - len(found.lstrip())]
+    want = searched[:len(searched) - len(searched.lstrip())]
+    return have[len(want):] if have.startswith(want) else ""
@@ -0,0 +1,41 @@
+import os
+from fnmatch import fnmatch
+from typing import Iterator, Tuple
+from src.core.config import ALWAYS_EXCLUDED_DIRS, INCLUDE_GLOBS, EXCLUDE_GLOBS
+from src.utils.file_ops import is_tracked_file
+
+def workspace_key(path: str, root: str) -> str:
+    """Memory/history key for a file: its path relative to the workspace, with '/' separators."""
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+def is_excluded_dir(name: str) -> bool:
+    return name in ALWAYS_EXCLUDED_DIRS or any(fnmatch(name + "/", pattern) for pattern in EXCLUDE_GLOBS)
+
+def is_watched_key(key: str) -> bool:
+    """True if the file at this workspace-relative key should be handled."""
+    parts = key.split("/")
+    if parts[0] == ".." or any(is_excluded_dir(part) for part in parts[:-1]):
+        return False
+    if not is_tracked_file(parts[-1]):
+        return False
+    if any(fnmatch(key, pattern) or fnmatch(parts[-1], pattern) for pattern in EXCLUDE_GLOBS):
+        return False
+    return any(fnmatch(key, pattern) or fnmatch(parts[-1], pattern) for pattern in INCLUDE_GLOBS)
+
+def walk_workspace(root: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yields (key, entry) for every watched file below root, pruning excluded folders."""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_excluded_dir(entry.name):
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        key = workspace_key(entry.path, root)
+                        if is_watched_key(key):
+                            yield key, entry
+        except OSError:
+            continue
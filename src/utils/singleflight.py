@@ -0,0 +1,64 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class Flight:
+    """One in-flight call that other callers can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller (the leader) does the work; callers arriving while it
+    runs wait for its result instead of repeating it. Nothing is kept after
+    the call finishes, that is the response cache's job.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Flight] = {}
+        self.shared = 0
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """(flight, True) if the caller must do the work and then finish() it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key: str, flight: Flight, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publishes the leader's outcome. With neither result nor error, waiters get None and do the work themselves."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def wait(self, flight: Flight) -> Any:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        flight, leader = self.join(key)
+        if not leader:
+            return self.wait(flight)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result=result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
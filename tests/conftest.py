@@ -0,0 +1,13 @@
+import pytest
+from src.services import brain
+from src.services.rate_limiter import RateLimiter
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # Relative paths in config (cache, memory, history) must not land in the repo
+    monkeypatch.chdir(tmp_path)
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    # The process-wide budget would otherwise leak between tests
+    monkeypatch.setattr(brain, "rate_limiter", RateLimiter())
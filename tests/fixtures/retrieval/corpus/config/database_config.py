@@ -0,0 +1,9 @@
+DB_HOST = "localhost"
+DB_PORT = 5432
+DB_NAME = "shop"
+DB_USER = "shop_admin"
+POOL_SIZE = 10
+
+
+def connection_url():
+    return f"postgresql://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
@@ -0,0 +1,16 @@
+import hashlib
+import secrets
+
+SESSION_TTL = 3600
+
+
+def hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 100_000)
+
+
+def create_session_token():
+    return secrets.token_urlsafe(32)
+
+
+def verify_login(user, password):
+    return user.password_hash == hash_password(password, user.salt)
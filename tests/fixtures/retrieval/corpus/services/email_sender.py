@@ -0,0 +1,10 @@
+import smtplib
+
+SMTP_SERVER = "smtp.neonshop.example"
+SMTP_PORT = 587
+
+
+def send_order_confirmation(order, recipient):
+    body = f"Thanks for your order #{order.id}!"
+    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as smtp:
+        smtp.sendmail("orders@neonshop.example", recipient, body)
@@ -0,0 +1,11 @@
+LOW_STOCK_THRESHOLD = 5
+
+
+def reserve_stock(product_id, quantity, stock):
+    if stock[product_id] < quantity:
+        raise ValueError("Not enough stock")
+    stock[product_id] -= quantity
+
+
+def needs_restock(product_id, stock):
+    return stock[product_id] <= LOW_STOCK_THRESHOLD
@@ -0,0 +1,10 @@
+STRIPE_API_VERSION = "2024-06-20"
+REFUND_WINDOW_DAYS = 30
+
+
+class PaymentGateway:
+    def charge_card(self, customer_id, amount_cents, currency="EUR"):
+        raise NotImplementedError
+
+    def refund(self, charge_id):
+        raise NotImplementedError
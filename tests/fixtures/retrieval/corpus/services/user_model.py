@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class User:
+    id: int
+    email: str
+    password_hash: bytes
+    salt: bytes
+    is_admin: bool = False
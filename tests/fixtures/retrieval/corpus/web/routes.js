@@ -0,0 +1,7 @@
+import { Router } from "express";
+
+export const router = Router();
+
+router.get("/products", listProducts);
+router.post("/cart/checkout", checkoutCart);
+router.post("/login", loginUser);
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+import pytest
+from src.services.architect import Architect, PlanError, parse_plan
+
+def plan(*files):
+    return json.dumps({"files": [{"path": p, "purpose": f"{p} file", "depends_on": list(d)} for p, *d in files]})
+
+class StubBrain:
+    """Answers the planning call with `answer` and takes `delay` seconds per file."""
+
+    def __init__(self, answer, delay=0.0):
+        self.answer = answer
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.started, self.finished, self.contexts = {}, {}, {}
+
+    def plan_project(self, project, description, context_str=""):
+        return self.answer
+
+    def generate(self, filename, ext, context_str=""):
+        with self.lock:
+            self.started[filename] = time.perf_counter()
+            self.contexts[filename] = context_str
+        time.sleep(self.delay)
+        with self.lock:
+            self.finished[filename] = time.perf_counter()
+        return f"# code for {filename}\n"
+
+class NoMemory:
+    def recall(self, query, n_results=2):
+        return {"documents": [[]], "metadatas": [[]]}
+
+# 1. Unsafe, unsupported and duplicate paths are dropped, as are dependencies outside the plan
+def test_parse_plan_sanitizes():
+    answer = "```json\n" + plan(("config.py",), ("../evil.py",), ("/abs.py",), ("app/main.py", "config.py", "nope.py"),
+                                ("config.py",), ("binary.exe",), ("node_modules/x.js",)) + "\n```"
+    files = parse_plan(answer)
+    assert [f.path for f in files] == ["config.py", "app/main.py"]
+    assert files[1].depends_on == ("config.py",)
+    with pytest.raises(PlanError):
+        parse_plan("Sure! Here is your project.")
+
+# 2. Independent files run in parallel; dependants wait for, and see, their dependencies
+def test_dependencies_first_then_parallel(tmp_path):
+    brain = StubBrain(plan(("config.py",), ("a.py", "config.py"), ("b.py", "config.py"), ("c.py", "config.py")), delay=0.2)
+    report = Architect(brain, NoMemory(), workers=4).scaffold(str(tmp_path), "demo", "A demo app")
+
+    assert report.written == ["a.py", "b.py", "c.py", "config.py"]
+    for name in ("a.py", "b.py", "c.py"):
+        assert brain.started[name] >= brain.finished["config.py"]
+        assert "--- DEPENDENCY: config.py ---\n# code for config.py" in brain.contexts[name]
+        assert "PROJECT: demo\nA demo app" in brain.contexts[name]
+    # Two rounds of 0.2s instead of four
+    assert report.wall_seconds < 0.6 < report.sequential_seconds
+    assert (tmp_path / "a.py").read_text() == "# code for a.py\n"
+
+# 3. Files that already exist are never overwritten
+def test_existing_files_are_kept(tmp_path):
+    (tmp_path / "config.py").write_text("MINE = True\n")
+    brain = StubBrain(plan(("config.py",), ("main.py", "config.py")))
+    report = Architect(brain, NoMemory()).scaffold(str(tmp_path), "demo", "demo")
+
+    assert report.skipped == ["config.py"] and report.written == ["main.py"]
+    assert (tmp_path / "config.py").read_text() == "MINE = True\n"
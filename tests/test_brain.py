@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from src.services.brain import Brain
+from src.services.brain import Brain, FenceStripper
+from src.services.fake_model import FakeModel
 from src.services.prompts import PERSONAS, DEFAULT_PERSONA
 
 # 1. Test Persona Logic
@@ -45,4 +46,62 @@ def test_generate_calls_api_correctly(mock_model):
     sent_prompt = args[0]
     
     assert "TASK: Write the code" in sent_prompt
-    assert "Senior Python Engineer" in sent_prompt
\ No newline at end of file
+    assert "Senior Python Engineer" in sent_prompt
+
+
+# 4. Streaming strips code fences on the fly, however the chunks are cut
+def test_fence_stripper_matches_clean_text():
+    brain = Brain()
+    raw_text = "```python\nprint('Hello')\n\nprint('World')\n```\n"
+
+    for size in (1, 2, 5, 100):
+        stripper = FenceStripper()
+        pieces = [stripper.feed(raw_text[i:i + size]) for i in range(0, len(raw_text), size)]
+        assert "".join(pieces) + stripper.finish() == brain._clean_text(raw_text)
+
+# 5. generate_stream yields pieces before the answer is complete
+def test_generate_stream_yields_incrementally():
+    fake = FakeModel(text="```python\n" + "x = 1\n" * 20 + "```", chunk_size=8)
+
+    with patch('src.services.brain.model', fake):
+        pieces = list(Brain().generate_stream("big.py", ".py"))
+
+    assert len(pieces) > 1
+    assert "".join(pieces) == "x = 1\n" * 20
+
+# 6. The Gemini model is only built when first needed
+def test_model_is_created_lazily():
+    from src.services import brain as brain_module
+
+    with patch.object(brain_module, 'model', None), patch.object(brain_module, 'genai') as mock_genai:
+        Brain()
+        mock_genai.GenerativeModel.assert_not_called()
+
+        first = brain_module.get_model()
+        assert brain_module.get_model() is first
+        mock_genai.GenerativeModel.assert_called_once()
+
+# 7. Identical prompts in flight at the same time cost one model call
+@pytest.mark.parametrize("streaming", [False, True])
+def test_identical_concurrent_calls_share_one_request(streaming):
+    import threading
+    fake = FakeModel(text="x = 1\n" * 10, latency=0.2, chunk_size=8)
+    brain = Brain(cache=None)
+    results = []
+
+    def ask():
+        if streaming:
+            results.append("".join(brain.generate_stream("config.py", ".py", "PORT: 80")))
+        else:
+            results.append(brain.generate("config.py", ".py", "PORT: 80"))
+
+    with patch('src.services.brain.model', fake):
+        threads = [threading.Thread(target=ask) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert fake.calls == 1
+    assert results == ["x = 1\n" * 10] * 4
+    assert brain.flights.in_flight() == 0
@@ -0,0 +1,66 @@
+import time
+from unittest.mock import MagicMock, patch
+from src.services.brain import Brain
+from src.services.cache import ResponseCache
+
+# 1. Keys depend on every part of the request
+def test_make_key_is_stable_and_sensitive():
+    key = ResponseCache.make_key("model", 0.4, "persona", "template", "prompt")
+    assert key == ResponseCache.make_key("model", 0.4, "persona", "template", "prompt")
+    assert key != ResponseCache.make_key("model", 0.5, "persona", "template", "prompt")
+
+# 2. Memory hit, then disk hit from a fresh instance
+def test_disk_tier_survives_restart(tmp_path):
+    cache = ResponseCache(path=str(tmp_path))
+    assert cache.get("k" * 64) is None
+    cache.put("k" * 64, "print('hi')")
+    assert cache.get("k" * 64) == "print('hi')"
+
+    reopened = ResponseCache(path=str(tmp_path))
+    assert reopened.get("k" * 64) == "print('hi')"
+    assert reopened.stats()["disk_hits"] == 1
+
+# 3. Expired entries are misses
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(path=str(tmp_path), ttl=0.01)
+    cache.put("a" * 64, "old")
+    time.sleep(0.02)
+    assert cache.get("a" * 64) is None
+    assert cache.stats()["disk_entries"] == 0
+
+# 4. LRU and byte limits evict the oldest entries
+def test_size_eviction(tmp_path):
+    cache = ResponseCache(path=str(tmp_path), max_entries=2, max_bytes=250)
+    for name in "abc":
+        cache.put(name * 64, "x" * 100)
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["disk_bytes"] <= 250
+    assert cache.get("a" * 64) is None
+    assert cache.get("c" * 64) == "x" * 100
+
+# 5. Brain skips the network on a repeated prompt, unless asked not to
+@patch('src.services.brain.model')
+def test_brain_uses_cache(mock_model, tmp_path):
+    mock_response = MagicMock()
+    mock_response.text = "print('cached')"
+    mock_model.generate_content.return_value = mock_response
+
+    brain = Brain(cache=ResponseCache(path=str(tmp_path)))
+    assert brain.generate("Snake_Game.py", ".py") == "print('cached')"
+    assert brain.generate("Snake_Game.py", ".py") == "print('cached')"
+    assert mock_model.generate_content.call_count == 1
+
+    brain.generate("Snake_Game.py", ".py", use_cache=False)
+    assert mock_model.generate_content.call_count == 2
+    assert brain.cache.stats()["hits"] == 1
+
+# 6. Errors are never cached
+@patch('src.services.brain.model')
+def test_brain_does_not_cache_errors(mock_model, tmp_path):
+    mock_model.generate_content.side_effect = ValueError("bad request")
+
+    brain = Brain(cache=ResponseCache(path=str(tmp_path)))
+    assert brain.generate("a.py", ".py").startswith("# Error")
+    assert brain.cache.stats()["disk_entries"] == 0
@@ -0,0 +1,46 @@
+from src.services.chunker import chunk_file
+
+PY_SOURCE = """import os
+
+PORT = 80
+
+def connect():
+    return os.getenv("DB")
+
+@cache
+def load():
+    pass
+
+class Game:
+    def run(self):
+        pass
+"""
+
+# 1. Python splits at top-level definitions (decorators included)
+def test_python_chunks_by_definition():
+    chunks = chunk_file("game.py", PY_SOURCE)
+    starts = [c.text.splitlines()[0] for c in chunks]
+
+    assert starts == ["import os", "def connect():", "@cache", "class Game:"]
+    assert (chunks[1].start_line, chunks[1].end_line) == (5, 6)
+
+# 2. Markdown splits at headings
+def test_markdown_chunks_by_heading():
+    chunks = chunk_file("notes.md", "# Title\nintro\n## Setup\nsteps\n## Usage\nrun it\n")
+    assert [c.start_line for c in chunks] == [1, 3, 5]
+
+# 3. Unknown formats (and broken Python) fall back to size windows with overlap
+def test_size_fallback_with_overlap():
+    content = "".join(f"line {i}\n" for i in range(100))
+    chunks = chunk_file("data.txt", content, max_chars=100, overlap=2)
+
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 100 for c in chunks)
+    assert chunks[1].start_line == chunks[0].end_line - 1
+    assert chunk_file("broken.py", "def (:\n" * 3)
+
+# 4. Editing one function leaves the other chunk hashes alone
+def test_chunk_hashes_are_stable():
+    before = {c.hash for c in chunk_file("game.py", PY_SOURCE)}
+    after = {c.hash for c in chunk_file("game.py", PY_SOURCE.replace('"DB"', '"DATABASE"'))}
+    assert len(before - after) == 1
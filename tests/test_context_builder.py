@@ -0,0 +1,57 @@
+from src.services.context_builder import ContextBuilder
+
+def make_results(*hits):
+    """hits: (filename, text, start_line, distance)"""
+    return {
+        "documents": [[text for _, text, _, _ in hits]],
+        "metadatas": [[{"filename": f, "start_line": s, "end_line": s + text.count("\n") - 1}
+                       for f, text, s, _ in hits]],
+        "distances": [[d for _, _, _, d in hits]],
+    }
+
+def lines(prefix, count):
+    return "".join(f"{prefix}_{i} = {i}  # padding to make the line longer\n" for i in range(count))
+
+# 1. Most relevant snippets come first, whatever order the database used
+def test_ranks_by_distance():
+    results = make_results(("far.py", "FAR = 1\n", 1, 0.9), ("near.py", "NEAR = 1\n", 1, 0.1))
+    context = ContextBuilder().build(results, ".py")
+
+    assert context.text.index("near.py") < context.text.index("far.py")
+    assert context.snippets == 2 and context.dropped == 0
+
+# 2. The budget is respected and the last snippet is cut at a line boundary
+def test_trims_to_budget_at_line_boundaries():
+    big = lines("big", 200)
+    results = make_results(("a.py", lines("a", 10), 1, 0.1), ("big.py", big, 1, 0.2))
+    builder = ContextBuilder(budgets={".py": 600}, min_snippet_tokens=32)
+    context = builder.build(results, ".py")
+
+    assert context.used_tokens <= 600
+    assert context.dropped_tokens > 0
+    body = context.text.split("--- MEMORY: big.py")[1].split("---\n", 1)[1]
+    assert all(line.startswith("big_") for line in body.strip().split("\n"))
+    # The header reports the lines actually included
+    kept = body.strip().count("\n") + 1
+    assert f"big.py (lines 1-{kept})" in context.text
+
+# 3. Duplicate and overlapping chunks are not sent twice
+def test_deduplicates_overlaps():
+    text = lines("x", 20)
+    first = "".join(text.splitlines(keepends=True)[:12])
+    second = "".join(text.splitlines(keepends=True)[9:])  # Lines 10-20 overlap 10-12
+    results = make_results(("x.py", first, 1, 0.1), ("x.py", second, 10, 0.2), ("x.py", first, 1, 0.3))
+    context = ContextBuilder().build(results, ".py")
+
+    assert context.duplicates == 1
+    assert "x.py (lines 13-20)" in context.text
+    assert context.text.count("x_10 = 10") == 1
+
+# 4. Budgets depend on the extension, and tiny leftovers are dropped
+def test_budget_per_extension():
+    results = make_results(("data.py", lines("d", 100), 1, 0.1))
+    builder = ContextBuilder(budgets={".py": 5000, ".json": 100}, min_snippet_tokens=200)
+
+    assert builder.build(results, ".py").dropped_tokens == 0
+    small = builder.build(results, ".json")
+    assert small.text == "" and small.dropped == 1 and small.used_tokens == 0
@@ -0,0 +1,65 @@
+import time
+from src.handlers.debouncer import EventDebouncer
+
+def make_debouncer(window=0.05):
+    emitted = []
+    debouncer = EventDebouncer(lambda path, kind: emitted.append((path, kind)), window=window)
+    return debouncer, emitted
+
+# 1. A burst of saves becomes one event
+def test_modified_burst_collapses():
+    debouncer, emitted = make_debouncer()
+    for _ in range(5):
+        debouncer.push("a.py", "modified")
+    debouncer.flush()
+
+    assert emitted == [("a.py", "modified")]
+    assert debouncer.stats()["coalesced"] == 4
+
+# 2. created + modified -> created (so empty-file generation still triggers)
+def test_created_then_modified_is_created():
+    debouncer, emitted = make_debouncer()
+    debouncer.push("a.py", "created")
+    debouncer.push("a.py", "modified")
+    debouncer.flush()
+
+    assert emitted == [("a.py", "created")]
+
+# 3. A rename folds the old path into a creation at the destination
+def test_moved_then_modified_is_created_at_destination():
+    debouncer, emitted = make_debouncer()
+    debouncer.push("New.txt", "created")
+    debouncer.push("New.txt", "moved", "Snake_Game.py")
+    debouncer.push("Snake_Game.py", "modified")
+    debouncer.flush()
+
+    assert emitted == [("Snake_Game.py", "created")]
+    stats = debouncer.stats()
+    assert stats["raw_events"] == 3
+    assert stats["emitted"] == 1
+
+# 4. The background thread emits after the quiet window
+def test_emits_after_quiet_window():
+    debouncer, emitted = make_debouncer(window=0.05)
+    debouncer.start()
+    debouncer.push("a.py", "modified")
+    debouncer.push("b.py", "created")
+    assert emitted == []
+
+    deadline = time.monotonic() + 2
+    while len(emitted) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    debouncer.stop()
+
+    assert sorted(emitted) == [("a.py", "modified"), ("b.py", "created")]
+
+# 5. Renaming a known file deletes the old name, and a delete overrides whatever was pending
+def test_renamed_and_deleted_files():
+    debouncer, emitted = make_debouncer()
+    debouncer.push("notes.txt", "modified")
+    debouncer.push("notes.txt", "moved", "todo.txt")
+    debouncer.push("old.py", "modified")
+    debouncer.push("old.py", "deleted")
+    debouncer.flush()
+
+    assert sorted(emitted) == [("notes.txt", "deleted"), ("old.py", "deleted"), ("todo.txt", "created")]
@@ -0,0 +1,47 @@
+from src.services.diagrams import DiagramEngine, python_diagram
+
+SOURCE = '''
+class Board:
+    def reset(self):
+        self.clear()
+
+    def clear(self):
+        pass
+
+class Game(Board):
+    def __init__(self):
+        self.board = Board()
+
+    async def tick(self):
+        self.reset()
+
+def main():
+    Game().tick()
+    print("started")
+
+if __name__ == "__main__":
+    main()
+'''
+
+# 1. Functions, classes and methods are drawn, with calls resolved inside the module only
+def test_structure_and_calls():
+    diagram = python_diagram(SOURCE, "game.py")
+    lines = diagram.splitlines()
+
+    assert lines[0] == "graph TD"
+    assert '    subgraph cls_Game["class Game"]' in lines
+    assert '        m_Game__tick["async tick()"]' in lines
+    assert "    cls_Game -->|inherits| cls_Board" in lines
+    assert "    mod_game_py -.-> fn_main" in lines           # if __name__ == "__main__"
+    assert "    fn_main -.-> m_Game____init__" in lines      # Game() runs __init__
+    assert "    m_Board__reset -.-> m_Board__clear" in lines # self.clear()
+    assert "    m_Game____init__ -.-> cls_Board" in lines    # Board has no __init__
+    assert "print" not in diagram
+
+# 2. Diagrams are cached by source; code that doesn't parse gives None
+def test_engine_cache():
+    engine = DiagramEngine()
+    first = engine.render(SOURCE, "game.py")
+    assert engine.render(SOURCE, "game.py") is first
+    assert engine.render("def broken(:\n", "game.py") is None
+    assert engine.stats() == {"cached": 1, "hits": 1, "misses": 2, "failures": 1}
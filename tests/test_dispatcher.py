@@ -0,0 +1,114 @@
+import threading
+import time
+from src.handlers.dispatcher import PRIORITY_BACKGROUND, PRIORITY_GENERATE, PRIORITY_INTERACTIVE, EventDispatcher
+
+# 1. Jobs for the same file keep their order
+def test_same_key_runs_in_order():
+    dispatcher = EventDispatcher(workers=4)
+    dispatcher.start()
+    seen = []
+
+    def job(n):
+        time.sleep(0.01 if n % 2 else 0)
+        seen.append(n)
+
+    for n in range(10):
+        dispatcher.submit("a.py", job, n)
+
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+    assert seen == list(range(10))
+
+# 2. A slow file does not block other files
+def test_different_keys_run_concurrently():
+    dispatcher = EventDispatcher(workers=2)
+    dispatcher.start()
+    release = threading.Event()
+    done = threading.Event()
+
+    dispatcher.submit("slow.py", release.wait, 5)
+    dispatcher.submit("fast.py", done.set)
+
+    assert done.wait(timeout=2)
+    release.set()
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+
+# 3. Backpressure: a full queue refuses new jobs instead of growing forever
+def test_full_queue_drops_jobs():
+    dispatcher = EventDispatcher(workers=1, max_depth=2)
+    assert dispatcher.submit("a.py", lambda: None, timeout=0)
+    assert dispatcher.submit("b.py", lambda: None, timeout=0)
+    assert not dispatcher.submit("c.py", lambda: None, timeout=0)
+    assert dispatcher.stats()["dropped"] == 1
+
+    dispatcher.start()
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+    assert dispatcher.stats()["completed"] == 2
+
+# 4. A failing job is counted and does not kill the worker
+def test_failing_job_is_isolated():
+    dispatcher = EventDispatcher(workers=1)
+    dispatcher.start()
+    ran = []
+
+    def boom():
+        raise RuntimeError("kaboom")
+
+    dispatcher.submit("a.py", boom)
+    dispatcher.submit("a.py", ran.append, 1)
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+
+    assert ran == [1]
+    assert dispatcher.stats()["failed"] == 1
+
+# 5. Coalescing: a newer job replaces the ones still waiting for the same file
+def test_coalesce_supersedes_waiting_jobs():
+    dispatcher = EventDispatcher(workers=1)
+    dispatcher.start()
+    running, release = threading.Event(), threading.Event()
+    seen = []
+    dispatcher.submit("a.py", lambda: running.set() or release.wait(5))
+    assert running.wait(timeout=2)
+    for event in ("created", "modified", "modified"):
+        dispatcher.submit("a.py", seen.append, event,
+                          coalesce=lambda older, newer: older if older[0] == "created" else newer)
+    release.set()
+
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+    assert seen == ["created"]
+    assert dispatcher.stats()["superseded"] == 2
+
+# 6. Urgent work goes first, and a coalesced job takes the most urgent priority
+def test_priorities():
+    dispatcher = EventDispatcher(workers=1)
+    ran = []
+    dispatcher.submit("notes.txt", ran.append, "memorize", priority=PRIORITY_BACKGROUND)
+    dispatcher.submit("new.py", ran.append, "generate", priority=PRIORITY_GENERATE)
+    dispatcher.submit("app.py", ran.append, "memorize app", priority=PRIORITY_BACKGROUND)
+    dispatcher.submit("app.py", ran.append, "update app", priority=PRIORITY_INTERACTIVE,
+                      coalesce=lambda older, newer: newer)
+    assert dispatcher.stats()["depth_background"] == 1 and dispatcher.stats()["depth_interactive"] == 1
+
+    dispatcher.start()
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+    assert ran == ["update app", "generate", "memorize"]
+
+# 7. Workspaces take turns: a quiet one is not stuck behind a busy one's backlog
+def test_groups_take_turns():
+    dispatcher = EventDispatcher(workers=1)
+    ran = []
+    for n in range(10):
+        dispatcher.submit(f"noisy/{n}.py", ran.append, "noisy", group="noisy")
+    dispatcher.submit("quiet/app.py", ran.append, "quiet", group="quiet")
+    assert dispatcher.stats()["queued_noisy"] == 10 and dispatcher.stats()["queued_quiet"] == 1
+
+    dispatcher.start()
+    assert dispatcher.join(timeout=5)
+    dispatcher.stop()
+    assert ran.index("quiet") == 1
+    assert len(ran) == 11
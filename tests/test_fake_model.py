@@ -0,0 +1,51 @@
+import time
+from src.services.fake_model import FakeModel, FakeRateLimitError
+from src.services.rate_limiter import parse_retry_after
+
+# 1. Random failures follow the configured rates and are reproducible with a seed
+def test_error_rates_are_seeded():
+    def outcomes(seed):
+        fake = FakeModel(error_rate=0.2, rate_limit_rate=0.3, seed=seed)
+        result = []
+        for _ in range(200):
+            try:
+                fake.generate_content("prompt")
+                result.append(200)
+            except FakeRateLimitError:
+                result.append(429)
+            except RuntimeError:
+                result.append(500)
+        return result
+
+    first = outcomes(1)
+    assert first == outcomes(1)
+    assert 40 < first.count(429) < 80
+    assert 20 < first.count(500) < 60
+
+# 2. Output size and sub-second retry hints
+def test_output_size_and_retry_hint():
+    fake = FakeModel(output_chars=5000)
+    assert len(fake.generate_content("prompt").text) == 5000
+    assert parse_retry_after(FakeRateLimitError(retry_after=0.25)) == 0.25
+
+# 3. Streaming spreads the latency over the chunks
+def test_stream_latency():
+    fake = FakeModel(text="x" * 64, chunk_size=16, latency=0.2, first_chunk_share=0.5)
+
+    started = time.perf_counter()
+    chunks = fake.generate_content("prompt", stream=True)
+    first = next(chunks)
+    first_at = time.perf_counter() - started
+    rest = list(chunks)
+    total = time.perf_counter() - started
+
+    assert first.text == "x" * 16 and len(rest) == 3
+    assert 0.09 <= first_at < 0.18
+    assert total >= 0.19
+
+# 4. Prompt-aware answers that take longer the longer they are
+def test_responder_and_output_speed():
+    fake = FakeModel(responder=lambda prompt: prompt.upper(), chars_per_second=1000)
+    started = time.perf_counter()
+    assert fake.generate_content("x" * 100).text == "X" * 100
+    assert time.perf_counter() - started >= 0.1
@@ -0,0 +1,64 @@
+import os
+import pytest
+from src.utils.file_ops import write_atomic, write_stream
+
+# 1. In-place streaming shows each chunk in the file right away
+def test_write_stream_inplace_flushes_each_chunk(tmp_path):
+    target = tmp_path / "a.py"
+    seen = []
+
+    def chunks():
+        for piece in ("one\n", "two\n"):
+            yield piece
+            seen.append(target.read_text())
+
+    assert write_stream(str(target), chunks()) == "one\ntwo\n"
+    assert seen == ["one\n", "one\ntwo\n"]
+
+# 2. Atomic streaming leaves the old content until the swap
+def test_write_stream_atomic_swaps_at_end(tmp_path):
+    target = tmp_path / "a.py"
+    target.write_text("placeholder")
+    seen = []
+
+    def chunks():
+        yield "new\n"
+        seen.append(target.read_text())
+
+    write_stream(str(target), chunks(), atomic=True)
+    assert seen == ["placeholder"]
+    assert target.read_text() == "new\n"
+    assert os.listdir(tmp_path) == ["a.py"]
+
+# 3. A failure before the first chunk leaves the file untouched
+def test_write_stream_failure_before_first_chunk(tmp_path):
+    target = tmp_path / "a.py"
+    target.write_text("placeholder")
+
+    def chunks():
+        raise RuntimeError("no answer")
+        yield ""
+
+    with pytest.raises(RuntimeError):
+        write_stream(str(target), chunks())
+    assert target.read_text() == "placeholder"
+
+# 4. A failure after the first chunk puts the original text back
+def test_write_stream_failure_midway_restores_original(tmp_path):
+    target = tmp_path / "a.py"
+    target.write_text("import os\n")
+
+    def chunks():
+        yield "import os\ndef half():\n"
+        raise ConnectionError("stream dropped")
+
+    with pytest.raises(ConnectionError):
+        write_stream(str(target), chunks(), original="import os\n")
+    assert target.read_text() == "import os\n"
+    assert os.listdir(tmp_path) == ["a.py"]
+
+def test_write_atomic(tmp_path):
+    target = tmp_path / "a.py"
+    write_atomic(str(target), "print(1)")
+    assert target.read_text() == "print(1)"
+    assert os.listdir(tmp_path) == ["a.py"]
@@ -0,0 +1,283 @@
+import os
+import shutil
+import time
+import pytest
+from unittest.mock import patch
+from src.handlers.handler import PLACEHOLDER_TEXT, OracleHandler
+from src.services.rate_limiter import RateLimitDeferred
+from src.utils.manifest import Manifest
+
+@pytest.fixture
+def make_handler(tmp_path):
+    patches = [patch('src.handlers.handler.MemoryEngine'), patch('src.handlers.handler.Brain')]
+    for p in patches:
+        p.start()
+
+    def factory():
+        return OracleHandler(str(tmp_path), manifest=Manifest(str(tmp_path / "manifest.json")))
+
+    yield factory
+    for p in patches:
+        p.stop()
+
+# 1. Unchanged stat fingerprint -> no read, no hash
+def test_unchanged_file_is_not_read(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "notes.txt"
+    path.write_text("Primary color is Neon Green.")
+
+    handler._process_event(str(path), "modified")
+    handler.memory.memorize.assert_called_once()
+
+    with patch('src.handlers.handler.hash_file') as spy:
+        handler._process_event(str(path), "modified")
+    spy.assert_not_called()
+
+# 2. A touch changes the fingerprint but the hash proves nothing changed
+def test_touched_file_is_hashed_but_not_relearned(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "notes.txt"
+    path.write_text("Primary color is Neon Green.")
+    handler._process_event(str(path), "modified")
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    handler._process_event(str(path), "modified")
+
+    assert handler.memory.memorize.call_count == 1
+
+# 3. The fingerprints survive a restart
+def test_fingerprints_persist(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "notes.txt"
+    path.write_text("Primary color is Neon Green.")
+    handler._process_event(str(path), "modified")
+    handler.manifest.save()
+
+    restarted = make_handler()
+    restarted.memory.reset_mock()
+    restarted._process_event(str(path), "modified")
+    restarted.memory.memorize.assert_not_called()
+
+# 4. Nested files are keyed by relative path, so same names don't collide
+def test_nested_files_use_relative_keys(make_handler, tmp_path):
+    handler = make_handler()
+    for folder in ("api", "web"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "config.py").write_text(f"NAME = '{folder}'\n")
+        handler._process_event(str(tmp_path / folder / "config.py"), "modified")
+
+    keys = [c.args[0] for c in handler.memory.memorize.call_args_list]
+    assert keys == ["api/config.py", "web/config.py"]
+
+# 5. Pythia's own folders are never processed
+def test_excluded_folders_are_ignored(make_handler, tmp_path):
+    handler = make_handler()
+    (tmp_path / ".pythia_history").mkdir()
+    (tmp_path / ".pythia_history" / "notes.txt").write_text("internal")
+
+    handler._process_event(str(tmp_path / ".pythia_history" / "notes.txt"), "modified")
+    handler.memory.memorize.assert_not_called()
+
+# 6. An UPDATE on a big file is applied from search/replace blocks, instruction removed
+def test_update_is_patched(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "big.py"
+    body = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(30))
+    path.write_text(body + "# UPDATE: make f3 return 33\n")
+    handler.brain.refactor_patch.return_value = (
+        "<<<<<<< SEARCH\ndef f3():\n    return 3\n=======\ndef f3():\n    return 33\n>>>>>>> REPLACE\n"
+        "<<<<<<< SEARCH\n# UPDATE: make f3 return 33\n=======\n>>>>>>> REPLACE\n"
+    )
+
+    handler._process_event(str(path), "modified")
+    assert path.read_text() == body.replace("return 3\n", "return 33\n")
+    handler.brain.refactor.assert_not_called()
+    handler.brain.refactor_stream.assert_not_called()
+
+# 7. Edits that don't apply fall back to a full rewrite
+def test_bad_patch_falls_back_to_rewrite(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "big.py"
+    path.write_text("".join(f"X{i} = {i}\n" for i in range(50)) + "# UPDATE: rename X1\n")
+    handler.brain.refactor_patch.return_value = "<<<<<<< SEARCH\nY = 1\n=======\nZ = 1\n>>>>>>> REPLACE\n"
+    handler.brain.refactor.return_value = "REWRITTEN = True\n"
+
+    with patch('src.handlers.handler.STREAMING_ENABLED', False):
+        handler._process_event(str(path), "modified")
+    assert path.read_text() == "REWRITTEN = True\n"
+
+# 8. Text typed over the placeholder while the model works is never overwritten
+def test_stale_generation_is_discarded(make_handler, tmp_path):
+    handler = make_handler()
+    handler.memory.recall.return_value = {"documents": [[]], "metadatas": [[]]}
+    path = tmp_path / "config.py"
+    path.write_text("")
+
+    def slow_answer(*args):
+        path.write_text("PORT = 8080  # typed by the user\n")
+        yield "PORT = 80\n"
+
+    handler.brain.generate_stream.side_effect = slow_answer
+    handler._process_event(str(path), "created")
+
+    assert path.read_text() == "PORT = 8080  # typed by the user\n"
+    # Re-queued so the user's text is learned
+    assert handler.dispatcher.stats()["submitted"] == 1
+
+# 9. With folder scaffolding on, a new empty folder is scaffolded into a project; files written by the Architect are not re-processed
+def test_new_folder_is_scaffolded(make_handler, tmp_path):
+    handler = make_handler()
+    handler.memory.recall.return_value = {"documents": [[]], "metadatas": [[]]}
+    handler.brain.plan_project.return_value = '{"files": [{"path": "api/config.py", "purpose": "Settings"}]}'
+    handler.brain.generate.side_effect = lambda name, ext, context: f"# {name}\n"
+    handler.settings = {"SCAFFOLD_ON_NEW_FOLDER": True}
+    folder = tmp_path / "Todo_App"
+    folder.mkdir()
+
+    handler._process_event(str(folder), "folder")
+    generated = folder / "api" / "config.py"
+    assert generated.read_text() == "# api/config.py\n"
+    handler.memory.memorize_many.assert_called_once_with({"Todo_App/api/config.py": "# api/config.py\n"})
+
+    handler._process_event(str(generated), "created")
+    handler.memory.memorize.assert_not_called()
+    # Not empty any more: nothing happens a second time
+    handler._process_event(str(folder), "folder")
+    assert handler.brain.plan_project.call_count == 1
+
+# 10. A generation cut short by a restart is resumed, not left as a placeholder
+def test_interrupted_job_resumes(make_handler, tmp_path):
+    path = tmp_path / "config.py"
+    path.write_text(PLACEHOLDER_TEXT)
+    handler = make_handler()
+    handler._enqueue(str(path), "created")
+    handler.jobs.start(1)    # Killed mid-run: the dispatcher never started
+
+    restarted = make_handler()
+    restarted.memory.recall.return_value = {"documents": [[]], "metadatas": [[]]}
+    restarted.brain.generate_stream.return_value = iter(["PORT = 8080\n"])
+    restarted.dispatcher.start()
+    restarted._resume_jobs()
+    assert restarted.dispatcher.join(timeout=5)
+    restarted.dispatcher.stop()
+
+    assert path.read_text() == "PORT = 8080\n"
+    assert restarted.jobs.stats()["queued"] == restarted.jobs.stats()["running"] == 0
+
+# 11. Deferred jobs are retried a bounded number of times, then the placeholder is cleared
+def test_retries_are_bounded(make_handler, tmp_path):
+    handler = make_handler()
+    handler.memory.recall.return_value = {"documents": [[]], "metadatas": [[]]}
+    handler.brain.generate_stream.side_effect = RateLimitDeferred(0.01)
+    path = tmp_path / "config.py"
+    path.write_text("")
+
+    with patch('src.handlers.handler.JOB_MAX_ATTEMPTS', 3):
+        handler.dispatcher.start()
+        handler._enqueue(str(path), "created")
+        deadline = time.monotonic() + 5
+        # One snapshot per check: a job moving from running to deferred must never read as gone
+        while any(count for state, count in handler.jobs.stats().items() if state != "oldest_wait_seconds"):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        handler.dispatcher.stop()
+
+    assert handler.brain.generate_stream.call_count == 3
+    assert path.read_text() == ""
+
+# 12. A diagram of a Python file is drawn locally, redrawn when the file is learned again, and left alone once edited
+def test_diagram_is_drawn_locally(make_handler, tmp_path):
+    handler = make_handler()
+    source = tmp_path / "game.py"
+    source.write_text("def main():\n    pass\n")
+    diagram = tmp_path / "game.mermaid"
+    diagram.write_text("")
+
+    handler._process_event(str(diagram), "created")
+    assert 'fn_main["main()"]' in diagram.read_text()
+    handler.brain.visualize.assert_not_called()
+    handler.brain.generate_stream.assert_not_called()
+
+    source.write_text("def main():\n    helper()\n\ndef helper():\n    pass\n")
+    handler._process_event(str(source), "modified")
+    assert "fn_main -.-> fn_helper" in diagram.read_text()
+
+    diagram.write_text("graph TD\n    A --> B\n")
+    handler._process_event(str(diagram), "modified")
+    source.write_text("def main():\n    pass\n")
+    handler._process_event(str(source), "modified")
+    assert diagram.read_text() == "graph TD\n    A --> B\n"
+
+# 13. Other languages (and "rich" mode) go to the model
+def test_diagram_of_other_languages_uses_the_model(make_handler, tmp_path):
+    handler = make_handler()
+    handler.brain.visualize.return_value = 'graph TD;\nA["app.js"]'
+    (tmp_path / "app.js").write_text("console.log('hi');\n")
+    diagram = tmp_path / "app.mermaid"
+    diagram.write_text("")
+
+    with patch('src.handlers.handler.STREAMING_ENABLED', False):
+        handler._process_event(str(diagram), "created")
+    handler.brain.visualize.assert_called_once_with("app.js", "console.log('hi');\n")
+    assert diagram.read_text() == 'graph TD;\nA["app.js"]'
+
+# 14. Deleted and renamed files (and whole folders) are forgotten under their old names
+def test_deleted_files_are_forgotten(make_handler, tmp_path):
+    handler = make_handler()
+    (tmp_path / "api").mkdir()
+    for name in ("notes.txt", "api/config.py", "api/db.py"):
+        (tmp_path / name).write_text(f"# {name}\n")
+        handler._process_event(str(tmp_path / name), "modified")
+
+    (tmp_path / "notes.txt").rename(tmp_path / "todo.txt")
+    handler._process_event(str(tmp_path / "notes.txt"), "deleted")
+    handler._process_event(str(tmp_path / "todo.txt"), "created")
+    handler.memory.forget_many.assert_called_once_with(["notes.txt"])
+    assert handler.memory.memorize.call_args.args[0] == "todo.txt"
+
+    shutil.rmtree(tmp_path / "api")
+    handler._process_event(str(tmp_path / "api"), "deleted")
+    assert sorted(handler.memory.forget_many.call_args.args[0]) == ["api/config.py", "api/db.py"]
+    assert handler.manifest.keys() == ["todo.txt"]
+
+# 15. A workspace's settings override the process-wide ones for its own files only
+def test_workspace_settings_override(make_handler, tmp_path):
+    handler = make_handler()
+    handler.settings = {"PATCH_MIN_LINES": 1000, "STREAMING_ENABLED": False}
+    handler.brain.refactor.return_value = "REWRITTEN = True\n"
+    path = tmp_path / "big.py"
+    path.write_text("".join(f"X{i} = {i}\n" for i in range(50)) + "# UPDATE: rename X1\n")
+
+    handler._process_event(str(path), "modified")
+    assert path.read_text() == "REWRITTEN = True\n"
+    handler.brain.refactor_patch.assert_not_called()
+    handler.brain.refactor_stream.assert_not_called()
+
+# 16. A stream that breaks partway leaves the file as it was, not half rewritten
+def test_broken_stream_keeps_the_original(make_handler, tmp_path):
+    handler = make_handler()
+    path = tmp_path / "app.py"
+    original = "import os\n" + "".join(f"def f{i}():\n    return {i}\n" for i in range(10)) + "# UPDATE: add half()\n"
+    path.write_text(original)
+
+    def broken(*args):
+        yield "import os\ndef half():\n"
+        raise ConnectionError("stream dropped")
+
+    handler.brain.refactor_stream.side_effect = broken
+    with patch('src.handlers.handler.REFACTOR_MODE', "rewrite"), patch('src.handlers.handler.create_backup'):
+        handler._process_event(str(path), "modified")
+    assert path.read_text() == original
+
+# 17. Folder scaffolding is opt-in, and even then a nested folder is never a project request
+def test_only_opted_in_top_level_folders_are_scaffolded(make_handler, tmp_path):
+    handler = make_handler()
+    (tmp_path / "Todo_App").mkdir()
+    (tmp_path / "api" / "tests").mkdir(parents=True)
+
+    handler._process_event(str(tmp_path / "Todo_App"), "folder")
+    handler.settings = {"SCAFFOLD_ON_NEW_FOLDER": True}
+    handler._process_event(str(tmp_path / "api" / "tests"), "folder")
+    handler.brain.plan_project.assert_not_called()
+    assert handler._watches_folder(str(tmp_path / "Todo_App"))
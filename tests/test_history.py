@@ -0,0 +1,68 @@
+import os
+from datetime import datetime, timedelta
+from src.utils.history import HistoryStore, create_backup, perform_rollback
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+# 1. Identical versions are stored once
+def test_identical_versions_are_deduplicated(tmp_path):
+    store = HistoryStore(str(tmp_path / ".pythia_history"))
+    a = write(tmp_path / "a.py", "print(1)\n")
+    b = write(tmp_path / "b.py", "print(1)\n")
+
+    assert store.save(a, "a.py")
+    assert store.save(a, "a.py") is None
+    store.save(b, "b.py")
+
+    assert len(store.versions("a.py")) == 1
+    objects = [f for _, _, files in os.walk(tmp_path / ".pythia_history" / "objects") for f in files]
+    assert len(objects) == 1
+
+# 2. ROLLBACK N walks back N versions
+def test_multi_step_rollback(tmp_path):
+    path = tmp_path / "app.py"
+    for n in range(1, 4):
+        path.write_text(f"VERSION = {n}\n# UPDATE: bump\n")
+        create_backup(str(path))
+
+    path.write_text("VERSION = 4\n# ROLLBACK 3\n")
+    perform_rollback(str(path), "app.py", steps=3)
+    assert path.read_text() == "VERSION = 1"
+
+    perform_rollback(str(path), "app.py")
+    assert path.read_text() == "VERSION = 3"
+
+# 3. Retention by count keeps the newest versions
+def test_retention_by_count(tmp_path):
+    store = HistoryStore(str(tmp_path / ".pythia_history"), max_versions=2)
+    for n in range(5):
+        store.save_bytes("a.py", f"v{n}".encode())
+
+    assert [store.load(v["hash"]) for v in store.versions("a.py")] == [b"v3", b"v4"]
+    assert store.gc()["objects_removed"] == 3
+
+# 4. The byte budget drops the oldest versions but never a file's newest one
+def test_gc_byte_budget(tmp_path):
+    store = HistoryStore(str(tmp_path / ".pythia_history"), max_bytes=1)
+    for n in range(3):
+        store.save_bytes("a.py", os.urandom(64) + bytes([n]))
+    store.save_bytes("b.py", os.urandom(64))
+
+    stats = store.gc()
+    assert stats["versions_dropped"] == 2
+    assert len(store.versions("a.py")) == 1
+    assert len(store.versions("b.py")) == 1
+
+# 5. Legacy .bak copies are imported in timestamp order
+def test_migrates_legacy_backups(tmp_path):
+    history = tmp_path / ".pythia_history"
+    history.mkdir()
+    now = datetime.now()
+    (history / f"app.py_{(now - timedelta(hours=2)):%Y%m%d_%H%M%S}.bak").write_text("old")
+    (history / f"app.py_{(now - timedelta(hours=1)):%Y%m%d_%H%M%S}.bak").write_text("newer")
+
+    store = HistoryStore(str(history))
+    assert [store.load(v["hash"]) for v in store.versions("app.py")] == [b"old", b"newer"]
+    assert not any(name.endswith(".bak") for name in os.listdir(history))
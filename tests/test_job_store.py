@@ -0,0 +1,34 @@
+from src.handlers.job_store import JobStore
+
+def keep_created(older, newer):
+    return older if older[1] == "created" else newer
+
+# 1. Jobs survive a restart; interrupted ones come back first by priority, with their attempts counted
+def test_jobs_survive_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    first, _ = store.add("a.py", ("a.py", "modified"), 2)
+    second, _ = store.add("b.py", ("b.py", "created"), 1)
+    store.start(first)
+    store.close()
+
+    restarted = JobStore(path)
+    jobs = restarted.recover()
+    assert [(job.id, job.args, job.attempts) for job in jobs] == [(second, ("b.py", "created"), 0),
+                                                                  (first, ("a.py", "modified"), 1)]
+    assert restarted.stats()["queued"] == 2
+
+# 2. A new event folds into the job still waiting for the file, never into the running one
+def test_add_coalesces_waiting_jobs():
+    store = JobStore(None)
+    job_id, schedule = store.add("a.py", ("a.py", "created"), 2, coalesce=keep_created)
+    assert schedule
+    # More urgent: the queued job has to be re-ranked
+    assert store.add("a.py", ("a.py", "modified"), 0, coalesce=keep_created) == (job_id, True)
+    assert store.get(job_id).args == ("a.py", "created") and store.get(job_id).priority == 0
+
+    store.start(job_id)
+    newer, schedule = store.add("a.py", ("a.py", "modified"), 2, coalesce=keep_created)
+    assert newer != job_id and schedule
+    store.finish(job_id)
+    assert store.start(job_id) is None
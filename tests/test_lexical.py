@@ -0,0 +1,72 @@
+import json
+import os
+from unittest.mock import MagicMock, patch
+from src.services.chunker import chunk_file
+from src.services.lexical import LexicalIndex, tokenize
+from src.services.memory import MemoryEngine
+from src.utils.file_ops import read_text
+from src.utils.paths import walk_workspace
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval")
+
+def load_corpus():
+    corpus = {key: read_text(entry.path) for key, entry in walk_workspace(os.path.join(FIXTURES, "corpus"))}
+    with open(os.path.join(FIXTURES, "queries.json"), encoding="utf-8") as f:
+        return corpus, json.load(f)
+
+# 1. Identifiers are split into their snake_case and camelCase parts
+def test_tokenize_identifiers():
+    terms = tokenize("def hash_password(): PaymentGateway.chargeCard")
+    assert {"hash_password", "hash", "password", "paymentgateway", "payment", "gateway", "charge", "card"} <= set(terms)
+
+# 2. Removing a file removes all of its chunks from the index
+def test_remove_file():
+    index = LexicalIndex()
+    index.add("a.py::1", "a.py", "alpha beta")
+    index.add("a.py::2", "a.py", "gamma")
+    index.add("b.py::1", "b.py", "alpha")
+    index.remove_file("a.py")
+
+    assert len(index) == 1
+    assert [hit.doc_id for hit in index.search("alpha gamma")] == ["b.py::1"]
+
+# 3. Retrieval quality on the fixture corpus
+def test_retrieval_quality_on_fixture_corpus():
+    corpus, queries = load_corpus()
+    index = LexicalIndex()
+    for filename, content in corpus.items():
+        for chunk in chunk_file(filename, content):
+            index.add(f"{filename}::{chunk.hash}", filename, chunk.text)
+
+    reciprocal_ranks = []
+    for case in queries:
+        files = []
+        for hit in index.search(case["query"], 10):
+            if hit.metadata["filename"] not in files:
+                files.append(hit.metadata["filename"])
+        rank = files.index(case["expected"]) + 1 if case["expected"] in files else None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    hit_at_1 = sum(rr == 1.0 for rr in reciprocal_ranks) / len(queries)
+    mrr = sum(reciprocal_ranks) / len(queries)
+    assert hit_at_1 >= 0.9 and mrr >= 0.9
+
+# 4. A decisive name match is answered without embedding the query
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_decisive_lexical_hit_skips_vector_search(mock_client):
+    mock_collection = MagicMock()
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+    memory = MemoryEngine()
+    memory._embedder = MagicMock()
+    memory.memorize("payment_gateway.py", "def refund(charge_id):\n    pass\n")
+    memory.memorize("email_sender.py", "def send(order):\n    pass\n")
+    memory._ensure_lexical()  # Nothing older in the (mocked) database to index
+    doc_id = mock_collection.upsert.call_args_list[0].kwargs["ids"][0]
+    mock_collection.get.return_value = {"ids": [doc_id], "documents": ["def refund(charge_id):\n    pass\n"]}
+
+    results = memory.recall("Payment Gateway", n_results=1)
+
+    assert results["metadatas"][0][0]["filename"] == "payment_gateway.py"
+    mock_collection.query.assert_not_called()
+    memory._embedder.assert_not_called()
+    assert memory.stats()["lexical_only"] == 1
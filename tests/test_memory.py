@@ -1,3 +1,4 @@
+import time
 import pytest
 from unittest.mock import MagicMock, patch
 from src.services.memory import MemoryEngine
@@ -41,4 +42,98 @@ def test_forget_calls_delete(mock_client):
     memory.forget("secret.txt")
     
     mock_collection.delete.assert_called_once()
-    assert "secret.txt" in str(mock_collection.delete.call_args)
\ No newline at end of file
+    assert "secret.txt" in str(mock_collection.delete.call_args)
+
+
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_memorize_only_embeds_changed_chunks(mock_client):
+    mock_collection = MagicMock()
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+
+    memory = MemoryEngine()
+    memory.memorize("app.py", "def a():\n    return 1\n\ndef b():\n    return 2\n")
+    first_ids = mock_collection.upsert.call_args.kwargs["ids"]
+    first_meta = mock_collection.upsert.call_args.kwargs["metadatas"]
+    assert len(first_ids) == 2
+
+    # Pretend the database now holds those chunks, then change only b()
+    mock_collection.get.return_value = {"ids": first_ids, "metadatas": first_meta}
+    mock_collection.upsert.reset_mock()
+    memory.memorize("app.py", "def a():\n    return 1\n\ndef b():\n    return 3\n")
+
+    new_ids = mock_collection.upsert.call_args.kwargs["ids"]
+    assert len(new_ids) == 1 and new_ids[0] not in first_ids
+    mock_collection.delete.assert_called_once_with(ids=[first_ids[1]])
+
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_recall_is_cached_until_memory_changes(mock_client):
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {"documents": [["PORT = 80"]], "metadatas": [[{"filename": "config.py"}]]}
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+
+    memory = MemoryEngine()
+    memory._embedder = MagicMock(return_value=[[0.1, 0.2]])
+
+    memory.recall("Database Config")
+    memory.recall("Database Config")
+    assert mock_collection.query.call_count == 1
+
+    # Learning something new invalidates results, but the query embedding is reused
+    memory.memorize("config.py", "PORT = 8080\n")
+    memory.recall("Database Config")
+    assert mock_collection.query.call_count == 2
+    assert memory._embedder.call_count == 1
+
+    stats = memory.stats()
+    assert stats["recall_hits"] == 1 and stats["recall_misses"] == 2
+    assert stats["embedding_hits"] == 1
+
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_lazy_memory_connects_on_first_use(mock_client):
+    memory = MemoryEngine(lazy=True)
+    mock_client.assert_not_called()
+
+    memory.forget("config.py")
+    memory.forget("main.py")
+    mock_client.assert_called_once()
+
+    memory.warm_up().join()
+    mock_client.assert_called_once()
+
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_retention_evicts_least_recently_used_then_expired(mock_client):
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "documents": [], "metadatas": []}
+    mock_collection.query.return_value = {"documents": [["A = 1"]], "metadatas": [[{"filename": "a.py"}]]}
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+
+    memory = MemoryEngine()
+    memory._embedder = MagicMock(return_value=[[0.1, 0.2]])
+    memory._ensure_lexical()
+    memory.memorize("a.py", "A = 1\n")
+    memory.memorize("b.py", "B = 2\n")
+    memory.recall("a", mode="vector")
+
+    # One chunk over the limit: b.py was used longest ago (a.py was just recalled)
+    with patch('src.services.memory.MEMORY_MAX_CHUNKS', 2):
+        memory.memorize("c.py", "C = 3\n")
+    mock_collection.delete.assert_called_with(where={"filename": {"$in": ["b.py"]}})
+    assert memory.stats()["files"] == 2
+
+    report = memory.enforce_retention(now=time.time() + 91 * 86400)
+    assert report["expired"] == 2
+    assert memory.stats()["files"] == 0 and memory.stats()["evicted"] == 3
+
+@patch('src.services.memory.chromadb.PersistentClient')
+def test_repeated_sections_are_all_kept(mock_client):
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": []}
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+
+    memory = MemoryEngine()
+    memory.memorize("app.py", "def a():\n    return 1\n\ndef b():\n    return 2\n\ndef a():\n    return 1\n")
+    ids = mock_collection.upsert.call_args.kwargs["ids"]
+    metadatas = mock_collection.upsert.call_args.kwargs["metadatas"]
+    assert len(ids) == len(set(ids)) == 3
+    assert sorted(m["start_line"] for m in metadatas) == [1, 4, 7]
+    assert len(memory.lexical.search("return")) == 3
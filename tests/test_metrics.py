@@ -0,0 +1,82 @@
+import json
+import re
+import urllib.request
+from src.core.metrics import Metrics, MetricsExporter
+from src.handlers.dispatcher import EventDispatcher
+
+# 1. Disabled metrics record nothing
+def test_disabled_metrics_are_noops():
+    registry = Metrics(enabled=False)
+    with registry.timer("recall"):
+        pass
+    registry.inc("model_calls")
+    registry.observe("prompt_chars", 100)
+
+    snapshot = registry.snapshot()
+    assert snapshot["stages"] == {} and snapshot["counters"] == {} and snapshot["sizes"] == {}
+
+# 2. Stage timings, sizes and counters end up in the snapshot
+def test_snapshot_collects_everything():
+    registry = Metrics(enabled=True)
+    with registry.timer("recall"):
+        pass
+    registry.record("model_call", 0.3)
+    registry.record("model_call", 1.5)
+    registry.observe("prompt_chars", 2000)
+    registry.inc("model_retries", 2)
+    registry.register("dispatcher", lambda: {"depth": 3, "note": "ignored"})
+
+    snapshot = registry.snapshot()
+    assert snapshot["stages"]["recall"]["count"] == 1
+    assert snapshot["stages"]["model_call"]["count"] == 2
+    assert snapshot["stages"]["model_call"]["max"] == 1.5
+    assert snapshot["sizes"]["prompt_chars"]["sum"] == 2000
+    assert snapshot["counters"]["model_retries"] == 2
+    assert snapshot["components"]["dispatcher"] == {"depth": 3}
+
+# 3. Prometheus text format: cumulative buckets, sum and count
+def test_prometheus_format():
+    registry = Metrics(enabled=True)
+    registry.record("write", 0.003)
+    registry.record("write", 0.2)
+    registry.inc("events_dropped")
+
+    text = registry.prometheus()
+    assert 'pythia_stage_seconds_bucket{stage="write",le="0.005"} 1' in text
+    assert 'pythia_stage_seconds_bucket{stage="write",le="0.25"} 2' in text
+    assert 'pythia_stage_seconds_bucket{stage="write",le="+Inf"} 2' in text
+    assert 'pythia_stage_seconds_count{stage="write"} 2' in text
+    assert "pythia_events_dropped_total 1" in text
+
+# 4. A hyphenated workspace name still yields valid metric names
+def test_prometheus_names_are_sanitized():
+    registry = Metrics(enabled=True)
+    dispatcher = EventDispatcher(workers=1)
+    dispatcher.submit("app.py", lambda: None, group="team-a")
+    registry.register("dispatcher", dispatcher.stats)
+    registry.register("jobs_team-a", lambda: {"queued": 1})
+    registry.inc("calls_gemini-2.0")
+
+    text = registry.prometheus()
+    assert "pythia_dispatcher_queued_team_a 1" in text
+    assert "pythia_jobs_team_a_queued 1" in text
+    assert "pythia_calls_gemini_2_0_total 1" in text
+    for line in text.splitlines():
+        name = line.split()[2] if line.startswith("#") else re.split(r"[{ ]", line)[0]
+        assert re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_]*", name), line
+
+# 5. The exporter serves /metrics on localhost and writes the JSON file
+def test_exporter_serves_and_writes(tmp_path):
+    registry = Metrics(enabled=True)
+    registry.inc("model_calls")
+    stats_file = tmp_path / "stats.json"
+    exporter = MetricsExporter(registry, port=0, path=str(stats_file), interval=60)
+    exporter.start()
+    try:
+        port = exporter.server.server_port
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        assert "pythia_model_calls_total 1" in body
+    finally:
+        exporter.stop()
+
+    assert json.loads(stats_file.read_text())["counters"]["model_calls"] == 1
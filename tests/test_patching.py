@@ -0,0 +1,51 @@
+import pytest
+from src.utils.patching import EditBlock, PatchError, apply_edit_blocks, check_syntax, parse_edit_blocks
+
+SOURCE = "def add(a, b):\n    return a + b\n\ndef sub(a, b):\n    return a - b\n"
+
+def block(search: str, replace: str) -> str:
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+# 1. Blocks are parsed in order; empty sides are allowed
+def test_parse_blocks():
+    answer = block("a\n", "b\n") + "\n" + block("c\n", "")
+    assert parse_edit_blocks(answer) == [EditBlock("a\n", "b\n"), EditBlock("c\n", "")]
+
+# 2. An answer without (complete) blocks is rejected
+@pytest.mark.parametrize("answer", ["def add(a, b): ...", "<<<<<<< SEARCH\nx\n=======\ny\n"])
+def test_parse_rejects_garbage(answer):
+    with pytest.raises(PatchError):
+        parse_edit_blocks(answer)
+
+# 3. Exact match replaces only that region
+def test_exact_apply():
+    result = apply_edit_blocks(SOURCE, [EditBlock("    return a - b\n", "    return b - a\n")])
+    assert result == SOURCE.replace("a - b", "b - a")
+
+# 4. A SEARCH that lost its indentation is matched and the replacement re-indented
+def test_indentation_is_restored():
+    result = apply_edit_blocks(SOURCE, [EditBlock("return a + b\n", "total = a + b\nreturn total\n")])
+    assert "    total = a + b\n    return total\n" in result
+
+# 5. Small typos in SEARCH are tolerated; unrelated text is not
+def test_fuzzy_match():
+    result = apply_edit_blocks(SOURCE, [EditBlock("def sub(a, b) :\n    return a - b\n", "def sub(a, b):\n    return 0\n")])
+    assert result.endswith("def sub(a, b):\n    return 0\n")
+    with pytest.raises(PatchError):
+        apply_edit_blocks(SOURCE, [EditBlock("class Nothing:\n    pass\n", "")])
+
+# 6. A SEARCH that matches several places is refused rather than guessed
+def test_ambiguous_block():
+    with pytest.raises(PatchError):
+        apply_edit_blocks(SOURCE + SOURCE, [EditBlock("    return a + b\n", "")])
+
+# 7. Empty SEARCH appends, and a missing final newline is kept missing
+def test_append_and_trailing_newline():
+    assert apply_edit_blocks("x = 1", [EditBlock("", "y = 2\n")]) == "x = 1\ny = 2"
+
+# 8. Edits that break a Python file that used to parse are rejected
+def test_check_syntax():
+    check_syntax("a.py", SOURCE, SOURCE + "\nprint('ok')\n")
+    check_syntax("a.txt", SOURCE, "def (")
+    with pytest.raises(PatchError):
+        check_syntax("a.py", SOURCE, SOURCE + "\ndef broken(:\n")
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+from src.utils.paths import is_watched_key, walk_workspace
+
+# 1. Tracked files anywhere in the tree, but never in excluded folders
+def test_is_watched_key():
+    assert is_watched_key("app.py")
+    assert is_watched_key("services/api/app.py")
+    assert not is_watched_key("image.png")
+    assert not is_watched_key(".pythia_history/objects/app.py")
+    assert not is_watched_key("web/node_modules/lib/index.js")
+    assert not is_watched_key("../outside.py")
+
+# 2. Include/exclude globs apply to the relative path and the file name
+def test_globs():
+    with patch('src.utils.paths.EXCLUDE_GLOBS', ["*.min.js", "generated/*"]):
+        assert not is_watched_key("static/app.min.js")
+        assert not is_watched_key("generated/models.py")
+        assert is_watched_key("static/app.js")
+    with patch('src.utils.paths.INCLUDE_GLOBS', ["*.py"]):
+        assert is_watched_key("src/app.py")
+        assert not is_watched_key("README.md")
+
+# 3. The walk prunes excluded folders instead of descending into them
+def test_walk_workspace(tmp_path):
+    (tmp_path / "src" / "api").mkdir(parents=True)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "src" / "api" / "app.py").write_text("x = 1")
+    (tmp_path / "README.md").write_text("# Hi")
+    (tmp_path / ".git" / "config.txt").write_text("[core]")
+
+    assert sorted(key for key, _ in walk_workspace(str(tmp_path))) == ["README.md", "src/api/app.py"]
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+from src.services.brain import Brain
+from src.services.fake_model import FakeModel
+from src.services.prefix_cache import ContextCache
+from src.services.prompts import GENERATE_PREFIX, GENERATE_SUFFIX, GENERATE_TEMPLATE, REFACTOR_TEMPLATE
+
+CONTEXT = "\n--- MEMORY: theme.txt ---\n" + "Primary color is Neon Green.\n" * 40
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+# 1. Splitting a template changes nothing about the prompt the model sees
+def test_prefix_plus_suffix_is_the_full_prompt():
+    values = dict(system_instruction="persona", context_str=CONTEXT, filename="a.py", file_ext=".py")
+    assert GENERATE_PREFIX.format(**values) + GENERATE_SUFFIX.format(**values) == GENERATE_TEMPLATE.format(**values)
+    # The refactor prompt is byte for byte what it was before the split, so cached answers stay valid
+    assert REFACTOR_TEMPLATE == """
+{system_instruction}
+--------------------------------------------------
+TASK: The user wants to modify the file '{filename}'.
+1. Read the CURRENT CONTENT below.
+2. Follow the USER INSTRUCTIONS at the bottom.
+3. Rewrite the FULL file with the changes applied.
+4. REMOVE the user's instruction comment from the final output.
+5. Output ONLY the code. No markdown.
+--------------------------------------------------
+CURRENT CONTENT:
+{current_content}
+--------------------------------------------------
+USER INSTRUCTIONS:
+{instructions}
+"""
+
+# 2. Handles are created for repeated, long prefixes only, and renewed when they run out
+def test_handles_follow_use_and_ttl():
+    clock = Clock()
+    cache = ContextCache(min_tokens=50, min_uses=2, ttl=100, clock=clock)
+    model = FakeModel()
+
+    assert cache.handle_for(model, "short") is None
+    assert cache.handle_for(model, CONTEXT) is None       # Seen once: not worth storing yet
+    handle = cache.handle_for(model, CONTEXT)
+    assert handle is not None
+    assert cache.handle_for(model, CONTEXT) == handle
+    assert cache.handle_for(object(), CONTEXT) is None    # Models without caching get full prompts
+
+    clock.now = 95                                        # Too close to expiry to rely on
+    assert cache.handle_for(model, CONTEXT) not in (None, handle)
+    assert cache.stats()["created"] == 2 and cache.stats()["hits"] == 1
+
+# 3. Files sharing their context send it once; an evicted cache falls back transparently
+def test_brain_sends_shared_prefix_once():
+    fake = FakeModel(responder=lambda prompt: "# " + prompt.rsplit("named '", 1)[1].split("'")[0])
+    brain = Brain(cache=None)
+    brain.context_cache = ContextCache(min_tokens=50)
+
+    with patch('src.services.brain.model', fake):
+        answers = [brain.generate(f"page_{i}.css", ".css", CONTEXT) for i in range(4)]
+        sent_with_cache = fake.sent_chars
+        fake.expire_prefixes()
+        answers.append(brain.generate("page_4.css", ".css", CONTEXT))
+        answers.append(brain.generate("page_5.css", ".css", CONTEXT))
+
+    assert answers == [f"# page_{i}.css" for i in range(6)]
+    assert all(CONTEXT in prompt for prompt in fake.prompts)
+    # Calls 3 and 4 sent only their suffix
+    assert fake.cached_chars > 0
+    assert sent_with_cache < 3 * len(fake.prompts[0])
+    assert brain.context_cache.stats()["created"] == 2
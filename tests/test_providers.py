@@ -0,0 +1,80 @@
+import time
+import pytest
+from src.services.brain import Brain
+from src.services.cache import ResponseCache
+from src.services.fake_model import FakeModel, FakeRateLimitError
+from src.services.providers import Backend, ProviderPool
+
+def backend(name, fake, seconds=None, light=False):
+    b = Backend(name, lambda: fake, light=light)
+    for _ in range(5 if seconds is not None else 0):
+        b.record(seconds, True)
+    return b
+
+def ask(model):
+    return model.generate_content("prompt").text
+
+# 1. Fast, healthy backends go first; light ones only serve light tasks
+def test_ranking():
+    slow = backend("slow", FakeModel(), seconds=1.0)
+    fast = backend("fast", FakeModel(), seconds=0.5)
+    flaky = backend("flaky", FakeModel(), seconds=0.4)   # Fails half the time: ranks as 1.2s
+    for _ in range(5):
+        flaky.record(None, False)
+    new = backend("new", FakeModel())
+    lite = backend("lite", FakeModel(), seconds=0.1, light=True)
+    pool = ProviderPool([new, slow, flaky, fast, lite])
+
+    assert [b.name for b in pool.ranked()] == ["fast", "slow", "flaky", "new"]
+    assert [b.name for b in pool.ranked(light=True)][:2] == ["lite", "fast"]
+
+# 2. A call outliving the primary's p95 is raced against the next backend, within budget
+def test_hedging_takes_the_first_good_answer():
+    primary = FakeModel(text="primary", latency=1.0)
+    pool = ProviderPool([backend("primary", primary, seconds=0.05),
+                         backend("second", FakeModel(text="second"), seconds=0.1)], min_hedge_delay=0.0)
+
+    started = time.perf_counter()
+    assert pool.call(ask) == "second"
+    assert time.perf_counter() - started < 0.5
+    assert pool.stats()["hedged"] == 1 and pool.stats()["second_hedge_wins"] == 1
+
+    # No budget for a second request: wait for the first
+    primary.latency = 0.2
+    assert pool.call(ask, can_hedge=lambda: False) == "primary"
+    assert pool.stats()["hedged"] == 1
+
+# 3. Failures move on to the next backend; a 429 is what surfaces when all fail
+def test_fallback_and_errors():
+    pool = ProviderPool([backend("down", FakeModel(schedule=[500])), backend("up", FakeModel(text="ok"))])
+    assert pool.call(ask) == "ok"
+    assert pool.stats()["down_errors"] == 1
+
+    pool = ProviderPool([backend("a", FakeModel(schedule=[500])), backend("b", FakeModel(schedule=[429]))])
+    with pytest.raises(FakeRateLimitError):
+        pool.call(ask)
+
+# 4. Brain routes through the pool: diagrams go to the light model, streams fall back too
+def test_brain_uses_the_pool():
+    main = FakeModel(text="code", schedule=[500])
+    lite = FakeModel(text="graph TD;")
+    brain = Brain(cache=None, providers=ProviderPool([
+        backend("main", main), backend("backup", FakeModel(text="backup code")), backend("lite", lite, light=True)
+    ], hedging=False))
+
+    assert brain.generate("a.py", ".py") == "backup code"
+    assert "".join(brain.generate_stream("b.py", ".py")) == "code"
+    assert brain.generate("flow.mermaid", ".mermaid") == "graph TD;"
+    assert lite.calls == 1 and main.calls == 2
+
+# 5. A fallback's answer is cached under the fallback: the primary is still asked next time
+def test_cache_follows_the_backend_that_answered(tmp_path):
+    main = FakeModel(text="code", schedule=[500])
+    brain = Brain(cache=ResponseCache(path=str(tmp_path)), providers=ProviderPool([
+        backend("main", main), backend("backup", FakeModel(text="backup code"))
+    ], hedging=False))
+
+    assert brain.generate("a.py", ".py") == "backup code"
+    assert brain.generate("a.py", ".py") == "code"
+    assert brain.generate("a.py", ".py") == "code"
+    assert main.calls == 2
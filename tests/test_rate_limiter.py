@@ -0,0 +1,85 @@
+import random
+import pytest
+from unittest.mock import patch
+from src.services.brain import Brain
+from src.services.fake_model import FakeModel, FakeRateLimitError
+from src.services.rate_limiter import RateLimiter, RateLimitDeferred, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def make_limiter(rpm=60, tpm=100_000, max_wait=5.0):
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=rpm, tpm=tpm, max_wait=max_wait, clock=clock, sleep=clock.sleep, rng=random.Random(1))
+    return limiter, clock
+
+# 1. Request budget: the burst is free, then calls are spaced out
+def test_requests_per_minute_budget():
+    limiter, clock = make_limiter(rpm=2, max_wait=60)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.slept == []
+
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(30.0)]
+
+# 2. Token budget counts prompt size, not just calls
+def test_tokens_per_minute_budget():
+    limiter, clock = make_limiter(tpm=1000, max_wait=60)
+    limiter.acquire(tokens=1000)
+    limiter.acquire(tokens=500)
+    assert clock.slept == [pytest.approx(30.0)]
+
+# 3. A long wait is refused up front instead of stalling the worker
+def test_exhausted_budget_defers():
+    limiter, clock = make_limiter(rpm=1, max_wait=5)
+    limiter.acquire()
+    with pytest.raises(RateLimitDeferred) as info:
+        limiter.acquire()
+    assert info.value.retry_after == pytest.approx(60.0)
+    assert clock.slept == []
+    assert limiter.stats()["deferred"] == 1
+
+# 4. Server hints win over our own backoff curve
+def test_backoff_honours_retry_after():
+    limiter, _ = make_limiter()
+    assert parse_retry_after(FakeRateLimitError(retry_after=7)) == 7.0
+    assert 7.0 <= limiter.backoff(0, retry_after=7.0) <= 7.7
+
+    delays = [limiter.backoff(attempt) for attempt in range(4)]
+    assert delays[0] <= 2.0 and delays[3] >= 8.0
+
+# 5. Brain against a fake model that answers 429 on a schedule
+def test_brain_retries_through_scheduled_429s():
+    limiter, clock = make_limiter()
+    fake = FakeModel(text="print('ok')", schedule=[429, 429, 200])
+
+    with patch('src.services.brain.model', fake):
+        result = Brain(limiter=limiter).generate("a.py", ".py")
+
+    assert result == "print('ok')"
+    assert fake.calls == 3
+    assert limiter.stats()["throttled"] == 2
+    assert len(clock.slept) == 2
+
+# 6. A long server pause turns into a deferral, not a 90 second sleep
+def test_brain_defers_on_long_retry_after():
+    limiter, clock = make_limiter(max_wait=5)
+    fake = FakeModel(schedule=[429], retry_after=40)
+
+    with patch('src.services.brain.model', fake):
+        with pytest.raises(RateLimitDeferred) as info:
+            Brain(limiter=limiter).generate("a.py", ".py")
+
+    assert fake.calls == 1
+    assert info.value.retry_after >= 40
+    assert clock.slept == []
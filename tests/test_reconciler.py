@@ -0,0 +1,120 @@
+import os
+from unittest.mock import MagicMock, patch
+from src.services.reconciler import WorkspaceReconciler
+from src.utils.file_ops import hash_file
+from src.utils.manifest import Manifest, stat_entry
+from src.utils.paths import walk_workspace
+
+def make_workspace(tmp_path):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "config.py").write_text("PORT = 80\n")
+    (root / "notes.md").write_text("# Notes\n")
+    (root / "image.png").write_bytes(b"\x89PNG")
+    (root / ".hidden.py").write_text("x = 1\n")
+    return root
+
+# 1. First run learns every tracked file in one bulk call
+def test_first_run_learns_everything(tmp_path):
+    root = make_workspace(tmp_path)
+    memory = MagicMock()
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+
+    stats = WorkspaceReconciler(str(root), memory, manifest).run()
+
+    memory.memorize_many.assert_called_once()
+    assert set(memory.memorize_many.call_args.args[0]) == {"config.py", "notes.md"}
+    assert stats["learned"] == 2
+    assert os.path.exists(tmp_path / "manifest.json")
+
+# 2. A restart only touches what changed, and forgets what was deleted
+def test_restart_only_processes_differences(tmp_path):
+    root = make_workspace(tmp_path)
+    WorkspaceReconciler(str(root), MagicMock(), Manifest(str(tmp_path / "manifest.json"))).run()
+
+    (root / "config.py").write_text("PORT = 8080\n")
+    os.remove(root / "notes.md")
+    memory = MagicMock()
+    stats = WorkspaceReconciler(str(root), memory, Manifest(str(tmp_path / "manifest.json"))).run()
+
+    assert list(memory.memorize_many.call_args.args[0]) == ["config.py"]
+    memory.forget_many.assert_called_once_with(["notes.md"])
+    assert stats == {**stats, "files": 1, "learned": 1, "forgotten": 1}
+
+# 3. A touched file with identical content is not re-learned
+def test_touch_without_change_is_skipped(tmp_path):
+    root = make_workspace(tmp_path)
+    WorkspaceReconciler(str(root), MagicMock(), Manifest(str(tmp_path / "manifest.json"))).run()
+
+    stat = os.stat(root / "config.py")
+    os.utime(root / "config.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    memory = MagicMock()
+    stats = WorkspaceReconciler(str(root), memory, Manifest(str(tmp_path / "manifest.json"))).run()
+
+    assert stats["candidates"] == 1
+    memory.memorize_many.assert_not_called()
+
+# 4. A file deleted between the scan and hashing is forgotten; the rest of the scan goes on
+def test_file_deleted_after_scan(tmp_path):
+    root = make_workspace(tmp_path)
+    WorkspaceReconciler(str(root), MagicMock(), Manifest(str(tmp_path / "manifest.json"))).run()
+
+    (root / "config.py").write_text("PORT = 8080\n")
+    (root / "notes.md").write_text("# Changed notes\n")
+    memory = MagicMock()
+    reconciler = WorkspaceReconciler(str(root), memory, Manifest(str(tmp_path / "manifest.json")))
+    scan = reconciler._scan
+
+    def scan_then_delete():
+        found = scan()
+        os.remove(root / "notes.md")
+        return found
+
+    reconciler._scan = scan_then_delete
+    stats = reconciler.run()
+
+    assert list(memory.memorize_many.call_args.args[0]) == ["config.py"]
+    memory.forget_many.assert_called_once_with(["notes.md"])
+    assert stats == {**stats, "files": 1, "learned": 1, "forgotten": 1}
+    assert Manifest(str(tmp_path / "manifest.json")).keys() == ["config.py"]
+
+# 5. A file the watcher learns while the scan runs is not forgotten
+def test_file_learned_during_scan_is_kept(tmp_path):
+    root = make_workspace(tmp_path)
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    memory = MagicMock()
+    reconciler = WorkspaceReconciler(str(root), memory, manifest)
+    scan = reconciler._scan
+
+    def scan_while_watching():
+        found = scan()
+        (root / "todo.txt").write_text("- ship it\n")
+        manifest.set("todo.txt", stat_entry(str(root / "todo.txt"), hash_file(str(root / "todo.txt"))))
+        return found
+
+    reconciler._scan = scan_while_watching
+    stats = reconciler.run()
+
+    memory.forget_many.assert_not_called()
+    assert stats["forgotten"] == 0
+    assert "todo.txt" in manifest.keys()
+
+# 6. A file deleted between listing the folder and its stat is skipped, not fatal
+def test_file_deleted_during_scan(tmp_path):
+    root = make_workspace(tmp_path)
+    WorkspaceReconciler(str(root), MagicMock(), Manifest(str(tmp_path / "manifest.json"))).run()
+    (root / "config.py").write_text("PORT = 8080\n")
+
+    def walk_and_delete(folder):
+        for key, entry in walk_workspace(folder):
+            if key == "notes.md":
+                os.remove(entry.path)
+            yield key, entry
+
+    memory = MagicMock()
+    with patch('src.services.reconciler.walk_workspace', walk_and_delete):
+        stats = WorkspaceReconciler(str(root), memory, Manifest(str(tmp_path / "manifest.json"))).run()
+
+    assert list(memory.memorize_many.call_args.args[0]) == ["config.py"]
+    memory.forget_many.assert_called_once_with(["notes.md"])
+    assert stats == {**stats, "files": 1, "learned": 1, "forgotten": 1}
@@ -0,0 +1,33 @@
+import os
+import pytest
+from src.core.workspaces import DEFAULT_WORKSPACE, load_workspaces
+
+# 1. No WORKSPACES: TARGET_FOLDER alone, with the single-folder state files
+def test_default_workspace():
+    workspaces = load_workspaces([])
+    assert [ws.name for ws in workspaces] == [DEFAULT_WORKSPACE]
+    assert workspaces[0].collection == "oracle_knowledge"
+    assert workspaces[0].manifest_path == "pythia_manifest.json"
+
+# 2. Every other workspace gets its own collection, manifest and job store
+def test_workspace_state_is_separate(tmp_path):
+    team_a, team_b = load_workspaces([
+        {"name": "team_a", "path": str(tmp_path / "a"), "settings": {"REFACTOR_MODE": "rewrite"}},
+        {"name": "team_b", "path": str(tmp_path / "b")},
+    ])
+    assert team_a.root == os.path.abspath(tmp_path / "a")
+    assert team_a.settings == {"REFACTOR_MODE": "rewrite"} and team_b.settings == {}
+    assert (team_a.collection, team_b.collection) == ("oracle_knowledge_team_a", "oracle_knowledge_team_b")
+    assert team_a.manifest_path == "pythia_manifest_team_a.json"
+    assert team_b.jobs_path == "pythia_jobs_team_b.db"
+
+# 3. Bad names, duplicates, unknown settings and nested folders are refused
+@pytest.mark.parametrize("entries", [
+    [{"name": "team a", "path": "a"}],
+    [{"name": "a1", "path": "a"}, {"name": "a1", "path": "b"}],
+    [{"name": "a1", "path": "a", "settings": {"DB_PATH": "elsewhere"}}],
+    [{"name": "a1", "path": "a"}, {"name": "a2", "path": "a/nested"}],
+])
+def test_invalid_workspaces(entries):
+    with pytest.raises(ValueError):
+        load_workspaces(entries)